@@ -1,8 +1,35 @@
 import os
+import re
+import codecs
+import copy
+import json
+import hashlib
 import sys
-import msvcrt
+import time
+import heapq
+import bisect
+import mmap
+import shutil
+import threading
+import unicodedata
+import asyncio
+import inspect
+from array import array
+from collections import OrderedDict, deque
 from enum import Enum
-from typing import List, Tuple, Union
+from functools import lru_cache
+from itertools import accumulate
+from typing import List, NamedTuple, Tuple, Union
+
+try:
+    import msvcrt
+except ImportError:  # 非Windows环境只能使用无终端模式（回放、测试）
+    msvcrt = None
+
+try:
+    import numpy
+except ImportError:  # 图表降采样退回纯Python实现
+    numpy = None
 
 # 启用ANSI转义码
 if os.name == 'nt':
@@ -18,12 +45,748 @@ class Color:
     HIGHLIGHT = '\033[7m'
     SELECTED_BG = '\033[44m'
 
+# 规范化按键码：扩展键（方向键、功能键等）统一为 '\xe0' + 扫描码
+class Key:
+    TAB = '\t'
+    ENTER = '\r'
+    ESC = '\x1b'
+    BACKSPACE = '\x08'
+    UP = '\xe0H'
+    DOWN = '\xe0P'
+    LEFT = '\xe0K'
+    RIGHT = '\xe0M'
+    HOME = '\xe0G'
+    END = '\xe0O'
+    PAGE_UP = '\xe0I'
+    PAGE_DOWN = '\xe0Q'
+    DELETE = '\xe0S'
+    SHIFT_TAB = '\xe0\x0f'
+    ALT_UP = '\xe0\x98'
+    ALT_DOWN = '\xe0\xa0'
+    ALT_LEFT = '\xe0\x9b'
+    ALT_RIGHT = '\xe0\x9d'
+    F1, F2, F3, F4, F5, F6, F7, F8, F9, F10 = ('\xe0' + c for c in ';<=>?@ABCD')
+    F11 = '\xe0\x85'
+    F12 = '\xe0\x86'
+    CTRL_UP = '\xe0\x8d'
+    CTRL_DOWN = '\xe0\x91'
+    CTRL_LEFT = '\xe0s'
+    CTRL_RIGHT = '\xe0t'
+    CTRL_A = '\x01'
+    # 控制台扫描码不区分Shift+方向键，以下按键只能通过VT输入序列得到（见 CSI_KEYS），
+    # 需要 main_loop(vt_input=True) 或 mouse=True 启用VT输入
+    SHIFT_UP = '\x1b[1;2A'
+    SHIFT_DOWN = '\x1b[1;2B'
+    SHIFT_RIGHT = '\x1b[1;2C'
+    SHIFT_LEFT = '\x1b[1;2D'
+    CTRL_SHIFT_UP = '\x1b[1;6A'
+    CTRL_SHIFT_DOWN = '\x1b[1;6B'
+    CTRL_SHIFT_RIGHT = '\x1b[1;6C'
+    CTRL_SHIFT_LEFT = '\x1b[1;6D'
+
+# 终端输入序列（启用VT输入后方向键等以 ESC [ 序列到达）-> 规范化按键码
+# 键为 (序列名, 修饰码)：修饰码 1=无 2=Shift 3=Alt 5=Ctrl
+CSI_KEYS = {
+    ('A', 1): Key.UP, ('B', 1): Key.DOWN, ('C', 1): Key.RIGHT, ('D', 1): Key.LEFT,
+    ('H', 1): Key.HOME, ('F', 1): Key.END, ('Z', 1): Key.SHIFT_TAB,
+    ('1~', 1): Key.HOME, ('4~', 1): Key.END, ('3~', 1): Key.DELETE,
+    ('5~', 1): Key.PAGE_UP, ('6~', 1): Key.PAGE_DOWN,
+    ('A', 3): Key.ALT_UP, ('B', 3): Key.ALT_DOWN, ('C', 3): Key.ALT_RIGHT, ('D', 3): Key.ALT_LEFT,
+    ('A', 5): Key.CTRL_UP, ('B', 5): Key.CTRL_DOWN, ('C', 5): Key.CTRL_RIGHT, ('D', 5): Key.CTRL_LEFT,
+    ('P', 1): Key.F1, ('Q', 1): Key.F2, ('R', 1): Key.F3, ('S', 1): Key.F4,
+    ('15~', 1): Key.F5, ('17~', 1): Key.F6, ('18~', 1): Key.F7, ('19~', 1): Key.F8,
+    ('20~', 1): Key.F9, ('21~', 1): Key.F10, ('23~', 1): Key.F11, ('24~', 1): Key.F12,
+}
+
+def decode_csi(params, final):
+    """把 ESC [ params final 序列转换为按键码；SGR鼠标事件和无法识别的序列原样返回"""
+    if not params.startswith('<'):
+        code, _, modifier = params.partition(';')
+        name = code + final if final == '~' else final
+        key = CSI_KEYS.get((name, int(modifier) if modifier.isdigit() else 1))
+        if key is not None:
+            return key
+    return '\x1b[' + params + final
+
+def _read_escape():
+    """读取ESC之后的序列（调用时ESC已读出且后续字符已到达）"""
+    ch = msvcrt.getwch()
+    if ch == 'O':  # SS3：应用光标键模式下的方向键
+        return decode_csi('', msvcrt.getwch())
+    if ch != '[':
+        return '\x1b' + ch
+    params = ''
+    while True:
+        ch = msvcrt.getwch()
+        if '\x40' <= ch <= '\x7e':
+            return decode_csi(params, ch)
+        params += ch
+
+def read_key():
+    """读取一个按键，扩展键的前缀和扫描码合并为一个按键码
+
+    ESC后紧跟着已到达的字符时按终端序列解析（方向键、SGR鼠标事件），单独的ESC仍为 Key.ESC。
+    """
+    key = msvcrt.getwch()
+    if key in ('\x00', '\xe0'):
+        return '\xe0' + msvcrt.getwch()
+    if key == Key.ESC and msvcrt.kbhit():
+        return _read_escape()
+    if key == '\x7f':  # VT输入下退格键发送DEL
+        return Key.BACKSPACE
+    return key
+
+class MouseEvent(NamedTuple):
+    """SGR鼠标事件（坐标0起始）"""
+    kind: str     # press / release / drag / move / wheel_up / wheel_down
+    button: int   # 0 左键 1 中键 2 右键
+    x: int
+    y: int
+    mods: int     # MOUSE_SHIFT / MOUSE_ALT / MOUSE_CTRL 的组合
+
+MOUSE_PREFIX = '\x1b[<'
+MOUSE_SHIFT, MOUSE_ALT, MOUSE_CTRL = 4, 8, 16
+MOUSE_ON = b"\033[?1002h\033[?1006h"  # 按键和拖动报告 + SGR坐标格式
+MOUSE_OFF = b"\033[?1006l\033[?1002l"
+WHEEL_KEYS = {'wheel_up': Key.UP, 'wheel_down': Key.DOWN}
+WHEEL_LINES = 3  # 滚轮每格滚动的行数
+
+@lru_cache(maxsize=256)
+def parse_mouse(key):
+    """解析 ESC [ < b ; x ; y M/m 形式的鼠标按键码，不是鼠标事件时返回None"""
+    if not key.startswith(MOUSE_PREFIX):
+        return None
+    try:
+        b, x, y = map(int, key[3:-1].split(';'))
+    except ValueError:
+        return None
+    if b & 64:
+        kind = 'wheel_down' if b & 1 else 'wheel_up'
+    elif b & 32:
+        kind = 'move' if b & 3 == 3 else 'drag'
+    else:
+        kind = 'press' if key[-1] == 'M' else 'release'
+    return MouseEvent(kind, b & 3, x - 1, y - 1, b & (MOUSE_SHIFT | MOUSE_ALT | MOUSE_CTRL))
+
+class ConsoleInput:
+    """控制台键盘（及鼠标）输入"""
+    WAIT_SLICE = 0.05  # 无法阻塞等待输入句柄时每次睡眠的秒数
+
+    def __init__(self):
+        self._mode = None  # enable_mouse 之前的控制台输入模式，退出时原样恢复
+
+    def read_key(self):
+        return read_key()
+
+    def key_ready(self):
+        """是否有按键等待读取"""
+        return msvcrt.kbhit()
+
+    def wait_key(self, timeout):
+        """最多等待 timeout 秒，按键到达时立即返回；返回是否有按键可读"""
+        deadline = time.perf_counter() + timeout
+        handle = kernel32.GetStdHandle(-10) if os.name == 'nt' else None
+        while not self.key_ready():
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                return False
+            # 输入句柄有信号但不是按键（如焦点变化）时 kbhit 不会取走该事件，稍等再查以免空转
+            if handle is None or kernel32.WaitForSingleObject(handle, int(remaining * 1000)) == 0:
+                time.sleep(min(remaining, self.WAIT_SLICE))
+        return True
+
+    def enable_vt_input(self, enabled=True):
+        """启用VT输入：方向键等以 ESC [ 序列到达，Shift+方向键（Key.SHIFT_*）只有这样才能区分；
+        关闭时恢复启用前的模式"""
+        self._set_mode(enabled, 0x0200)
+
+    def enable_mouse(self, enabled=True):
+        """Windows控制台需要启用VT输入，鼠标事件才会以SGR序列到达；关闭时恢复启用前的模式"""
+        # 启用VT输入和扩展标志，关闭快速编辑（否则点击会进入文本选择）
+        self._set_mode(enabled, 0x0200 | 0x0080, 0x0040)
+
+    def _set_mode(self, enabled, add, remove=0):
+        if os.name != 'nt':
+            return
+        handle = kernel32.GetStdHandle(-10)
+        if not enabled:
+            if self._mode is not None:
+                kernel32.SetConsoleMode(handle, self._mode)
+                self._mode = None
+            return
+        mode = ctypes.c_uint32()
+        kernel32.GetConsoleMode(handle, ctypes.byref(mode))
+        if self._mode is None:
+            self._mode = mode.value
+        kernel32.SetConsoleMode(handle, (mode.value | add) & ~remove)
+
+class InputRecorder:
+    """记录输入源读出的每个按键及其时间（相对第一个按键的秒数）"""
+    def __init__(self, source):
+        self.source = source
+        self.events = []
+        self._start = None
+
+    def read_key(self):
+        key = self.source.read_key()
+        now = time.perf_counter()
+        if self._start is None:
+            self._start = now
+        self.events.append((now - self._start, key))
+        return key
+
+    def key_ready(self):
+        return self.source.key_ready()
+
+    def wait_key(self, timeout):
+        return self.source.wait_key(timeout)
+
+    def enable_vt_input(self, enabled=True):
+        self.source.enable_vt_input(enabled)
+
+    def enable_mouse(self, enabled=True):
+        self.source.enable_mouse(enabled)
+
+    def save(self, path):
+        """保存为会话文件"""
+        save_session(path, self.events)
+
+def save_session(path, events):
+    """把 (时间, 按键码) 序列写成JSON Lines会话文件"""
+    with open(path, 'w', encoding='utf-8') as f:
+        for t, key in events:
+            f.write(json.dumps({"t": round(t, 6), "key": key}) + "\n")
+
+def load_session(path):
+    """读取会话文件，返回 (时间, 按键码) 列表"""
+    with open(path, encoding='utf-8') as f:
+        return [(event["t"], event["key"]) for event in map(json.loads, f) if event]
+
+NAVIGATION_KEYS = frozenset((Key.UP, Key.DOWN, Key.LEFT, Key.RIGHT, Key.PAGE_UP, Key.PAGE_DOWN,
+                             Key.SHIFT_UP, Key.SHIFT_DOWN, Key.SHIFT_LEFT, Key.SHIFT_RIGHT))
+
+def coalesce_keys(keys):
+    """把连续相同的导航键合并为 (按键码, 次数)，其余按键次数为1
+
+    连续同方向的滚轮事件按第一个事件的位置合并计数；连续的拖动事件只保留最后一个位置。
+    """
+    batch = []
+    for key in keys:
+        if batch:
+            last, count = batch[-1]
+            if key == last and key in NAVIGATION_KEYS:
+                batch[-1] = (key, count + 1)
+                continue
+            event, previous = parse_mouse(key), parse_mouse(last)
+            if event and previous and (event.kind, event.button, event.mods) == \
+                    (previous.kind, previous.button, previous.mods):
+                if event.kind in WHEEL_KEYS:
+                    batch[-1] = (last, count + 1)
+                    continue
+                if event.kind in ('drag', 'move'):
+                    batch[-1] = (key, 1)
+                    continue
+        batch.append((key, 1))
+    return batch
+
+def is_text_key(key):
+    """是否为可输入的普通字符"""
+    return len(key) == 1 and key.isprintable()
+
 # 组件类型枚举
 class ComponentType(Enum):
     INPUT_BOX = 1
     LIST_BOX = 2
     BUTTON_GROUP = 3
     GRID_BOX = 4
+    TABLE = 5
+    TREE_VIEW = 6
+    DIALOG = 7
+    CHART = 8
+
+@lru_cache(maxsize=4096)
+def _cell_text(text):
+    """把文本展开为逐列字符：全角字符后补一个占位列"""
+    if text.isascii():
+        return text
+    cells = []
+    for ch in text:
+        cells.append(ch)
+        if unicodedata.east_asian_width(ch) in ('W', 'F'):
+            cells.append(ScreenBuffer.WIDE_FILL)
+    return ''.join(cells)
+
+def text_width(text):
+    """文本在终端中占用的列数"""
+    return len(_cell_text(text))
+
+class BorderStyle(NamedTuple):
+    """边框字符集"""
+    top_left: str
+    horizontal: str
+    top_right: str
+    vertical: str
+    bottom_left: str
+    bottom_right: str
+
+BORDER_STYLES = {
+    'single': BorderStyle('┌', '─', '┐', '│', '└', '┘'),
+    'double': BorderStyle('╔', '═', '╗', '║', '╚', '╝'),
+    'rounded': BorderStyle('╭', '─', '╮', '│', '╰', '╯'),
+    'ascii': BorderStyle('+', '-', '+', '|', '+', '+'),
+}
+
+class Fragment(NamedTuple):
+    """预编码的输出片段：cells 为写入单元格模型的UTF-32逐列字符，data 为带样式的UTF-8字节"""
+    text: str
+    style: str
+    cells: bytes
+    data: bytes
+
+@lru_cache(maxsize=8192)
+def fragment(text, style=''):
+    """(文本, 样式) 对应的预编码片段，用于标题、边框、按钮等不变的内容"""
+    data = f"{style}{text}{Color.RESET}" if style else text
+    return Fragment(text, style, _cell_text(text).encode('utf-32-le'), data.encode('utf-8'))
+
+@lru_cache(maxsize=16384)
+def cursor_to(x, y):
+    """移动光标到(x, y)的转义序列（0起始坐标）"""
+    return f"\033[{y+1};{x+1}H".encode('ascii')
+
+@lru_cache(maxsize=1024)
+def frame_fragments(width, style='', border='single'):
+    """边框模板：(顶边, 空白内部行, 底边) 三个预编码片段"""
+    b = BORDER_STYLES[border]
+    inner = width - 2
+    return (fragment(b.top_left + b.horizontal * inner + b.top_right, style),
+            fragment(b.vertical + ' ' * inner + b.vertical, style),
+            fragment(b.bottom_left + b.horizontal * inner + b.bottom_right, style))
+
+class ScreenBuffer:
+    """屏幕单元格存储：字符码位和样式编号分别存放在定长数组中"""
+    __slots__ = ('width', 'height', 'chars', 'styles', '_style_table', '_style_ids')
+    WIDE_FILL = '\0'  # 全角字符右半列的占位符
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.chars = array('I', b' \0\0\0' * (width * height))
+        self.styles = array('H', bytes(2 * width * height))
+        self._style_table = ['']
+        self._style_ids = {'': 0}
+
+    def style_id(self, style):
+        """样式转义串 -> 样式编号"""
+        sid = self._style_ids.get(style)
+        if sid is None:
+            sid = self._style_ids[style] = len(self._style_table)
+            self._style_table.append(style)
+        return sid
+
+    def style_of(self, sid):
+        """样式编号 -> 样式转义串"""
+        return self._style_table[sid]
+
+    def put(self, x, y, text, style=''):
+        """写入一段文本，超出屏幕的部分被裁剪"""
+        self.put_cells(x, y, _cell_text(text).encode('utf-32-le'), style)
+
+    def put_cells(self, x, y, cells, style=''):
+        """写入已编码为UTF-32的逐列字符"""
+        if not 0 <= y < self.height:
+            return
+        start = max(x, 0)
+        end = min(x + len(cells) // 4, self.width)
+        if start >= end:
+            return
+        base = y * self.width
+        row = array('I')
+        row.frombytes(cells[(start - x) * 4:(end - x) * 4])
+        self.chars[base + start:base + end] = row
+        self.styles[base + start:base + end] = array('H', [self.style_id(style)]) * (end - start)
+
+    def clear(self):
+        """清空所有单元格"""
+        size = self.width * self.height
+        self.chars = array('I', b' \0\0\0' * size)
+        self.styles = array('H', bytes(2 * size))
+
+    def scroll(self, top, bottom, n):
+        """第top~bottom行的内容上移n行（n<0时下移），空出的行填空白"""
+        width = self.width
+        start, end = top * width, (bottom + 1) * width
+        shift = n * width
+        blank_chars = array('I', b' \0\0\0' * abs(shift))
+        blank_styles = array('H', bytes(2 * abs(shift)))
+        if n > 0:
+            self.chars[start:end] = self.chars[start + shift:end] + blank_chars
+            self.styles[start:end] = self.styles[start + shift:end] + blank_styles
+        else:
+            self.chars[start:end] = blank_chars + self.chars[start:end + shift]
+            self.styles[start:end] = blank_styles + self.styles[start:end + shift]
+
+    def row_text(self, y):
+        """取第y行的文本（去掉全角占位列）"""
+        row = self.chars[y * self.width:(y + 1) * self.width]
+        return row.tobytes().decode('utf-32-le').replace(self.WIDE_FILL, '')
+
+    def save_region(self, x, y, width, height):
+        """保存矩形区域的单元格（超出屏幕的部分被裁剪）"""
+        x0, y0 = max(x, 0), max(y, 0)
+        x1, y1 = min(x + width, self.width), min(y + height, self.height)
+        rows = []
+        for row in range(y0, y1):
+            base = row * self.width
+            rows.append((self.chars[base + x0:base + x1], self.styles[base + x0:base + x1]))
+        return SavedRegion(x0, y0, rows)
+
+    def snapshot(self):
+        """导出当前内容：逐行文本 + 按行游程编码的样式表"""
+        runs = []
+        width = self.width
+        for y in range(self.height):
+            row = self.styles[y * width:(y + 1) * width]
+            x = 0
+            while x < width:
+                sid = row[x]
+                end = x + 1
+                while end < width and row[end] == sid:
+                    end += 1
+                if sid:
+                    runs.append((x, y, end - x, self._style_table[sid]))
+                x = end
+        return Snapshot(width, self.height,
+                        tuple(self.row_text(y).rstrip() for y in range(self.height)),
+                        tuple(runs))
+
+class SavedRegion(NamedTuple):
+    """被覆盖区域的单元格副本：rows 为逐行的 (字符数组, 样式数组)"""
+    x: int
+    y: int
+    rows: list
+
+class Snapshot(NamedTuple):
+    """屏幕快照：text 为去掉行尾空白的逐行文本，styles 为 (x, y, 长度, 样式) 游程"""
+    width: int
+    height: int
+    text: tuple
+    styles: tuple
+
+    def save(self, path):
+        """保存为JSON（金样文件）"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({"width": self.width, "height": self.height,
+                       "text": list(self.text), "styles": [list(run) for run in self.styles]},
+                      f, ensure_ascii=False, indent=0)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(data["width"], data["height"], tuple(data["text"]),
+                   tuple(tuple(run) for run in data["styles"]))
+
+    def runs_by_row(self):
+        """按行分组的样式游程 {行: [(x, 长度, 样式), ...]}"""
+        rows = {}
+        for x, y, length, style in self.styles:
+            rows.setdefault(y, []).append((x, length, style))
+        return rows
+
+def _row_cells(snapshot, runs, y):
+    """快照第y行逐列的 (字符, 样式) 列表"""
+    text = _cell_text(snapshot.text[y]) if y < len(snapshot.text) else ''
+    styles = [''] * snapshot.width
+    for x, length, style in runs.get(y, ()):
+        styles[x:x + length] = [style] * length
+    return list(zip(text.ljust(snapshot.width), styles))
+
+def diff_snapshots(expected, actual):
+    """比较两个快照，返回差异区域的矩形列表 [(x, y, 宽, 高), ...]"""
+    expected_runs, actual_runs = expected.runs_by_row(), actual.runs_by_row()
+    spans = []
+    for y in range(max(expected.height, actual.height)):
+        # 文本和样式都相同的行直接跳过
+        text_a = expected.text[y] if y < len(expected.text) else None
+        text_b = actual.text[y] if y < len(actual.text) else None
+        if text_a == text_b and expected_runs.get(y) == actual_runs.get(y):
+            continue
+        a = _row_cells(expected, expected_runs, y)
+        b = _row_cells(actual, actual_runs, y)
+        columns = [x for x in range(max(len(a), len(b)))
+                   if x >= len(a) or x >= len(b) or a[x] != b[x]]
+        if columns:
+            spans.append((y, columns[0], columns[-1] + 1))
+
+    # 相邻行的重叠区间合并为矩形
+    rects = []
+    for y, x0, x1 in spans:
+        if rects:
+            rx, ry, rw, rh = rects[-1]
+            if ry + rh == y and x0 < rx + rw and x1 > rx:
+                left, right = min(rx, x0), max(rx + rw, x1)
+                rects[-1] = (left, ry, right - left, rh + 1)
+                continue
+        rects.append((x0, y, x1 - x0, 1))
+    return rects
+
+def assert_golden(screen, path, max_frame_bytes=None, update=False):
+    """把屏幕与金样快照比较，并检查最近一帧的输出字节数
+
+    金样文件不存在或 update=True 时写入当前快照。
+    """
+    snapshot = screen.snapshot()
+    if update or not os.path.exists(path):
+        snapshot.save(path)
+        return
+    problems = []
+    rects = diff_snapshots(Snapshot.load(path), snapshot)
+    if rects:
+        problems.append("screen differs in " + ", ".join(
+            f"({x},{y} {w}x{h})" for x, y, w, h in rects))
+    if max_frame_bytes is not None and screen.last_frame_bytes > max_frame_bytes:
+        problems.append(f"frame wrote {screen.last_frame_bytes} bytes "
+                        f"(budget {max_frame_bytes})")
+    if problems:
+        raise AssertionError(f"{path}: " + "; ".join(problems))
+
+def is_terminal(stream):
+    """stream 是否为交互终端（管道、文件、CI日志等返回False）"""
+    isatty = getattr(stream, 'isatty', None)
+    try:
+        return bool(isatty and isatty())
+    except ValueError:  # 已关闭的流
+        return False
+
+def _ascii_glyphs():
+    """框线、块、盲文等字符到ASCII的替换表"""
+    table = {}
+    for style in BORDER_STYLES.values():
+        for corner in (style.top_left, style.top_right, style.bottom_left, style.bottom_right):
+            table[corner] = '+'
+        table[style.horizontal] = '-'
+        table[style.vertical] = '|'
+    for glyph, ascii_glyph in zip(" ▁▂▃▄▅▆▇█", " ..::==##"):
+        table[glyph] = ascii_glyph
+    for glyph in "▏▎▍▌▋▊▉":
+        table[glyph] = '|'
+    table[0x2800] = ' '
+    for code in range(0x2801, 0x2900):  # 盲文点阵
+        table[code] = '.'
+    table.update({'▶': '>', '√': 'v'})
+    return str.maketrans(table)
+
+ASCII_GLYPHS = _ascii_glyphs()
+GLYPH_SAMPLE = "┌─│█▶"  # 终端编码不能表示这些字符时改用 ASCII_GLYPHS
+
+def _stream_fd(stream):
+    """流对应的文件描述符，没有时返回None"""
+    try:
+        return stream.fileno()
+    except (AttributeError, OSError, ValueError):
+        return None
+
+class Screen:
+    """终端输出：按帧缓冲写入，并同步维护单元格模型
+
+    每帧的输出以字节形式累积在 bytearray 中，flush 时用 os.write 直接写入流的文件描述符；
+    静态内容（边框、标题、按钮）使用预编码的 Fragment。终端编码不是UTF-8时按该编码输出，
+    不能表示框线字符时改用 ASCII_GLYPHS。
+
+    line_mode 为真时不输出任何光标定位的重绘内容，只维护单元格模型，
+    由调用方在结束时用 plain_text() 输出最终画面。默认在标准输出不是终端时自动启用。
+    """
+    __slots__ = ('stream', 'buffer', '_frame', 'last_frame_bytes', 'line_mode', 'clip',
+                 'encoding', 'utf8', 'ascii', 'cursor', '_codepage')
+    _default = None
+
+    def __init__(self, stream=None, width=None, height=None, line_mode=None, encoding=None):
+        if width is None or height is None:
+            size = shutil.get_terminal_size()
+            width = width or size.columns
+            height = height or size.lines
+        self.stream = stream  # None表示使用当前的sys.stdout
+        self.buffer = ScreenBuffer(width, height)
+        self._frame = bytearray()
+        self.last_frame_bytes = 0
+        if line_mode is None:
+            line_mode = stream is None and not is_terminal(sys.stdout)
+        self.line_mode = line_mode
+        self.clip = None  # (x, y, 宽, 高)：不为None时只输出该矩形内的内容
+        self.cursor = (0, 0)  # 最后一次 move_cursor 的位置
+        if encoding is None:
+            encoding = getattr(stream or sys.stdout, 'encoding', None) or 'utf-8'
+        self.encoding = codecs.lookup(encoding).name
+        self.utf8 = self.encoding == 'utf-8'
+        try:
+            GLYPH_SAMPLE.encode(self.encoding)
+            self.ascii = False
+        except UnicodeEncodeError:
+            self.ascii = True
+        self._codepage = None  # start 之前的控制台输出代码页
+
+    @classmethod
+    def default(cls):
+        """未加入UIManager的组件共用的标准输出屏幕"""
+        if cls._default is None:
+            cls._default = cls()
+        return cls._default
+
+    def start(self):
+        """开始绘制：Windows控制台按输出代码页解释写入文件描述符的字节，UTF-8输出时临时切换到65001"""
+        if os.name != 'nt' or not self.utf8 or self.line_mode or self._codepage is not None:
+            return
+        codepage = kernel32.GetConsoleOutputCP()
+        if codepage and codepage != 65001:  # 0 表示没有控制台
+            self._codepage = codepage
+            kernel32.SetConsoleOutputCP(65001)
+
+    def stop(self):
+        """恢复 start 之前的输出代码页"""
+        if self._codepage is not None:
+            kernel32.SetConsoleOutputCP(self._codepage)
+            self._codepage = None
+
+    def write_at(self, x, y, text, style=''):
+        """在(x, y)处写入文本（0起始的列/行坐标）"""
+        if self.clip is not None:
+            clipped = self._clip_text(x, y, text)
+            if clipped is None:
+                return
+            x, text = clipped
+        if self.ascii:
+            text = text.translate(ASCII_GLYPHS)
+        if style:
+            data = f"\033[{y+1};{x+1}H{style}{text}{Color.RESET}"
+        else:
+            data = f"\033[{y+1};{x+1}H{text}"
+        self._frame += data.encode(self.encoding, 'replace')
+        self.buffer.put(x, y, text, style)
+
+    def write_fragment(self, x, y, frag):
+        """在(x, y)处写入预编码片段，不再做格式化和编码"""
+        if not self.utf8:
+            self.write_at(x, y, frag.text, frag.style)
+            return
+        if self.clip is not None:
+            cx, cy, cw, ch = self.clip
+            if not (cy <= y < cy + ch and cx <= x and x + len(frag.cells) // 4 <= cx + cw):
+                self.write_at(x, y, frag.text, frag.style)
+                return
+        self._frame += cursor_to(x, y)
+        self._frame += frag.data
+        self.buffer.put_cells(x, y, frag.cells, frag.style)
+
+    def _clip_text(self, x, y, text):
+        """按 clip 裁剪一段文本，返回 (x, 文本)，完全不可见时返回None"""
+        cx, cy, cw, ch = self.clip
+        if not cy <= y < cy + ch:
+            return None
+        cells = _cell_text(text)
+        start, end = max(x, cx), min(x + len(cells), cx + cw)
+        if start >= end:
+            return None
+        if start == x and end == x + len(cells):
+            return x, text
+        cells = cells[start - x:end - x]
+        if cells[0] == ScreenBuffer.WIDE_FILL:
+            cells = ' ' + cells[1:]  # 左边界切开了全角字符
+        if end < x + len(_cell_text(text)) and _cell_text(text)[end - x] == ScreenBuffer.WIDE_FILL:
+            cells = cells[:-1] + ' '  # 右边界切开了全角字符
+        return start, cells.replace(ScreenBuffer.WIDE_FILL, '')
+
+    def scroll_region(self, top, bottom, n):
+        """用终端滚动区域把第top~bottom行整行上移n行（n<0时下移），不重新输出这些行"""
+        move = f"\033[{n}S" if n > 0 else f"\033[{-n}T"
+        self._frame += f"\033[{top+1};{bottom+1}r{move}\033[r".encode('ascii')
+        self.buffer.scroll(top, bottom, n)
+
+    def write_control(self, data):
+        """输出不影响单元格模型的控制序列（字节），行模式下忽略"""
+        if not self.line_mode:
+            self._frame += data
+
+    def move_cursor(self, x, y):
+        """移动终端光标（0起始坐标）"""
+        self.cursor = (x, y)
+        self._frame += cursor_to(x, y)
+
+    def clear(self):
+        """清屏"""
+        self._frame += b"\033[2J"
+        self.buffer.clear()
+
+    def flush(self):
+        """把本帧累积的输出一次性写出"""
+        stream = self.stream or sys.stdout
+        if self.line_mode:
+            self._frame.clear()
+            self.last_frame_bytes = 0
+            return
+        data = self._frame
+        self._frame = bytearray()
+        self.last_frame_bytes = len(data)
+        if data:
+            fd = _stream_fd(stream)
+            binary = getattr(stream, 'buffer', None)
+            if fd is not None:
+                stream.flush()  # 先写出文本层中已有的内容，保证顺序
+                view = memoryview(data)
+                while view:
+                    view = view[os.write(fd, view):]
+            elif binary is not None:
+                stream.flush()
+                binary.write(data)
+            else:
+                stream.write(data.decode(self.encoding))
+        stream.flush()
+
+    def snapshot(self):
+        """当前屏幕内容的快照"""
+        return self.buffer.snapshot()
+
+    def plain_text(self):
+        """屏幕内容的纯文本（去掉行尾空白和末尾空行），用于行模式输出"""
+        rows = [self.buffer.row_text(y).rstrip() for y in range(self.buffer.height)]
+        while rows and not rows[-1]:
+            rows.pop()
+        return '\n'.join(rows)
+
+    def restore_region(self, region):
+        """把保存的区域原样写回（只输出该矩形内的单元格）"""
+        buffer = self.buffer
+        for dy, (chars, styles) in enumerate(region.rows):
+            text = chars.tobytes().decode('utf-32-le')
+            start = 0
+            if text.startswith(ScreenBuffer.WIDE_FILL):
+                # 左边界切开了全角字符：左半列还保留着该字符时连同它整个重写
+                left = chr(buffer.chars[(region.y + dy) * buffer.width + region.x - 1]) if region.x else ' '
+                if text_width(left) == 2:
+                    self.write_at(region.x - 1, region.y + dy, left, buffer.style_of(styles[0]))
+                    start = 1
+                else:
+                    text = ' ' + text[1:]
+            while start < len(text):
+                sid = styles[start]
+                end = start + 1
+                while end < len(text) and styles[end] == sid:
+                    end += 1
+                self.write_at(region.x + start, region.y + dy,
+                              text[start:end].replace(ScreenBuffer.WIDE_FILL, ''),
+                              buffer.style_of(sid))
+                start = end
+
+class Placement(NamedTuple):
+    """组件在网格中的放置参数"""
+    component: object
+    row: int
+    column: int
+    rowspan: int = 1
+    columnspan: int = 1
+    padx: int = 2
+    pady: int = 1
+    sticky: str = 'nsew'
 
 class LayoutManager:
     """网格布局管理器"""
@@ -32,22 +795,32 @@ class LayoutManager:
         self.row_config = {}
         self.col_config = {}
         self._calculated_positions = {}
+        self._dirty = True  # 组件变化后需要重新计算位置
 
     def add_component(self, component, row, column, 
                      rowspan=1, columnspan=1, 
                      padx=2, pady=1, 
                      sticky='nsew'):
         """添加组件到布局"""
-        self.components.append({
-            'component': component,
-            'row': row,
-            'column': column,
-            'rowspan': rowspan,
-            'columnspan': columnspan,
-            'padx': padx,
-            'pady': pady,
-            'sticky': sticky.lower()
-        })
+        self.components.append(Placement(component, row, column, rowspan,
+                                         columnspan, padx, pady, sticky.lower()))
+        self._dirty = True
+
+    def clear(self):
+        """移除全部组件"""
+        self.components = []
+        self._calculated_positions = {}
+        self._dirty = True
+
+    def update_layout(self):
+        """组件有变化时才重新计算位置"""
+        if self._dirty:
+            self.calculate_layout()
+
+    def apply_positions(self, positions):
+        """直接使用已计算好的位置（按 components 的顺序），跳过计算"""
+        self._calculated_positions = {p.component: xy for p, xy in zip(self.components, positions)}
+        self._dirty = False
 
     def calculate_layout(self):
         """计算所有组件的实际位置"""
@@ -56,17 +829,17 @@ class LayoutManager:
         row_heights = {}
         
         for comp in self.components:
-            c = comp['component']
+            c = comp.component
             # 更新列宽
-            for col in range(comp['column'], comp['column'] + comp['columnspan']):
+            for col in range(comp.column, comp.column + comp.columnspan):
                 current = col_widths.get(col, 0)
-                col_width = c.width // comp['columnspan']
+                col_width = c.width // comp.columnspan
                 if col_width > current:
                     col_widths[col] = col_width
             # 更新行高
-            for row in range(comp['row'], comp['row'] + comp['rowspan']):
+            for row in range(comp.row, comp.row + comp.rowspan):
                 current = row_heights.get(row, 0)
-                row_height = c.height // comp['rowspan']
+                row_height = c.height // comp.rowspan
                 if row_height > current:
                     row_heights[row] = row_height
 
@@ -84,19 +857,19 @@ class LayoutManager:
         # 计算组件位置
         self._calculated_positions = {}
         for comp in self.components:
-            c = comp['component']
+            c = comp.component
             # 计算起始位置
-            x = col_offsets[comp['column']] + comp['padx']
-            y = row_offsets[comp['row']] + comp['pady']
+            x = col_offsets[comp.column] + comp.padx
+            y = row_offsets[comp.row] + comp.pady
             
             # 计算实际占用的空间
             total_col_width = sum(col_widths.get(col, 10) for col in 
-                                range(comp['column'], comp['column'] + comp['columnspan']))
+                                range(comp.column, comp.column + comp.columnspan))
             total_row_height = sum(row_heights.get(row, 3) for row in 
-                                 range(comp['row'], comp['row'] + comp['rowspan']))
+                                 range(comp.row, comp.row + comp.rowspan))
             
             # 处理对齐方式
-            sticky = comp['sticky']
+            sticky = comp.sticky
             if 'e' in sticky:
                 x += total_col_width - c.width
             elif 'w' in sticky:
@@ -112,13 +885,447 @@ class LayoutManager:
                 y += (total_row_height - c.height) // 2
 
             self._calculated_positions[c] = (x, y)
+        self._dirty = False
 
     def get_position(self, component):
         """获取组件计算后的位置"""
         return self._calculated_positions.get(component, (0, 0))
 
+    def draw(self, screen):
+        """绘制布局自身的装饰（网格布局没有）"""
+        pass
+
+    def get_clip(self, component):
+        """组件的可视区域，None表示不裁剪"""
+        return None
+
+    def reveal(self, component):
+        """让组件进入可视区域需要的滚动：[(ScrollView, 新偏移)]"""
+        return ()
+
+INFINITE = float('inf')
+
+def _distribute(space, mins, maxs, weights):
+    """把 space 按权重分给各项：先满足最小值，多余部分按 weight 比例分配，到达最大值的项不再增长"""
+    sizes = list(mins)
+    extra = space - sum(sizes)
+    active = [i for i, w in enumerate(weights) if w > 0 and sizes[i] < maxs[i]]
+    while extra > 0 and active:
+        total = sum(weights[i] for i in active)
+        shares = [int(extra * weights[i] // total) for i in active]  # 权重可以是小数，分到的尺寸取整
+        for k in range(extra - sum(shares)):
+            shares[k] += 1
+        extra = 0
+        still = []
+        for i, share in zip(active, shares):
+            size = sizes[i] + share
+            if size >= maxs[i]:
+                extra += size - maxs[i]
+                size = maxs[i]
+            else:
+                still.append(i)
+            sizes[i] = size
+        active = still
+    return sizes
+
+class LayoutNode:
+    """嵌套布局节点
+
+    每个节点带 min/max 尺寸和 weight（分配剩余空间的比例）约束。测量结果按子树缓存，
+    某个节点 configure/invalidate 后只有它和祖先重新测量；排布时分到的矩形不变的子树直接跳过。
+    """
+    __slots__ = ('parent', 'min_width', 'min_height', 'max_width', 'max_height', 'weight',
+                 '_measure', '_rect')
+
+    def __init__(self, min_width=0, min_height=0, max_width=None, max_height=None, weight=0):
+        self.parent = None
+        self.min_width = min_width
+        self.min_height = min_height
+        self.max_width = max_width  # None表示不限
+        self.max_height = max_height
+        self.weight = weight
+        self._measure = None  # (最小宽, 最小高, 最大宽, 最大高)
+        self._rect = None  # 上次分配到的 (x, y, 宽, 高)
+
+    @property
+    def children(self):
+        return ()
+
+    def configure(self, **constraints):
+        """修改约束并使测量结果失效"""
+        for name, value in constraints.items():
+            setattr(self, name, value)
+        self.invalidate()
+
+    def invalidate(self):
+        """清除本节点及所有祖先的测量和排布缓存"""
+        node = self
+        while node is not None:
+            node._measure = None
+            node._rect = None
+            node = node.parent
+
+    def relayout(self):
+        """尺寸不变、只需重新排布时（如滚动）清除本节点及祖先的排布缓存"""
+        node = self
+        while node is not None:
+            node._rect = None
+            node = node.parent
+
+    def walk(self):
+        """先序遍历子树中的节点"""
+        yield self
+        for child in self.children:
+            yield from child.walk()
+
+    def measure(self):
+        """返回 (最小宽, 最小高, 最大宽, 最大高)"""
+        if self._measure is None:
+            min_w, min_h, max_w, max_h = self._content_size()
+            min_w = max(min_w, self.min_width)
+            min_h = max(min_h, self.min_height)
+            if self.max_width is not None:
+                max_w = min(max_w, self.max_width)
+            if self.max_height is not None:
+                max_h = min(max_h, self.max_height)
+            self._measure = (min_w, min_h, max(min_w, max_w), max(min_h, max_h))
+        return self._measure
+
+    def arrange(self, x, y, width, height, positions):
+        """在给定矩形内排布子树，把组件位置写入 positions"""
+        min_w, min_h, max_w, max_h = self.measure()
+        rect = (x, y, max(min_w, min(width, max_w)), max(min_h, min(height, max_h)))
+        if rect == self._rect:
+            return
+        self._rect = rect
+        self._place(*rect, positions)
+
+    def components(self):
+        """按先后顺序列出子树中的组件（即焦点顺序）"""
+        for child in self.children:
+            yield from child.components()
+
+    def draw(self, screen):
+        """绘制容器装饰（如边框）"""
+        for child in self.children:
+            child.draw(screen)
+
+    def _content_size(self):
+        raise NotImplementedError
+
+    def _place(self, x, y, width, height, positions):
+        raise NotImplementedError
+
+class Item(LayoutNode):
+    """包装一个组件的叶节点；weight 为0且未给出最大值时保持组件原有尺寸"""
+    __slots__ = ('component', 'natural')
+
+    def __init__(self, component, **constraints):
+        super().__init__(**constraints)
+        self.component = component
+        self.natural = (component.width, component.height)
+
+    def resize(self, width=None, height=None):
+        """修改组件的基本尺寸"""
+        w, h = self.natural
+        self.natural = (w if width is None else width, h if height is None else height)
+        self.invalidate()
+
+    def _content_size(self):
+        w, h = self.natural
+        grow = INFINITE if self.weight else None
+        return (w, h, grow or w if self.max_width is None else INFINITE,
+                grow or h if self.max_height is None else INFINITE)
+
+    def _place(self, x, y, width, height, positions):
+        comp = self.component
+        if (comp.width, comp.height) != (width, height):
+            comp.resize(width, height)
+        positions[comp] = (x, y)
+
+    def components(self):
+        yield self.component
+
+def _as_node(child, parent):
+    node = child if isinstance(child, LayoutNode) else Item(child)
+    node.parent = parent
+    return node
+
+class Box(LayoutNode):
+    """沿一个方向依次排列子节点；HBox 横向，VBox 纵向"""
+    __slots__ = ('_children', 'gap')
+    HORIZONTAL = True
+
+    def __init__(self, *children, gap=None, **constraints):
+        super().__init__(**constraints)
+        self._children = [_as_node(child, self) for child in children]
+        self.gap = (2 if self.HORIZONTAL else 1) if gap is None else gap
+
+    @property
+    def children(self):
+        return self._children
+
+    def add(self, child):
+        """追加子节点（组件会自动包装为 Item）"""
+        node = _as_node(child, self)
+        self._children.append(node)
+        self.invalidate()
+        return node
+
+    def _content_size(self):
+        sizes = [child.measure() for child in self._children]
+        main, cross = (0, 1) if self.HORIZONTAL else (1, 0)
+        gaps = self.gap * max(0, len(sizes) - 1)
+        min_main = sum(size[main] for size in sizes) + gaps
+        max_main = sum(size[main + 2] for size in sizes) + gaps
+        min_cross = max((size[cross] for size in sizes), default=0)
+        max_cross = max((size[cross + 2] for size in sizes), default=0)
+        if self.HORIZONTAL:
+            return min_main, min_cross, max_main, max_cross
+        return min_cross, min_main, max_cross, max_main
+
+    def _place(self, x, y, width, height, positions):
+        main, cross = (0, 1) if self.HORIZONTAL else (1, 0)
+        sizes = [child.measure() for child in self._children]
+        space = (width if self.HORIZONTAL else height) - self.gap * max(0, len(sizes) - 1)
+        lengths = _distribute(space, [size[main] for size in sizes], [size[main + 2] for size in sizes],
+                              [child.weight for child in self._children])
+        cross_space = height if self.HORIZONTAL else width
+        offset = x if self.HORIZONTAL else y
+        for child, size, length in zip(self._children, sizes, lengths):
+            breadth = max(size[cross], min(cross_space, size[cross + 2]))
+            if self.HORIZONTAL:
+                child.arrange(offset, y, length, breadth, positions)
+            else:
+                child.arrange(x, offset, breadth, length, positions)
+            offset += length + self.gap
+
+class HBox(Box):
+    """横向排列"""
+    __slots__ = ()
+    HORIZONTAL = True
+
+class VBox(Box):
+    """纵向排列"""
+    __slots__ = ()
+    HORIZONTAL = False
+
+class Grid(LayoutNode):
+    """按行优先把子节点放入 columns 列的网格；列宽/行高取该列/行子节点的最小值，剩余空间按权重分配"""
+    __slots__ = ('_children', 'columns', 'gap_x', 'gap_y', 'col_weights', 'row_weights')
+
+    def __init__(self, *children, columns=2, gap_x=2, gap_y=1, col_weights=None, row_weights=None,
+                 **constraints):
+        super().__init__(**constraints)
+        self._children = [_as_node(child, self) for child in children]
+        self.columns = columns
+        self.gap_x = gap_x
+        self.gap_y = gap_y
+        self.col_weights = col_weights
+        self.row_weights = row_weights
+
+    @property
+    def children(self):
+        return self._children
+
+    def _tracks(self):
+        rows = -(-len(self._children) // self.columns)
+        cols = [[0, 0] for _ in range(self.columns)]
+        lines = [[0, 0] for _ in range(rows)]
+        for i, child in enumerate(self._children):
+            min_w, min_h, max_w, max_h = child.measure()
+            col, row = cols[i % self.columns], lines[i // self.columns]
+            col[0], col[1] = max(col[0], min_w), max(col[1], max_w)
+            row[0], row[1] = max(row[0], min_h), max(row[1], max_h)
+        return cols, lines
+
+    def _content_size(self):
+        cols, rows = self._tracks()
+        gap_w = self.gap_x * max(0, len(cols) - 1)
+        gap_h = self.gap_y * max(0, len(rows) - 1)
+        return (sum(c[0] for c in cols) + gap_w, sum(r[0] for r in rows) + gap_h,
+                sum(c[1] for c in cols) + gap_w, sum(r[1] for r in rows) + gap_h)
+
+    def _place(self, x, y, width, height, positions):
+        cols, rows = self._tracks()
+        widths = _distribute(width - self.gap_x * max(0, len(cols) - 1),
+                             [c[0] for c in cols], [c[1] for c in cols],
+                             self.col_weights or [0] * len(cols))
+        heights = _distribute(height - self.gap_y * max(0, len(rows) - 1),
+                              [r[0] for r in rows], [r[1] for r in rows],
+                              self.row_weights or [0] * len(rows))
+        xs = list(accumulate([x] + [w + self.gap_x for w in widths[:-1]]))
+        ys = list(accumulate([y] + [h + self.gap_y for h in heights[:-1]]))
+        for i, child in enumerate(self._children):
+            col, row = i % self.columns, i // self.columns
+            child.arrange(xs[col], ys[row], widths[col], heights[row], positions)
+
+class Frame(LayoutNode):
+    """给子节点加边框（可带标题）和内边距"""
+    __slots__ = ('child', 'title', 'border', 'padding', 'color')
+
+    def __init__(self, child, title=None, border='single', padding=0, color='', **constraints):
+        super().__init__(**constraints)
+        self.child = _as_node(child, self)
+        self.title = title
+        self.border = border
+        self.padding = padding
+        self.color = color
+
+    @property
+    def children(self):
+        return (self.child,)
+
+    def _chrome(self):
+        """边框、内边距和标题占用的 (宽, 高)"""
+        return 2 + 2 * self.padding, 2 + 2 * self.padding + (1 if self.title else 0)
+
+    def _content_size(self):
+        dw, dh = self._chrome()
+        min_w, min_h, max_w, max_h = self.child.measure()
+        return min_w + dw, min_h + dh, max_w + dw, max_h + dh
+
+    def _place(self, x, y, width, height, positions):
+        dw, dh = self._chrome()
+        inset = 1 + self.padding
+        self.child.arrange(x + inset, y + dh - inset, width - dw, height - dh, positions)
+
+    def draw(self, screen):
+        if self._rect is not None:
+            x, y, width, height = self._rect
+            if self.title:
+                screen.write_fragment(x, y, fragment(self.title, Color.BLUE_TEXT))
+                y += 1
+                height -= 1
+            top, _, bottom = frame_fragments(width, self.color, self.border)
+            side = fragment(BORDER_STYLES[self.border].vertical, self.color)
+            screen.write_fragment(x, y, top)
+            for dy in range(1, height - 1):
+                screen.write_fragment(x, y + dy, side)
+                screen.write_fragment(x + width - 1, y + dy, side)
+            screen.write_fragment(x, y + height - 1, bottom)
+        self.child.draw(screen)
+
+def _intersect(a, b):
+    """两个 (x, y, 宽, 高) 矩形的交集，任一为None时返回另一个；不相交时宽或高为0"""
+    if a is None or b is None:
+        return a or b
+    x0, y0 = max(a[0], b[0]), max(a[1], b[1])
+    x1, y1 = min(a[0] + a[2], b[0] + b[2]), min(a[1] + a[3], b[1] + b[3])
+    return (x0, y0, max(0, x1 - x0), max(0, y1 - y0))
+
+class ScrollView(LayoutNode):
+    """可滚动视口：子节点按最小尺寸排布在虚拟坐标中，只显示视口内的部分
+
+    完全在视口外的组件不会被渲染，部分可见的组件按视口裁剪。
+    默认 weight=1，占满父容器分给它的空间。
+    """
+    __slots__ = ('child', 'offset', 'viewport')
+
+    def __init__(self, child, min_width=0, min_height=3, weight=1, **constraints):
+        super().__init__(min_width=min_width, min_height=min_height, weight=weight, **constraints)
+        self.child = _as_node(child, self)
+        self.offset = 0  # 视口顶部对应的内容行
+        self.viewport = None  # (x, y, 宽, 高)
+
+    @property
+    def children(self):
+        return (self.child,)
+
+    @property
+    def content_height(self):
+        return self.child.measure()[1]
+
+    def _content_size(self):
+        return self.child.measure()[0], 0, INFINITE, INFINITE
+
+    def _place(self, x, y, width, height, positions):
+        self.viewport = (x, y, width, height)
+        self.offset = max(0, min(self.offset, self.content_height - height))
+        self.child.arrange(x, y - self.offset, width, self.content_height, positions)
+
+    def offset_for(self, top, height):
+        """使内容中 [top, top+height) 行（屏幕坐标）可见所需的偏移"""
+        _, vy, _, vh = self.viewport
+        if top < vy:
+            return self.offset - (vy - top)
+        if top + height > vy + vh:
+            return self.offset + min(top + height - (vy + vh), top - vy)
+        return self.offset
+
+    def draw(self, screen):
+        clip = screen.clip
+        screen.clip = _intersect(clip, self.viewport)
+        try:
+            self.child.draw(screen)
+        finally:
+            screen.clip = clip
+
+class ContainerLayout:
+    """以嵌套容器为根的布局，供 UIManager 使用（接口同 LayoutManager）
+
+    width/height 为可用区域，默认取终端大小。
+    """
+    def __init__(self, root, width=None, height=None):
+        self.root = root
+        self.width = width
+        self.height = height
+        self._calculated_positions = {}
+        self._clips = {}  # 位于 ScrollView 中的组件 -> 可视区域
+        self._items = {}  # 组件 -> 所在的 Item 节点
+
+    def add_component(self, component, row, column, **kwargs):
+        raise TypeError("容器布局中的组件由容器树决定，请把组件加入容器")
+
+    def calculate_layout(self):
+        """排布整棵容器树（未变化的子树会被跳过）"""
+        size = shutil.get_terminal_size()
+        self.root.arrange(0, 0, self.width or size.columns, self.height or size.lines,
+                          self._calculated_positions)
+        self._clips = {}
+        self._items = {}
+        for node in self.root.walk():
+            if isinstance(node, ScrollView):
+                for comp in node.components():
+                    self._clips[comp] = _intersect(self._clips.get(comp), node.viewport)
+            elif isinstance(node, Item):
+                self._items[node.component] = node
+
+    def get_clip(self, component):
+        return self._clips.get(component)
+
+    def reveal(self, component):
+        item = self._items.get(component)
+        if item is None:
+            return ()
+        _, y = self.get_position(component)
+        scrolls = []
+        node = item.parent
+        while node is not None:
+            if isinstance(node, ScrollView):
+                offset = node.offset_for(y, component.height)
+                if offset != node.offset:
+                    scrolls.append((node, offset))
+                    y -= node.offset - offset
+            node = node.parent
+        return scrolls
+
+    def update_layout(self):
+        self.calculate_layout()
+
+    def get_position(self, component):
+        return self._calculated_positions.get(component, (0, 0))
+
+    def draw(self, screen):
+        self.root.draw(screen)
+
 class UIComponent:
     """UI组件基类"""
+    __slots__ = ('type', 'width', 'height', 'has_focus', 'visible', 'title',
+                 'prev_state', 'screen', 'border')
+    CRITICAL = True  # 为False的组件（图表等）在帧超时降级时暂停绘制
+    live = False  # 为True时（实时图表）即使没有待收取的结果，事件循环也按间隔持续轮询
+
     def __init__(self, component_type, width=30, height=5):
         self.type = component_type
         self.width = width
@@ -126,7 +1333,25 @@ class UIComponent:
         self.has_focus = False
         self.visible = True
         self.title = "Untitled"
-        self.prev_state = {}
+        self.prev_state = None
+        self.screen = Screen.default()
+        self.border = 'single'  # BORDER_STYLES 中的边框样式
+
+    def draw_frame(self, x, y, color="", title=None):
+        """绘制标题和空白边框（使用缓存的边框模板）"""
+        screen = self.screen
+        screen.write_fragment(x, y, fragment(self.title if title is None else title, Color.BLUE_TEXT))
+        top, blank, bottom = frame_fragments(self.width, color, self.border)
+        screen.write_fragment(x, y+1, top)
+        for dy in range(self.height-2):
+            screen.write_fragment(x, y+2+dy, blank)
+        screen.write_fragment(x, y+self.height-1, bottom)
+
+    def resize(self, width, height):
+        """修改尺寸（布局分配新矩形时调用）；依赖尺寸的派生字段由子类覆盖此方法重新计算"""
+        self.width = width
+        self.height = height
+        self.prev_state = None
 
     def render(self, x, y):
         """渲染组件（需要子类实现）"""
@@ -136,55 +1361,82 @@ class UIComponent:
         """处理输入（需要子类实现）"""
         pass
 
+    def handle_keys(self, key, count):
+        """处理连续count次相同的按键，返回最后一个非空结果
+
+        默认逐个调用 handle_input；导航类组件可覆盖为一次性移动。
+        """
+        result = None
+        for _ in range(count):
+            value = self.handle_input(key)
+            if value is not None:
+                result = value
+        return result
+
+    def handle_mouse(self, event, x, y, count=1):
+        """处理鼠标事件，(x, y) 为相对组件左上角的坐标，count 为合并的滚轮格数
+
+        默认把滚轮当作方向键；可点击的组件覆盖此方法。
+        """
+        if event.kind in WHEEL_KEYS:
+            return self.handle_keys(WHEEL_KEYS[event.kind], count * WHEEL_LINES)
+        return None
+
     def get_cursor_pos(self, x, y):
         """获取光标应停留的位置"""
         return (x, y + 1)
 
+    @property
+    def pending(self):
+        """是否有后台任务尚未交付结果"""
+        return False
+
+    def poll(self):
+        """收取后台任务结果，返回是否需要重绘"""
+        return False
+
+    def close(self):
+        """停止后台任务（组件不再使用时调用）"""
+        pass
+
 class InputBox(UIComponent):
     """输入框组件"""
+    __slots__ = ('text', 'cursor_pos', 'max_length')
+
     def __init__(self, title="Input", width=30):
-        super().__init__(ComponentType.INPUT_BOX, width, 3)
+        super().__init__(ComponentType.INPUT_BOX, width, 4)  # 标题 + 三行边框
         self.title = title
         self.text = ""
         self.cursor_pos = 0
         self.max_length = width - 2
 
+    def resize(self, width, height):
+        super().resize(width, height)
+        self.max_length = width - 2
+
     def render(self, x, y):
         if not self.visible: 
             return
             
-        current_state = {
-            "text": self.text,
-            "cursor": self.cursor_pos,
-            "focus": self.has_focus
-        }
+        current_state = (self.text, self.cursor_pos, self.has_focus)
         if current_state == self.prev_state:
             return
-            
-        self.prev_state = current_state.copy()
+        self.prev_state = current_state
 
+        screen = self.screen
         # 绘制标题
-        sys.stdout.write(f"\033[{y+1};{x+1}H")
-        print(f"{Color.BLUE_TEXT}{self.title}{Color.RESET}")
+        screen.write_fragment(x, y, fragment(self.title, Color.BLUE_TEXT))
 
         # 绘制边框和内容
-        border_top = '┌' + '─'*(self.width-2) + '┐'
-        content_line = f"│{self.text.ljust(self.width-2)}│"
-        border_bottom = '└' + '─'*(self.width-2) + '┘'
-
         color = Color.WHITE_BG if self.has_focus else ""
-        sys.stdout.write(f"\033[{y+2};{x+1}H")
-        print(f"{color}{border_top}{Color.RESET}")
-
-        sys.stdout.write(f"\033[{y+3};{x+1}H")
-        print(f"{color}{content_line}{Color.RESET}")
-
-        sys.stdout.write(f"\033[{y+4};{x+1}H")
-        print(f"{color}{border_bottom}{Color.RESET}")
+        top, _, bottom = frame_fragments(self.width, color, self.border)
+        side = BORDER_STYLES[self.border].vertical
+        screen.write_fragment(x, y+1, top)
+        screen.write_at(x, y+2, f"{side}{self.text.ljust(self.width-2)}{side}", color)
+        screen.write_fragment(x, y+3, bottom)
 
         # 定位光标
-        x_pos = x + 2 + min(self.cursor_pos, self.width-3)
-        sys.stdout.write(f"\033[{y+3};{x_pos}H")
+        screen.move_cursor(x + 1 + min(self.cursor_pos, self.width-3), y+2)
 
     def handle_input(self, key):
         if key == '\x08':  # Backspace
@@ -193,23 +1445,37 @@ class InputBox(UIComponent):
                 self.cursor_pos -= 1
         elif key == '\r':
             return self.text
-        elif key in ('\x00', '\xe0'):
-            key = msvcrt.getwch()
-            if key == 'K':  # Left
-                self.cursor_pos = max(0, self.cursor_pos - 1)
-            elif key == 'M':  # Right
-                self.cursor_pos = min(len(self.text), self.cursor_pos + 1)
-        elif key.isprintable():
+        elif key in (Key.LEFT, Key.RIGHT):
+            return self.handle_keys(key, 1)
+        elif is_text_key(key):
             if len(self.text) < self.max_length:
                 self.text = self.text[:self.cursor_pos] + key + self.text[self.cursor_pos:]
                 self.cursor_pos += 1
         return None
 
+    def handle_keys(self, key, count):
+        if key == Key.LEFT:
+            self.cursor_pos = max(0, self.cursor_pos - count)
+        elif key == Key.RIGHT:
+            self.cursor_pos = min(len(self.text), self.cursor_pos + count)
+        else:
+            return super().handle_keys(key, count)
+        return None
+
     def get_cursor_pos(self, x, y):
         return (x + 2 + self.cursor_pos, y + 3)
 class ListBox(UIComponent):
-    """列表框组件（支持多选）"""
-    def __init__(self, title="List", width=30, height=8, multi_select=False):
+    """列表框组件（支持多选、模糊过滤、翻页和按序号跳转）
+
+    整体替换 items 会丢失光标位置；增量更新请用 extend / insert_sorted / remove_where /
+    replace_range，它们按项的身份标识（key(项)，默认项本身）保持光标和选择，
+    重绘时只输出内容变化的行。
+    """
+    __slots__ = ('items', 'cursor_pos', 'selected_indices', 'multi_select', 'scroll_offset',
+                 'filterable', 'filter_query', 'jump_buffer', '_filter', '_view', '_view_version',
+                 'key', '_ids', '_data_version', '_rows', '_anchor')
+
+    def __init__(self, title="List", width=30, height=8, multi_select=False, filterable=False, key=None):
         super().__init__(ComponentType.LIST_BOX, width, height)
         self.title = title
         self.items = []
@@ -217,161 +1483,670 @@ class ListBox(UIComponent):
         self.selected_indices = set()
         self.multi_select = multi_select
         self.scroll_offset = 0
+        self.filterable = filterable
+        self.filter_query = ""
+        self.jump_buffer = ""  # 已输入的跳转序号（非过滤模式下输入数字，Enter跳转）
+        self._filter = None
+        self._view = None  # 过滤结果（items下标列表），None表示未过滤
+        self._view_version = 0
+        self.key = key  # 项 -> 身份标识
+        self._ids = None  # 身份标识 -> items下标，按需重建
+        self._data_version = 0
+        self._rows = None  # (边框状态, 屏幕上各行的 (文本, 样式))
+        self._anchor = None  # 重新过滤完成后光标要回到的 items 下标
+
+    def _visible_count(self):
+        return len(self.items) if self._view is None else len(self._view)
+
+    def _item_index(self, pos):
+        """视图位置 -> items下标"""
+        return pos if self._view is None else self._view[pos]
+
+    def _page_size(self):
+        return self.height - 3  # 标题行和上下边框之外的行数
+
+    def resize(self, width, height):
+        super().resize(width, height)
+        self._scroll_to_cursor()
+
+    def jump_to(self, pos):
+        """把光标移到第pos项（越界时取边界），窗口随之滚动"""
+        self.cursor_pos = max(0, min(self._visible_count()-1, pos))
+        self._scroll_to_cursor()
+
+    def scroll_by(self, n):
+        """可见窗口滚动n行，光标只在移出窗口时被带到窗口边缘"""
+        page = self._page_size()
+        self.scroll_offset = max(0, min(self.scroll_offset + n, self._visible_count() - page))
+        self.jump_to(max(self.scroll_offset, min(self.cursor_pos, self.scroll_offset + page - 1)))
+
+    def _scroll_to_cursor(self):
+        """光标离开可见窗口时才滚动，保持窗口稳定"""
+        page = self._page_size()
+        if self.cursor_pos < self.scroll_offset:
+            self.scroll_offset = self.cursor_pos
+        elif self.cursor_pos >= self.scroll_offset + page:
+            self.scroll_offset = self.cursor_pos - page + 1
+        self.scroll_offset = max(0, min(self.scroll_offset, self._visible_count() - page))
+
+    def _set_query(self, query):
+        self.filter_query = query
+        self.cursor_pos = self.scroll_offset = 0
+        if not query:
+            self._view = None
+            self._view_version += 1
+            if self._filter is not None:
+                self._filter.submit("")
+            return
+        if self._filter is None or self._filter.items is not self.items:
+            if self._filter is not None:
+                self._filter.close()
+            self._filter = FuzzyFilter(self.items)
+        self._filter.submit(query)
+
+    @property
+    def pending(self):
+        return self._filter is not None and not self._filter.complete
+
+    def close(self):
+        if self._filter is not None:
+            self._filter.close()
+            self._filter = None
+
+    def poll(self):
+        if self._filter is None or not self._filter.poll():
+            return False
+        if self.filter_query:
+            self._view = self._filter.results()
+            self._view_version += 1
+            if self._anchor is not None and self._anchor in self._view:
+                self.cursor_pos = self._view.index(self._anchor)
+            if self._filter.complete:
+                self._anchor = None
+            self.jump_to(self.cursor_pos)
+        return True
+
+    def _id(self, item):
+        return item if self.key is None else self.key(item)
+
+    def index_of(self, item_id):
+        """身份标识对应的 items 下标，不存在时返回None"""
+        if self._ids is None:
+            self._ids = {}
+            for i, item in enumerate(self.items):
+                self._ids.setdefault(self._id(item), i)
+        return self._ids.get(item_id)
+
+    def _cursor_index(self):
+        return self._item_index(self.cursor_pos) if self._visible_count() else None
+
+    def _changed(self, cursor, new_cursor):
+        """items 变化后的收尾：光标回到原来的项（new_cursor），窗口随之平移，标记需要重绘"""
+        self._data_version += 1
+        if self._filter is not None:
+            # 过滤线程持有旧的 items，关闭后按新数据重新过滤
+            self._filter.close()
+            self._filter = None
+        if self.filter_query:
+            self._set_query(self.filter_query)
+            self._anchor = new_cursor
+            return
+        if new_cursor is not None:
+            row = self.cursor_pos - self.scroll_offset  # 光标在窗口中的行保持不变
+            self.cursor_pos = new_cursor
+            self.scroll_offset = max(0, new_cursor - row)
+        self.jump_to(self.cursor_pos)
+
+    def extend(self, items):
+        """在末尾追加多项"""
+        cursor = self._cursor_index()
+        start = len(self.items)
+        self.items.extend(items)
+        if self._ids is not None:
+            for i in range(start, len(self.items)):
+                self._ids.setdefault(self._id(self.items[i]), i)
+        self._changed(cursor, cursor)
+
+    def insert_sorted(self, items, sort_key=None):
+        """把多项按 sort_key（默认同 key）插入到已排序的 items 中，相等的项排在原有项之后"""
+        sort_key = sort_key or self.key or (lambda item: item)
+        fresh = sorted(items, key=sort_key)
+        old = self.items
+        # 二分定位插入点（新项已排序，下界逐个推进），原有部分整段复制
+        positions = []
+        lo = 0
+        for item in fresh:
+            value = sort_key(item)
+            hi = len(old)
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if value < sort_key(old[mid]):
+                    hi = mid
+                else:
+                    lo = mid + 1
+            positions.append(lo)
+        merged = []
+        start = 0
+        for pos, item in zip(positions, fresh):
+            merged.extend(old[start:pos])
+            merged.append(item)
+            start = pos
+        merged.extend(old[start:])
+        cursor = self._cursor_index()
+        old[:] = merged
+        self._ids = None
+        def shift(i):
+            return i + bisect.bisect_right(positions, i)
+
+        self.selected_indices = {shift(i) for i in self.selected_indices}
+        self._changed(cursor, None if cursor is None else shift(cursor))
+
+    def remove_where(self, predicate):
+        """删除满足 predicate(项) 的所有项，返回删除的数量；光标所在项被删时移到其后的项"""
+        removed = [i for i, item in enumerate(self.items) if predicate(item)]
+        if not removed:
+            return 0
+        cursor = self._cursor_index()
+        gone = set(removed)
+        self.items[:] = [item for i, item in enumerate(self.items) if i not in gone]
+        self._ids = None
+        def shift(i):
+            return i - bisect.bisect_left(removed, i)
+
+        self.selected_indices = {shift(i) for i in self.selected_indices if i not in gone}
+        self._changed(cursor, None if cursor is None else shift(cursor))
+        return len(removed)
+
+    def replace_range(self, start, stop, items):
+        """用 items 替换 items[start:stop]；范围内的光标和选择按身份标识对应到新项"""
+        items = list(items)
+        new_ids = {}
+        for j, item in enumerate(items):
+            new_ids.setdefault(self._id(item), start + j)
+        delta = len(items) - (stop - start)
+
+        def shift(i):
+            if i < start:
+                return i
+            if i >= stop:
+                return i + delta
+            return new_ids.get(self._id(self.items[i]))
+
+        cursor = self._cursor_index()
+        new_cursor = None
+        if cursor is not None:
+            new_cursor = shift(cursor)
+            if new_cursor is None:
+                new_cursor = start
+        self.selected_indices = {j for j in map(shift, self.selected_indices) if j is not None}
+        self.items[start:stop] = items
+        self._ids = None
+        self._changed(cursor, new_cursor)
 
     def render(self, x, y):
         if not self.visible:
             return
 
-        current_state = {
-            "cursor": self.cursor_pos,
-            "selected": self.selected_indices.copy(),
-            "focus": self.has_focus
-        }
+        current_state = (self.cursor_pos, self.scroll_offset, frozenset(self.selected_indices),
+                         self.has_focus, self.filter_query, self.jump_buffer, self._view_version,
+                         self._data_version)
+        full = self.prev_state is None
         if current_state == self.prev_state:
             return
-        self.prev_state = current_state.copy()
+        self.prev_state = current_state
 
-        # 绘制标题
-        sys.stdout.write(f"\033[{y+1};{x+1}H")
-        print(f"{Color.BLUE_TEXT}{self.title}{Color.RESET}")
-
-        # 绘制边框
-        border_top = '┌' + '─'*(self.width-2) + '┐'
-        border_bottom = '└' + '─'*(self.width-2) + '┘'
-        sys.stdout.write(f"\033[{y+2};{x+1}H")
-        print(border_top)
-        
-        for dy in range(self.height-2):
-            sys.stdout.write(f"\033[{y+3+dy};{x+1}H")
-            print("│" + " "*(self.width-2) + "│")
-            
-        sys.stdout.write(f"\033[{y+self.height};{x+1}H")
-        print(border_bottom)
+        # 标题或边框变化时整体重绘，否则只输出变化的行
+        screen = self.screen
+        if self.filter_query:
+            title = f"{self.title} /{self.filter_query}"
+        elif self.jump_buffer:
+            title = f"{self.title} :{self.jump_buffer}"
+        else:
+            title = self.title
+        frame = (title, self.width, self.height)
+        if full or self._rows is None or self._rows[0] != frame:
+            self.draw_frame(x, y, title=fit_text(title, self.width))
+            blank = (' ' * (self.width-4), "")
+            old_rows = [blank] * self._page_size()
+        else:
+            old_rows = self._rows[1]
 
-        # 绘制内容
-        max_visible = self.height - 2
-        start = max(0, min(self.cursor_pos - max_visible//2, len(self.items)-max_visible))
-        
-        for i in range(start, min(start+max_visible, len(self.items))):
-            dy = i - start
-            cy = y + 3 + dy
-            sys.stdout.write(f"\033[{cy};{x+2}H")
-            
-            is_selected = i in self.selected_indices
+        rows = []
+        start = self.scroll_offset
+        for i in range(start, start+self._page_size()):
+            if i >= self._visible_count():
+                rows.append((' ' * (self.width-4), ""))
+                continue
+            index = self._item_index(i)
+            is_selected = index in self.selected_indices
             is_cursor = i == self.cursor_pos
             
             prefix = "▶ " if is_cursor and self.has_focus else "  "
-            text = f"{prefix}{self.items[i]}".ljust(self.width-4)
+            text = fit_text(f"{prefix}{self.items[index]}", self.width-4)
             
             if is_selected:
-                text = f"{Color.SELECTED_BG}{text}{Color.RESET}"
+                style = Color.SELECTED_BG
             elif is_cursor and self.has_focus:
-                text = f"{Color.HIGHLIGHT}{text}{Color.RESET}"
-                
-            sys.stdout.write(text)
+                style = Color.HIGHLIGHT
+            else:
+                style = ""
+            rows.append((text, style))
+        for i, row in enumerate(rows):
+            if row != old_rows[i]:
+                screen.write_at(x+1, y+2+i, *row)
+        self._rows = (frame, rows)
 
     def handle_input(self, key):
-        if key in ('\x00', '\xe0'):
-            key = msvcrt.getwch()
-            if key == 'H':  # Up
-                self.cursor_pos = max(0, self.cursor_pos - 1)
-            elif key == 'P':  # Down
-                self.cursor_pos = min(len(self.items)-1, self.cursor_pos + 1)
+        if key in (Key.UP, Key.DOWN):
+            return self.handle_keys(key, 1)
         elif key == ' ' and self.multi_select:
-            if self.cursor_pos in self.selected_indices:
-                self.selected_indices.remove(self.cursor_pos)
+            if not self._visible_count():
+                return None
+            index = self._item_index(self.cursor_pos)
+            if index in self.selected_indices:
+                self.selected_indices.remove(index)
             else:
-                self.selected_indices.add(self.cursor_pos)
+                self.selected_indices.add(index)
         elif key == '\r':
-            return sorted(self.selected_indices) if self.multi_select else self.cursor_pos
+            if self.jump_buffer:
+                self.jump_to(int(self.jump_buffer))
+                self.jump_buffer = ""
+                return None
+            if self.multi_select:
+                return sorted(self.selected_indices)
+            return self._item_index(self.cursor_pos) if self._visible_count() else None
+        elif key == Key.HOME:
+            self.jump_to(0)
+        elif key == Key.END:
+            self.jump_to(self._visible_count() - 1)
+        elif key in (Key.PAGE_UP, Key.PAGE_DOWN):
+            return self.handle_keys(key, 1)
+        elif self.filterable and key == '\x08':  # Backspace
+            if self.filter_query:
+                self._set_query(self.filter_query[:-1])
+        elif self.filterable and is_text_key(key):
+            self._set_query(self.filter_query + key)
+        elif key == '\x08':
+            self.jump_buffer = self.jump_buffer[:-1]
+        elif key.isdigit() and len(key) == 1:
+            self.jump_buffer += key
         return None
 
-class GridBox(UIComponent):
-    """二维表格选择组件"""
-    def __init__(self, title="Grid", width=30, height=10, rows=5, cols=5, multi_select=False):
-        super().__init__(ComponentType.GRID_BOX, width, height)
-        self.title = title
-        self.rows = rows
-        self.cols = cols
-        self.cursor_row = 0
-        self.cursor_col = 0
-        self.selected_cells = set()
-        self.multi_select = multi_select
-        self.cell_width = (width-2) // cols
+    def handle_mouse(self, event, x, y, count=1):
+        if event.kind in WHEEL_KEYS:
+            self.scroll_by(count * WHEEL_LINES * (-1 if event.kind == 'wheel_up' else 1))
+            return None
+        row = y - 2
+        if event.kind not in ('press', 'drag') or event.button != 0 or not 0 <= row < self._page_size():
+            return None
+        pos = self.scroll_offset + row
+        if pos >= self._visible_count():
+            return None
+        self.cursor_pos = pos
+        if event.kind == 'press' and self.multi_select:
+            self.selected_indices ^= {self._item_index(pos)}
+        return None
 
-    def render(self, x, y):
-        if not self.visible:
-            return
+    def handle_keys(self, key, count):
+        if key == Key.UP:
+            self.jump_to(self.cursor_pos - count)
+        elif key == Key.DOWN:
+            self.jump_to(self.cursor_pos + count)
+        elif key == Key.PAGE_UP:
+            self.jump_to(self.cursor_pos - count * self._page_size())
+        elif key == Key.PAGE_DOWN:
+            self.jump_to(self.cursor_pos + count * self._page_size())
+        else:
+            return super().handle_keys(key, count)
+        return None
 
-        current_state = {
-            "cursor": (self.cursor_row, self.cursor_col),
-            "selected": self.selected_cells.copy(),
-            "focus": self.has_focus
-        }
-        if current_state == self.prev_state:
+class IntervalSet:
+    """不相交的半开整数区间 [start, end) 的有序集合
+
+    边界按顺序存放在一个列表中（偶数位为起点、奇数位为终点），增删区间和成员判断都用二分查找。
+    """
+    __slots__ = ('_bounds',)
+
+    def __init__(self):
+        self._bounds = []
+
+    def __contains__(self, value):
+        return bisect.bisect_right(self._bounds, value) % 2 == 1
+
+    def __bool__(self):
+        return bool(self._bounds)
+
+    def __len__(self):
+        b = self._bounds
+        return sum(b[i+1] - b[i] for i in range(0, len(b), 2))
+
+    def __iter__(self):
+        """按顺序产生 (start, end)"""
+        b = self._bounds
+        return ((b[i], b[i+1]) for i in range(0, len(b), 2))
+
+    def add(self, start, end):
+        """加入 [start, end)，与相交或相邻的区间合并"""
+        if start >= end:
             return
-        self.prev_state = current_state.copy()
+        b = self._bounds
+        i = bisect.bisect_left(b, start)
+        j = bisect.bisect_right(b, end)
+        b[i:j] = ([start] if i % 2 == 0 else []) + ([end] if j % 2 == 0 else [])
 
-        # 绘制标题
-        sys.stdout.write(f"\033[{y+1};{x+1}H")
-        print(f"{Color.BLUE_TEXT}{self.title}{Color.RESET}")
-
-        # 绘制边框
-        border_top = '┌' + '─'*(self.width-2) + '┐'
-        border_bottom = '└' + '─'*(self.width-2) + '┘'
-        sys.stdout.write(f"\033[{y+2};{x+1}H")
-        print(border_top)
-        
-        for dy in range(self.height-2):
-            sys.stdout.write(f"\033[{y+3+dy};{x+1}H")
-            print("│" + " "*(self.width-2) + "│")
-            
-        sys.stdout.write(f"\033[{y+self.height};{x+1}H")
-        print(border_bottom)
-
-        # 绘制单元格
-        for r in range(self.rows):
-            for c in range(self.cols):
-                cell_x = x + 2 + c * self.cell_width
-                cell_y = y + 3 + r
-                sys.stdout.write(f"\033[{cell_y};{cell_x}H")
-                
-                is_selected = (r, c) in self.selected_cells
-                is_cursor = (r == self.cursor_row and c == self.cursor_col)
-                content = f"[{r},{c}]".center(self.cell_width)
-                
-                if is_selected:
-                    content = f"{Color.SELECTED_BG}{content}{Color.RESET}"
-                elif is_cursor and self.has_focus:
-                    content = f"{Color.HIGHLIGHT}{content}{Color.RESET}"
-                else:
-                    content = f"{Color.RESET}{content}"
-                    
-                sys.stdout.write(content)
+    def remove(self, start, end):
+        """移除 [start, end)"""
+        if start >= end:
+            return
+        b = self._bounds
+        i = bisect.bisect_left(b, start)
+        j = bisect.bisect_right(b, end)
+        b[i:j] = ([start] if i % 2 else []) + ([end] if j % 2 else [])
+
+class CellSelection:
+    """按行存储的单元格选择：行号 -> 列的 IntervalSet，矩形选择每行只占一个区间"""
+    __slots__ = ('rows',)
+
+    def __init__(self, cells=()):
+        self.rows = {}
+        for r, c in cells:
+            self.add_rect(r, c, r, c)
+
+    def __contains__(self, cell):
+        cols = self.rows.get(cell[0])
+        return cols is not None and cell[1] in cols
+
+    def __len__(self):
+        return sum(map(len, self.rows.values()))
+
+    def add_rect(self, r0, c0, r1, c1):
+        """选中 (r0, c0)-(r1, c1) 矩形（含两端）"""
+        for r in range(r0, r1 + 1):
+            cols = self.rows.get(r)
+            if cols is None:
+                cols = self.rows[r] = IntervalSet()
+            cols.add(c0, c1 + 1)
+
+    def remove_rect(self, r0, c0, r1, c1):
+        for r in range(r0, r1 + 1):
+            cols = self.rows.get(r)
+            if cols is not None:
+                cols.remove(c0, c1 + 1)
+                if not cols:
+                    del self.rows[r]
+
+    def toggle(self, r, c):
+        if (r, c) in self:
+            self.remove_rect(r, c, r, c)
+        else:
+            self.add_rect(r, c, r, c)
+
+    def clear(self):
+        self.rows.clear()
+
+    def rects(self):
+        """按行产生选中区域的 (r, c0, r, c1) 矩形"""
+        for r in sorted(self.rows):
+            for start, end in self.rows[r]:
+                yield (r, start, r, end - 1)
+
+    def cells(self):
+        """展开为 (行, 列) 集合"""
+        return {(r, c) for r, c0, _, c1 in self.rects() for c in range(c0, c1 + 1)}
+
+def _rect_minus(a, b):
+    """矩形 a 减去矩形 b 后剩余部分（最多4个矩形），矩形为含两端的 (r0, c0, r1, c1)"""
+    if b is None or b[0] > a[2] or b[2] < a[0] or b[1] > a[3] or b[3] < a[1]:
+        return [a]
+    r0, c0, r1, c1 = a
+    parts = []
+    if r0 < b[0]:
+        parts.append((r0, c0, b[0] - 1, c1))
+        r0 = b[0]
+    if r1 > b[2]:
+        parts.append((b[2] + 1, c0, r1, c1))
+        r1 = b[2]
+    if c0 < b[1]:
+        parts.append((r0, c0, r1, b[1] - 1))
+    if c1 > b[3]:
+        parts.append((r0, b[3] + 1, r1, c1))
+    return parts
+
+class GridBox(UIComponent):
+    """二维表格选择组件
+
+    多选模式下：Space 切换单元格，Shift+方向键从锚点扩展矩形选择，Ctrl+方向键跳到边缘
+    （Ctrl+Shift+方向键扩展选择到边缘），r/c 选中整行/整列，a 或 Ctrl+A 全选，Delete 清除选择。
+    选择按行存为列区间（selection），重绘时只输出发生变化的矩形。
+    """
+    __slots__ = ('rows', 'cols', 'cursor_row', 'cursor_col', 'selection', 'multi_select',
+                 'cell_width', 'scroll_row', 'scroll_col', '_anchor', '_dirty')
+    MAX_DIRTY = 64  # 待重绘矩形超过此数时改为整体重绘
+
+    def __init__(self, title="Grid", width=30, height=10, rows=5, cols=5, multi_select=False):
+        super().__init__(ComponentType.GRID_BOX, width, height)
+        self.title = title
+        self.rows = rows
+        self.cols = cols
+        self.cursor_row = 0
+        self.cursor_col = 0
+        self.selection = CellSelection()
+        self.multi_select = multi_select
+        # 单元格放不下坐标标签时保持标签宽度，改为横向滚动
+        self.cell_width = max((width-2) // cols, len(f"[{rows-1},{cols-1}]"))
+        self.scroll_row = 0
+        self.scroll_col = 0
+        self._anchor = None  # Shift扩展选择的锚点，None表示没有进行中的范围选择
+        self._dirty = []  # 等待重绘的矩形
+
+    def resize(self, width, height):
+        super().resize(width, height)
+        self.cell_width = max((width-2) // self.cols, len(f"[{self.rows-1},{self.cols-1}]"))
+        self._dirty.clear()
+        self._scroll_to_cursor()
+
+    @property
+    def selected_cells(self):
+        """选中的 (行, 列) 集合（包含进行中的范围选择）
+
+        由 selection 计算得到的只读快照（frozenset）；修改选择请赋值给本属性，
+        或使用 selection / select_rect / clear_selection。
+        """
+        cells = self.selection.cells()
+        rect = self._range_rect()
+        if rect is not None:
+            cells.update((r, c) for r in range(rect[0], rect[2] + 1) for c in range(rect[1], rect[3] + 1))
+        return frozenset(cells)
+
+    @selected_cells.setter
+    def selected_cells(self, cells):
+        self._anchor = None
+        self.selection = CellSelection(cells)
+        self.prev_state = None
+
+    def _visible_rows(self):
+        return self.height - 3
+
+    def _visible_cols(self):
+        return max(1, (self.width - 2) // self.cell_width)
+
+    def _range_rect(self):
+        if self._anchor is None:
+            return None
+        (ar, ac), r, c = self._anchor, self.cursor_row, self.cursor_col
+        return (min(ar, r), min(ac, c), max(ar, r), max(ac, c))
+
+    def is_selected(self, r, c):
+        rect = self._range_rect()
+        if rect is not None and rect[0] <= r <= rect[2] and rect[1] <= c <= rect[3]:
+            return True
+        return (r, c) in self.selection
+
+    def _touch(self, rect):
+        if len(self._dirty) >= self.MAX_DIRTY:
+            self.prev_state = None
+        else:
+            self._dirty.append(rect)
+
+    def _commit_range(self):
+        """把进行中的范围选择并入 selection（显示不变）"""
+        rect = self._range_rect()
+        if rect is not None:
+            self.selection.add_rect(*rect)
+            self._anchor = None
+
+    def move_to(self, row, col, extend=False):
+        """移动光标并滚动到可见；extend 为真（且多选）时选择锚点到光标的矩形"""
+        row = max(0, min(self.rows-1, row))
+        col = max(0, min(self.cols-1, col))
+        if extend and self.multi_select:
+            if self._anchor is None:
+                self._anchor = (self.cursor_row, self.cursor_col)
+                # 锚点格从此算作选中；光标停在边缘不动时前后矩形相同，需要单独重绘
+                self._touch(self._anchor * 2)
+            old = self._range_rect()
+            self.cursor_row, self.cursor_col = row, col
+            new = self._range_rect()
+            for rect in _rect_minus(old, new) + _rect_minus(new, old):
+                self._touch(rect)
+        else:
+            self._commit_range()
+            self.cursor_row, self.cursor_col = row, col
+        self._scroll_to_cursor()
+
+    def select_rect(self, r0, c0, r1, c1):
+        """选中矩形（含两端）"""
+        self._commit_range()
+        self.selection.add_rect(r0, c0, r1, c1)
+        self._touch((r0, c0, r1, c1))
+
+    def clear_selection(self):
+        self._commit_range()
+        for rect in self.selection.rects():
+            self._touch(rect)
+        self.selection.clear()
+
+    def _scroll_to_cursor(self):
+        for pos, offset, page in ((self.cursor_row, 'scroll_row', self._visible_rows()),
+                                  (self.cursor_col, 'scroll_col', self._visible_cols())):
+            start = getattr(self, offset)
+            if pos < start:
+                setattr(self, offset, pos)
+            elif pos >= start + page:
+                setattr(self, offset, pos - page + 1)
+
+    def render(self, x, y):
+        if not self.visible:
+            return
+
+        view = (self.scroll_row, self.scroll_col, self.has_focus)
+        cursor = (self.cursor_row, self.cursor_col)
+        if self.prev_state is None or self.prev_state[0] != view:
+            # 绘制标题和边框，再绘制全部可见单元格
+            self.draw_frame(x, y)
+            self._paint(x, y, (0, 0, self.rows-1, self.cols-1))
+        elif self.prev_state[1] != cursor or self._dirty:
+            for rect in self._dirty:
+                self._paint(x, y, rect)
+            if self.prev_state[1] != cursor:
+                self._paint(x, y, self.prev_state[1] * 2)
+                self._paint(x, y, cursor * 2)
+        self._dirty = []
+        self.prev_state = (view, cursor)
+
+    def _paint(self, x, y, rect):
+        """重绘矩形中可见的单元格，每行相同样式的连续单元格合并为一次输出"""
+        r0, c0, r1, c1 = rect
+        r0, r1 = max(r0, self.scroll_row), min(r1, self.scroll_row + self._visible_rows() - 1)
+        c0, c1 = max(c0, self.scroll_col), min(c1, self.scroll_col + self._visible_cols() - 1)
+        screen = self.screen
+        width = self.cell_width
+        for r in range(r0, r1 + 1):
+            run, run_style, run_col = [], None, c0
+            for c in range(c0, c1 + 2):
+                if c <= c1:
+                    if self.is_selected(r, c):
+                        style = Color.SELECTED_BG
+                    elif r == self.cursor_row and c == self.cursor_col and self.has_focus:
+                        style = Color.HIGHLIGHT
+                    else:
+                        style = ""
+                    if style == run_style:
+                        run.append(fit_text(f"[{r},{c}]".center(width), width))
+                        continue
+                if run:
+                    screen.write_at(x + 1 + (run_col - self.scroll_col) * width,
+                                    y + 2 + r - self.scroll_row, "".join(run), run_style)
+                if c <= c1:
+                    run, run_style, run_col = [fit_text(f"[{r},{c}]".center(width), width)], style, c
 
     def handle_input(self, key):
-        if key in ('\x00', '\xe0'):
-            key = msvcrt.getwch()
-            if key == 'H' and self.cursor_row > 0:
-                self.cursor_row -= 1
-            elif key == 'P' and self.cursor_row < self.rows-1:
-                self.cursor_row += 1
-            elif key == 'K' and self.cursor_col > 0:
-                self.cursor_col -= 1
-            elif key == 'M' and self.cursor_col < self.cols-1:
-                self.cursor_col += 1
+        if key in GRID_MOVES or key in GRID_JUMPS:
+            return self.handle_keys(key, 1)
         elif key == ' ' and self.multi_select:
-            cell = (self.cursor_row, self.cursor_col)
-            if cell in self.selected_cells:
-                self.selected_cells.remove(cell)
-            else:
-                self.selected_cells.add(cell)
+            self._commit_range()
+            self.selection.toggle(self.cursor_row, self.cursor_col)
+            self._touch((self.cursor_row, self.cursor_col) * 2)
+        elif key == 'r' and self.multi_select:
+            self.select_rect(self.cursor_row, 0, self.cursor_row, self.cols-1)
+        elif key == 'c' and self.multi_select:
+            self.select_rect(0, self.cursor_col, self.rows-1, self.cursor_col)
+        elif key in ('a', Key.CTRL_A) and self.multi_select:
+            self.select_rect(0, 0, self.rows-1, self.cols-1)
+        elif key == Key.DELETE and self.multi_select:
+            self.clear_selection()
         elif key == '\r':
             return sorted(self.selected_cells) if self.multi_select else (self.cursor_row, self.cursor_col)
         return None
 
+    def handle_keys(self, key, count):
+        if key in GRID_MOVES:
+            (dr, dc), extend = GRID_MOVES[key]
+            self.move_to(self.cursor_row + dr * count, self.cursor_col + dc * count, extend)
+        elif key in GRID_JUMPS:
+            (dr, dc), extend = GRID_JUMPS[key]
+            row = self.cursor_row if not dr else (0 if dr < 0 else self.rows - 1)
+            col = self.cursor_col if not dc else (0 if dc < 0 else self.cols - 1)
+            self.move_to(row, col, extend)
+        else:
+            return super().handle_keys(key, count)
+        return None
+
+    def handle_mouse(self, event, x, y, count=1):
+        """单击移动光标（多选时切换该格），拖动或Shift+单击选择矩形"""
+        if event.kind in WHEEL_KEYS or event.button != 0:
+            return super().handle_mouse(event, x, y, count)
+        if not (0 <= y - 2 < self._visible_rows() and x >= 1 and (x - 1) // self.cell_width < self._visible_cols()):
+            return None
+        row = min(self.rows - 1, self.scroll_row + y - 2)
+        col = min(self.cols - 1, self.scroll_col + (x - 1) // self.cell_width)
+        if event.kind == 'drag' or event.kind == 'press' and event.mods & MOUSE_SHIFT:
+            self.move_to(row, col, extend=True)
+        elif event.kind == 'press':
+            self.move_to(row, col)
+            if self.multi_select:
+                self.selection.toggle(row, col)
+                self._touch((row, col, row, col))
+        return None
+
+# GridBox 方向键 -> ((行增量, 列增量), 是否扩展选择)
+GRID_MOVES = {
+    Key.UP: ((-1, 0), False), Key.DOWN: ((1, 0), False),
+    Key.LEFT: ((0, -1), False), Key.RIGHT: ((0, 1), False),
+    Key.SHIFT_UP: ((-1, 0), True), Key.SHIFT_DOWN: ((1, 0), True),
+    Key.SHIFT_LEFT: ((0, -1), True), Key.SHIFT_RIGHT: ((0, 1), True),
+}
+GRID_JUMPS = {
+    Key.CTRL_UP: ((-1, 0), False), Key.CTRL_DOWN: ((1, 0), False),
+    Key.CTRL_LEFT: ((0, -1), False), Key.CTRL_RIGHT: ((0, 1), False),
+    Key.CTRL_SHIFT_UP: ((-1, 0), True), Key.CTRL_SHIFT_DOWN: ((1, 0), True),
+    Key.CTRL_SHIFT_LEFT: ((0, -1), True), Key.CTRL_SHIFT_RIGHT: ((0, 1), True),
+}
+
 class ButtonGroup(UIComponent):
     """按钮组组件"""
+    __slots__ = ('buttons', 'selected')
+
     def __init__(self, title="Actions", buttons=["OK", "Cancel"], width=30):
         super().__init__(ComponentType.BUTTON_GROUP, width, 3)
         self.title = title
@@ -382,110 +2157,2653 @@ class ButtonGroup(UIComponent):
         if not self.visible:
             return
 
-        current_state = {
-            "selected": self.selected,
-            "focus": self.has_focus
-        }
+        current_state = (self.selected, self.has_focus)
         if current_state == self.prev_state:
             return
-        self.prev_state = current_state.copy()
+        self.prev_state = current_state
 
+        screen = self.screen
         # 绘制标题
-        sys.stdout.write(f"\033[{y+1};{x+1}H")
-        print(f"{Color.BLUE_TEXT}{self.title}{Color.RESET}")
-
-        # 绘制按钮行
-        line = ""
-        for i, btn in enumerate(self.buttons):
-            if i == self.selected and self.has_focus:
-                line += f"{Color.WHITE_BG}[{btn}]{Color.RESET} "
-            else:
-                line += f"[{btn}] "
-        
-        sys.stdout.write(f"\033[{y+2};{x+1}H")
-        print(line.center(self.width))
+        screen.write_fragment(x, y, fragment(self.title, Color.BLUE_TEXT))
+
+        # 绘制按钮行（整行居中，逐个按钮着色）
+        screen.write_fragment(x, y+1, fragment(" " * self.width))
+        for i, (bx, label) in enumerate(self._button_spans()):
+            style = Color.WHITE_BG if i == self.selected and self.has_focus else ""
+            screen.write_fragment(x + bx, y+1, fragment(label, style))
+
+    def _button_spans(self):
+        """各按钮的 (相对x, 标签)"""
+        labels = [f"[{btn}]" for btn in self.buttons]
+        line_width = sum(text_width(label) + 1 for label in labels)
+        bx = max(0, (self.width - line_width) // 2)
+        spans = []
+        for label in labels:
+            spans.append((bx, label))
+            bx += text_width(label) + 1
+        return spans
 
     def handle_input(self, key):
-        if key in ('\x00', '\xe0'):
-            key = msvcrt.getwch()
-            if key == 'K':  # Left
-                self.selected = max(0, self.selected - 1)
-            elif key == 'M':  # Right
-                self.selected = min(len(self.buttons)-1, self.selected + 1)
+        if key in (Key.LEFT, Key.RIGHT):
+            return self.handle_keys(key, 1)
         elif key == '\r':
             return self.buttons[self.selected]
         return None
+
+    def handle_mouse(self, event, x, y, count=1):
+        """单击按钮等同于选中后按Enter"""
+        if event.kind != 'press' or event.button != 0 or y != 1:
+            return super().handle_mouse(event, x, y, count)
+        for i, (bx, label) in enumerate(self._button_spans()):
+            if bx <= x < bx + text_width(label):
+                self.selected = i
+                return self.buttons[i]
+        return None
+
+    def handle_keys(self, key, count):
+        if key == Key.LEFT:
+            self.selected = max(0, self.selected - count)
+        elif key == Key.RIGHT:
+            self.selected = min(len(self.buttons)-1, self.selected + count)
+        else:
+            return super().handle_keys(key, count)
+        return None
+class Dialog(UIComponent):
+    """对话框组件：提示文本 + 一行按钮，配合 UIManager.open_modal 作为模态层使用"""
+    __slots__ = ('lines', 'buttons', 'selected')
+
+    def __init__(self, prompt, buttons=("确定", "取消"), title=""):
+        self.lines = prompt.split("\n")
+        self.buttons = list(buttons)
+        self.selected = 0
+        button_width = sum(text_width(f"[{btn}] ") for btn in self.buttons)
+        width = max([text_width(line) for line in self.lines] + [button_width, text_width(title)]) + 4
+        super().__init__(ComponentType.DIALOG, width, len(self.lines) + 5)
+        self.title = title
+
+    def render(self, x, y):
+        if not self.visible:
+            return
+
+        current_state = (self.selected, self.has_focus)
+        if current_state == self.prev_state:
+            return
+        self.prev_state = current_state
+
+        # 标题行也要整行覆盖下层内容
+        screen = self.screen
+        self.draw_frame(x, y, title=fit_text(self.title, self.width))
+        for i, line in enumerate(self.lines):
+            screen.write_fragment(x+2, y+2+i, fragment(line))
+        by = y + 3 + len(self.lines)
+        for i, (bx, label) in enumerate(self._button_spans()):
+            screen.write_fragment(x + bx, by, fragment(label, Color.WHITE_BG if i == self.selected else ""))
+
+    def _button_spans(self):
+        """各按钮的 (相对x, 标签)"""
+        spans = []
+        bx = 2
+        for btn in self.buttons:
+            label = f"[{btn}]"
+            spans.append((bx, label))
+            bx += text_width(label) + 1
+        return spans
+
+    def handle_input(self, key):
+        if key in (Key.LEFT, Key.RIGHT):
+            return self.handle_keys(key, 1)
+        elif key == '\r':
+            return self.selected
+        return None
+
+    def handle_mouse(self, event, x, y, count=1):
+        if event.kind != 'press' or event.button != 0 or y != 3 + len(self.lines):
+            return None
+        for i, (bx, label) in enumerate(self._button_spans()):
+            if bx <= x < bx + text_width(label):
+                self.selected = i
+                return i
+        return None
+
+    def handle_keys(self, key, count):
+        if key == Key.LEFT:
+            self.selected = (self.selected - count) % len(self.buttons)
+        elif key == Key.RIGHT:
+            self.selected = (self.selected + count) % len(self.buttons)
+        else:
+            return super().handle_keys(key, count)
+        return None
+
+def fit_text(text, width, align='left'):
+    """把文本裁剪/填充到恰好width列（按终端显示宽度计算）"""
+    cells = _cell_text(text)
+    if len(cells) > width:
+        cells = cells[:width]
+        if len(cells) < len(_cell_text(text)) and _cell_text(text)[width] == ScreenBuffer.WIDE_FILL:
+            cells = cells[:-1] + ' '  # 全角字符被截断一半时用空格补齐
+    pad = ' ' * (width - len(cells))
+    text = cells.replace(ScreenBuffer.WIDE_FILL, '')
+    return pad + text if align == 'right' else text + pad
+
+class Column(NamedTuple):
+    """表格列定义：type 用于排序键转换，width 为0时自动适配"""
+    name: str
+    type: type = str
+    width: int = 0
+    align: str = ''
+
+def _column_key(kind, value):
+    """把单元格值转换为可比较的排序键，空值和无法转换的值排在最前"""
+    if value is None or value == '':
+        return (False, 0)
+    try:
+        return (True, kind(value))
+    except (TypeError, ValueError):
+        return (False, 0)
+
+class Table(UIComponent):
+    """表格组件（按列排序，支持多列组合排序）
+
+    每种排序组合的置换数组都会被缓存：切换主排序列的升降序只是反向读取同一数组，
+    追加数据后只对新增行排序并与缓存的置换归并。
+    """
+    __slots__ = ('columns', 'rows', 'cursor_pos', 'scroll_offset', 'header_col', 'sort_keys',
+                 '_keys', '_perm_cache', '_spec', '_order', '_reversed', '_widths', '_version')
+    SAMPLE_ROWS = 256  # 自动列宽时最多采样的行数
+
+    def __init__(self, title="Table", columns=(), width=60, height=12):
+        super().__init__(ComponentType.TABLE, width, height)
+        self.title = title
+        self.columns = [c if isinstance(c, Column) else Column(c) for c in columns]
+        self.rows = []
+        self.cursor_pos = 0
+        self.scroll_offset = 0
+        self.header_col = 0
+        self.sort_keys = []  # [(列下标, 是否降序), ...]，第一项为主排序键
+        self._keys = [[] for _ in self.columns]
+        self._perm_cache = {}  # 排序组合 -> [置换数组, 逆置换（按需建立）]
+        self._spec = None
+        self._order = None  # 当前排序的置换数组，None表示原始顺序
+        self._reversed = False
+        self._widths = None
+        self._version = 0
+
+    def resize(self, width, height):
+        super().resize(width, height)
+        self._widths = None  # 列宽按组件宽度压缩，需要重新计算
+        self._scroll_to_cursor()
+
+    def set_rows(self, rows):
+        """替换全部数据"""
+        self.rows = []
+        self._keys = [[] for _ in self.columns]
+        self._perm_cache.clear()
+        self._spec = self._order = None
+        self.cursor_pos = self.scroll_offset = 0
+        self.extend(rows)
+
+    def append(self, row):
+        """追加一行"""
+        self.extend([row])
+
+    def extend(self, rows):
+        """追加多行，已有排序通过归并更新；列数不足的行以None（空单元格）补齐"""
+        width = len(self.columns)
+        rows = [tuple(row) + (None,) * (width - len(row)) for row in rows]
+        self.rows.extend(rows)
+        for col, column in enumerate(self.columns):
+            self._keys[col].extend(_column_key(column.type, row[col]) for row in rows)
+        self._widths = None
+        if self.sort_keys:
+            self._apply_sort()
+        self._version += 1
+
+    def row_index(self, pos):
+        """视图位置 -> rows下标"""
+        if self._order is None:
+            return pos
+        return self._order[-1 - pos] if self._reversed else self._order[pos]
+
+    def sort_by(self, col, add=False):
+        """按列排序：再次选择主排序列时切换升降序；add=True 时作为次级排序键追加或切换"""
+        anchor = self.row_index(self.cursor_pos) if self.rows else None
+        keys = self.sort_keys
+        current = next((i for i, (c, _) in enumerate(keys) if c == col), None)
+        if add and current is not None or current == 0:
+            keys[current] = (col, not keys[current][1])
+        elif add:
+            keys.append((col, False))
+        else:
+            self.sort_keys = [(col, False)]
+        self._apply_sort()
+        if anchor is not None:
+            self.cursor_pos = self._locate(anchor)
+        self._version += 1
+
+    def _apply_sort(self):
+        spec = tuple(self.sort_keys)
+        reverse = spec[0][1]
+        if reverse:
+            # 主键降序时按方向全部取反的组合查缓存，再反向读取
+            spec = tuple((c, not d) for c, d in spec)
+        entry = self._perm_cache.get(spec)
+        if entry is None:
+            entry = self._perm_cache[spec] = [array('L', self._sorted(spec, range(len(self.rows)))), None]
+        elif len(entry[0]) < len(self.rows):
+            entry[:] = [self._merge(spec, entry[0], self._sorted(spec, range(len(entry[0]), len(self.rows)))),
+                        None]
+        self._spec = spec
+        self._order = entry[0]
+        self._reversed = reverse
+
+    def _sorted(self, spec, indices):
+        # 从最次要的键开始依次稳定排序
+        order = list(indices)
+        for col, desc in reversed(spec):
+            order.sort(key=self._keys[col].__getitem__, reverse=desc)
+        return order
+
+    def _merge(self, spec, perm, fresh):
+        """把已排序的新增行归并进缓存的置换：二分定位插入点，整段复制原有部分"""
+        compare = self._comparator(spec)
+        merged = array('L')
+        start = lo = 0
+        for index in fresh:
+            hi = len(perm)
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if compare(index, perm[mid]) < 0:
+                    hi = mid
+                else:
+                    lo = mid + 1
+            merged.extend(perm[start:lo])
+            merged.append(index)
+            start = lo
+        merged.extend(perm[start:])
+        return merged
+
+    def _comparator(self, spec):
+        columns = [(self._keys[col], -1 if desc else 1) for col, desc in spec]
+        def compare(a, b):
+            for keys, sign in columns:
+                ka, kb = keys[a], keys[b]
+                if ka != kb:
+                    return sign if ka > kb else -sign
+            return 0
+        return compare
+
+    def _locate(self, row):
+        """rows下标 -> 视图位置（逆置换随置换数组一起缓存）"""
+        if self._order is None:
+            return row
+        entry = self._perm_cache[self._spec]
+        if entry[1] is None:
+            inverse = array('L', [0]) * len(entry[0])
+            for pos, index in enumerate(entry[0]):
+                inverse[index] = pos
+            entry[1] = inverse
+        pos = entry[1][row]
+        return len(self._order) - 1 - pos if self._reversed else pos
+
+    def _column_widths(self):
+        """按采样行自动适配列宽，总宽超出时按比例压缩"""
+        if self._widths is not None:
+            return self._widths
+        step = max(1, len(self.rows) // self.SAMPLE_ROWS)
+        sample = self.rows[::step]
+        widths = []
+        for col, column in enumerate(self.columns):
+            if column.width:
+                widths.append(column.width)
+                continue
+            width = text_width(column.name) + 2  # 预留排序标记
+            for row in sample:
+                width = max(width, text_width(_format_cell(row[col])))
+            widths.append(width)
+        available = self.width - 2 - (len(widths) - 1)
+        total = sum(widths)
+        if total > available:
+            widths = [max(3, w * available // total) for w in widths]
+        self._widths = widths
+        return widths
+
+    def _sort_marker(self, col):
+        for priority, (c, desc) in enumerate(self.sort_keys):
+            if c == col:
+                arrow = '▼' if desc else '▲'
+                return arrow if len(self.sort_keys) == 1 else f"{arrow}{priority+1}"
+        return ''
+
+    def _visible_rows(self):
+        return self.height - 4
+
+    def render(self, x, y):
+        if not self.visible:
+            return
+
+        current_state = (self.cursor_pos, self.scroll_offset, self.header_col,
+                         tuple(self.sort_keys), self.has_focus, self._version)
+        if current_state == self.prev_state:
+            return
+        self.prev_state = current_state
+
+        screen = self.screen
+        self.draw_frame(x, y)
+        widths = self._column_widths()
+
+        # 表头
+        cx = x + 1
+        for col, column in enumerate(self.columns):
+            label = fit_text(column.name + self._sort_marker(col), widths[col])
+            style = Color.HIGHLIGHT if col == self.header_col and self.has_focus else Color.BLUE_TEXT
+            screen.write_fragment(cx, y+2, fragment(label, style))
+            cx += widths[col] + 1
+
+        # 数据行
+        aligns = [c.align or ('right' if c.type in (int, float) else 'left') for c in self.columns]
+        end = min(self.scroll_offset + self._visible_rows(), len(self.rows))
+        for pos in range(self.scroll_offset, end):
+            row = self.rows[self.row_index(pos)]
+            line = " ".join(fit_text(_format_cell(row[col]), widths[col], aligns[col])
+                            for col in range(len(self.columns)))
+            style = Color.HIGHLIGHT if pos == self.cursor_pos and self.has_focus else ""
+            screen.write_at(x+1, y+3+pos-self.scroll_offset, line, style)
+
+    def _scroll_to_cursor(self):
+        visible = self._visible_rows()
+        if self.cursor_pos < self.scroll_offset:
+            self.scroll_offset = self.cursor_pos
+        elif self.cursor_pos >= self.scroll_offset + visible:
+            self.scroll_offset = self.cursor_pos - visible + 1
+
+    def handle_input(self, key):
+        if key in (Key.UP, Key.DOWN, Key.LEFT, Key.RIGHT):
+            return self.handle_keys(key, 1)
+        elif key == 's':  # 按当前列排序（再次按下切换升降序）
+            self.sort_by(self.header_col)
+        elif key == 'S':  # 追加为次级排序键
+            self.sort_by(self.header_col, add=True)
+        elif key == '\r':
+            return self.row_index(self.cursor_pos) if self.rows else None
+        self._scroll_to_cursor()
+        return None
+
+    def handle_mouse(self, event, x, y, count=1):
+        """单击表头排序（按住Shift追加次级排序键），单击数据行移动光标"""
+        if event.kind in WHEEL_KEYS or event.button != 0:
+            return super().handle_mouse(event, x, y, count)
+        if event.kind == 'press' and y == 2:
+            cx = 1
+            for col, width in enumerate(self._column_widths()):
+                if cx <= x < cx + width:
+                    self.header_col = col
+                    self.sort_by(col, add=bool(event.mods & MOUSE_SHIFT))
+                    break
+                cx += width + 1
+        elif event.kind in ('press', 'drag') and 0 <= y - 3 < self._visible_rows():
+            pos = self.scroll_offset + y - 3
+            if pos < len(self.rows):
+                self.cursor_pos = pos
+        self._scroll_to_cursor()
+        return None
+
+    def handle_keys(self, key, count):
+        if key == Key.UP:
+            self.cursor_pos = max(0, self.cursor_pos - count)
+        elif key == Key.DOWN:
+            self.cursor_pos = max(0, min(len(self.rows)-1, self.cursor_pos + count))
+        elif key == Key.LEFT:  # 选择表头列
+            self.header_col = max(0, self.header_col - count)
+        elif key == Key.RIGHT:
+            self.header_col = min(len(self.columns)-1, self.header_col + count)
+        else:
+            return super().handle_keys(key, count)
+        self._scroll_to_cursor()
+        return None
+
+def _format_cell(value):
+    return '' if value is None else str(value)
+
+def _fenwick_append(tree, value):
+    """树状数组（tree[0]不用，下标从1起）末尾追加一个元素"""
+    i = len(tree)
+    low = i - (i & -i)
+    j = i - 1
+    while j > low:
+        value += tree[j]
+        j -= j & -j
+    tree.append(value)
+
+def _fenwick_add(tree, i, delta):
+    """第i个元素（1起始）加上delta"""
+    while i < len(tree):
+        tree[i] += delta
+        i += i & -i
+
+def _fenwick_prefix(tree, i):
+    """前i个元素之和"""
+    total = 0
+    while i:
+        total += tree[i]
+        i -= i & -i
+    return total
+
+def _fenwick_find(tree, offset):
+    """第offset个单位（0起始）落在哪个元素：返回 (元素下标（1起始）, 在该元素内的偏移)"""
+    pos = 0
+    step = 1 << (len(tree) - 1).bit_length() >> 1
+    while step:
+        i = pos + step
+        if i < len(tree) and tree[i] <= offset:
+            pos = i
+            offset -= tree[i]
+        step >>= 1
+    return pos + 1, offset
+
+class TreeNode:
+    """树节点；children 为 None 表示子节点尚未加载（或已被淘汰）
+
+    shown 为节点展开时可见的后代数，sizes 是子节点可见行数（自身1行 + 展开时的 shown）的树状数组，
+    用于按位置查找节点和计算节点的位置。
+    """
+    __slots__ = ('label', 'value', 'parent', 'index', 'depth', 'children', 'expanded',
+                 'has_children', 'loading', 'error', 'shown', 'sizes')
+
+    def __init__(self, label, value=None, parent=None, has_children=None, index=0):
+        self.label = label
+        self.value = value
+        self.parent = parent
+        self.index = index  # 在父节点 children 中的下标
+        self.depth = parent.depth + 1 if parent is not None else -1
+        self.children = None
+        self.expanded = False
+        self.has_children = has_children  # None 表示未知，展开时再加载
+        self.loading = False
+        self.error = None  # 最近一次加载失败的异常
+        self.shown = 0
+        self.sizes = [0]
+
+class TreeView(UIComponent):
+    """树形视图组件（子节点按需加载）
+
+    loader(value) 返回子节点的可迭代对象（或协程/异步迭代器），元素为标签字符串（叶子）
+    或 (标签, 值, 是否有子节点) 元组，在后台线程中分块读取。加载失败时异常保存在节点的
+    error 上并显示在该行（根节点显示在标题中），再次展开会重新加载。
+    可见行不保存为扁平列表：每个节点用树状数组记录各子节点的可见行数，
+    展开、折叠和追加一批子节点只更新祖先链，按位置取节点为 O(深度·log n)。
+    折叠后的子树缓存超过 cache_limit 个节点时按最久未使用淘汰。
+    """
+    __slots__ = ('loader', 'root', 'cursor_pos', 'scroll_offset', 'cache_limit',
+                 '_incoming', '_loads', '_cache', '_cached_total', '_version', '_closed')
+    LOAD_CHUNK = 1000   # 后台线程每批交付的节点数
+    POLL_CHUNKS = 4     # 每帧最多合并的批数
+
+    def __init__(self, title="Tree", loader=None, width=40, height=15, cache_limit=100000):
+        if loader is None:
+            raise TypeError("TreeView 需要 loader(value) 回调")
+        super().__init__(ComponentType.TREE_VIEW, width, height)
+        self.title = title
+        self.loader = loader
+        self.root = TreeNode(title, None, has_children=True)
+        self.cursor_pos = 0
+        self.scroll_offset = 0
+        self.cache_limit = cache_limit
+        self._incoming = deque()
+        self._loads = 0
+        self._cache = OrderedDict()  # 已折叠且保留子节点的节点 -> 子节点数
+        self._cached_total = 0
+        self._version = 0
+        self._closed = False  # close 之后加载线程在下一项时停止
+        self.root.expanded = True
+        self._load(self.root)
+
+    def resize(self, width, height):
+        super().resize(width, height)
+        self._clamp_cursor()
+
+    # ---- 加载 ----
+    def _load(self, node):
+        if self._closed:
+            return
+        node.loading = True
+        node.error = None
+        node.children = []
+        node.sizes = [0]
+        node.shown = 0
+        self._loads += 1
+        threading.Thread(target=self._load_worker, args=(node,), daemon=True).start()
+
+    def _load_worker(self, node):
+        try:
+            result = self.loader(node.value)
+            if inspect.isawaitable(result):
+                result = asyncio.run(_await(result))
+            if hasattr(result, '__aiter__'):
+                asyncio.run(self._drain_async(node, result))
+            else:
+                batch = []
+                for item in result:
+                    if self._closed:
+                        return
+                    batch.append(item)
+                    if len(batch) >= self.LOAD_CHUNK:
+                        self._incoming.append((node, batch, False))
+                        batch = []
+                self._incoming.append((node, batch, True))
+        except Exception as exc:
+            self._incoming.append((node, exc, True))
+
+    async def _drain_async(self, node, items):
+        batch = []
+        async for item in items:
+            if self._closed:
+                return
+            batch.append(item)
+            if len(batch) >= self.LOAD_CHUNK:
+                self._incoming.append((node, batch, False))
+                batch = []
+        self._incoming.append((node, batch, True))
+
+    @property
+    def pending(self):
+        return self._loads > 0 or bool(self._incoming)
+
+    def close(self):
+        """停止后台加载：加载线程不再交付结果"""
+        self._closed = True
+        self._incoming.clear()
+        self._loads = 0
+
+    def poll(self):
+        """把后台交付的子节点并入树（每帧有上限，避免卡住事件循环）"""
+        changed = False
+        for _ in range(self.POLL_CHUNKS):
+            if not self._incoming:
+                break
+            node, items, done = self._incoming.popleft()
+            if isinstance(items, Exception):
+                node.error = items
+            else:
+                self._attach(node, items)
+            if done:
+                node.loading = False
+                node.has_children = bool(node.children) or (None if node.error else False)
+                if node.error is not None and not node.children and node is not self.root:
+                    # 什么也没加载到：收起节点，再次展开时重试
+                    node.expanded = False
+                    node.children = None
+                self._loads -= 1
+            changed = True
+        if changed:
+            self._version += 1
+            self._clamp_cursor()
+        return changed
+
+    def _attach(self, node, items):
+        children = node.children
+        start = len(children)
+        for item in items:
+            if isinstance(item, str):
+                child = TreeNode(item, item, node, False, len(children))
+            else:
+                label, value, has_children = item
+                child = TreeNode(label, value, node, has_children, len(children))
+            children.append(child)
+            _fenwick_append(node.sizes, 1)
+        node.shown += len(children) - start
+        if node.expanded:
+            self._reweigh(node, len(children) - start)
+
+    def _reweigh(self, node, delta):
+        """node 在父节点中的可见行数变化了delta：沿祖先链更新，遇到折叠的祖先停止"""
+        while node.parent is not None:
+            parent = node.parent
+            _fenwick_add(parent.sizes, node.index + 1, delta)
+            parent.shown += delta
+            if not parent.expanded:
+                break
+            node = parent
+
+    def _count(self):
+        """可见行数"""
+        return self.root.shown
+
+    def _node_at(self, pos):
+        """第pos个可见行的节点"""
+        node = self.root
+        while True:
+            i, offset = _fenwick_find(node.sizes, pos)
+            child = node.children[i - 1]
+            if offset == 0:
+                return child
+            node, pos = child, offset - 1
+
+    def _position(self, node):
+        """节点所在的可见行（节点必须可见）"""
+        pos = 0
+        while node.parent is not None:
+            parent = node.parent
+            pos += _fenwick_prefix(parent.sizes, node.index)
+            if parent.parent is not None:
+                pos += 1
+            node = parent
+        return pos
+
+    # ---- 展开/折叠 ----
+    def expand(self, pos):
+        """展开第pos个可见节点"""
+        node = self._node_at(pos)
+        if node.expanded or node.has_children is False:
+            return
+        node.expanded = True
+        if node.children is None:
+            self._load(node)
+        else:
+            if node in self._cache:
+                self._cached_total -= self._cache.pop(node)
+            self._reweigh(node, node.shown)
+        self._version += 1
+
+    def collapse(self, pos):
+        """折叠第pos个可见节点，子节点保留在缓存中"""
+        node = self._node_at(pos)
+        if not node.expanded:
+            return
+        self._reweigh(node, -node.shown)
+        node.expanded = False
+        if node.children and not node.loading:
+            self._cache[node] = len(node.children)
+            self._cached_total += len(node.children)
+            self._evict()
+        self._clamp_cursor()
+        self._version += 1
+
+    def _evict(self):
+        while self._cached_total > self.cache_limit and len(self._cache) > 1:
+            node, count = self._cache.popitem(last=False)
+            self._cached_total -= count
+            node.children = None
+            node.sizes = [0]
+            node.shown = 0
+            node.has_children = True
+
+    def _clamp_cursor(self):
+        self.cursor_pos = max(0, min(self.cursor_pos, self._count() - 1))
+        visible = self.height - 3
+        if self.cursor_pos < self.scroll_offset:
+            self.scroll_offset = self.cursor_pos
+        elif self.cursor_pos >= self.scroll_offset + visible:
+            self.scroll_offset = self.cursor_pos - visible + 1
+
+    # ---- 渲染与输入 ----
+    def render(self, x, y):
+        if not self.visible:
+            return
+
+        current_state = (self.cursor_pos, self.scroll_offset, self.has_focus, self._version)
+        if current_state == self.prev_state:
+            return
+        self.prev_state = current_state
+
+        if self.root.error is None:
+            self.draw_frame(x, y)
+        else:
+            self.draw_frame(x, y, title=fit_text(f"{self.title} [加载失败: {self.root.error}]", self.width))
+        screen = self.screen
+        end = min(self.scroll_offset + self.height - 3, self._count())
+        for pos in range(self.scroll_offset, end):
+            node = self._node_at(pos)
+            label = node.label
+            if node.loading:
+                marker = "… "
+            elif node.error is not None:
+                marker = "! "
+                label = f"{label} [加载失败: {node.error}]"
+            elif node.expanded and node.children:
+                marker = "▾ "
+            elif node.has_children is not False:
+                marker = "▸ "
+            else:
+                marker = "  "
+            text = fit_text("  " * node.depth + marker + label, self.width - 2)
+            style = Color.HIGHLIGHT if pos == self.cursor_pos and self.has_focus else ""
+            screen.write_at(x+1, y+2+pos-self.scroll_offset, text, style)
+
+    def handle_input(self, key):
+        if key in (Key.UP, Key.DOWN):
+            return self.handle_keys(key, 1)
+        if not self._count():
+            return None
+        node = self._node_at(self.cursor_pos)
+        if key == Key.RIGHT:
+            if node.expanded and node.children:
+                self.cursor_pos += 1
+            else:
+                self.expand(self.cursor_pos)
+        elif key == Key.LEFT:
+            if node.expanded:
+                self.collapse(self.cursor_pos)
+            elif node.parent is not self.root:
+                self.cursor_pos = self._position(node.parent)
+        elif key == ' ':
+            if node.expanded:
+                self.collapse(self.cursor_pos)
+            else:
+                self.expand(self.cursor_pos)
+        elif key == '\r':
+            return node.value
+        self._clamp_cursor()
+        return None
+
+    def handle_mouse(self, event, x, y, count=1):
+        """单击移动光标，单击展开标记时展开/折叠"""
+        if event.kind in WHEEL_KEYS or event.button != 0:
+            return super().handle_mouse(event, x, y, count)
+        pos = self.scroll_offset + y - 2
+        if event.kind not in ('press', 'drag') or not 0 <= y - 2 < self.height - 3 or pos >= self._count():
+            return None
+        self.cursor_pos = pos
+        node = self._node_at(pos)
+        marker = 1 + 2 * node.depth
+        if event.kind == 'press' and marker <= x < marker + 2:
+            if node.expanded:
+                self.collapse(pos)
+            else:
+                self.expand(pos)
+        self._clamp_cursor()
+        return None
+
+    def handle_keys(self, key, count):
+        if key == Key.UP:
+            self.cursor_pos -= count
+        elif key == Key.DOWN:
+            self.cursor_pos += count
+        else:
+            return super().handle_keys(key, count)
+        self._clamp_cursor()
+        return None
+
+async def _await(awaitable):
+    return await awaitable
+
+class RingBuffer:
+    """定长环形缓冲区（浮点数），写满后覆盖最旧的数据"""
+    __slots__ = ('capacity', 'data', 'start', 'size')
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.data = array('d', bytes(8 * capacity))
+        self.start = 0  # 最旧数据的位置
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def extend(self, values):
+        """追加一批数据（array('d') 或可迭代的数）"""
+        if not isinstance(values, array):
+            values = array('d', values)
+        n, capacity = len(values), self.capacity
+        if n >= capacity:
+            self.data[:] = values[n - capacity:]
+            self.start, self.size = 0, capacity
+            return
+        end = (self.start + self.size) % capacity
+        first = min(n, capacity - end)
+        self.data[end:end + first] = values[:first]
+        self.data[:n - first] = values[first:]
+        self.size += n
+        if self.size > capacity:
+            self.start = (self.start + self.size - capacity) % capacity
+            self.size = capacity
+
+    def values(self):
+        """按时间顺序返回全部数据"""
+        end = self.start + self.size
+        if end <= self.capacity:
+            return self.data[self.start:end]
+        return self.data[self.start:] + self.data[:end - self.capacity]
+
+def downsample(values, buckets):
+    """把序列均分为 buckets 段，返回每段的 (最小值列表, 最大值列表)；数据不足时每个点一段"""
+    n = len(values)
+    buckets = min(buckets, n)
+    if not buckets:
+        return [], []
+    if numpy is not None:
+        data = numpy.frombuffer(values, dtype=numpy.float64) if isinstance(values, array) \
+            else numpy.asarray(values, dtype=numpy.float64)
+        edges = numpy.arange(buckets) * n // buckets
+        return numpy.minimum.reduceat(data, edges).tolist(), numpy.maximum.reduceat(data, edges).tolist()
+    mins, maxs = [], []
+    for i in range(buckets):
+        chunk = values[i * n // buckets:(i + 1) * n // buckets]
+        mins.append(min(chunk))
+        maxs.append(max(chunk))
+    return mins, maxs
+
+BLOCKS = " ▁▂▃▄▅▆▇█"  # 纵向八分块
+HBLOCKS = " ▏▎▍▌▋▊▉█"  # 横向八分块
+BRAILLE_DOTS = ((0x01, 0x02, 0x04, 0x40), (0x08, 0x10, 0x20, 0x80))  # 盲文点阵：[列][从上到下的行]
+
+def _bar_rows(levels, height):
+    """按每列的高度（单位为1/8格）生成从上到下的各行块字符"""
+    rows = []
+    for r in range(height):
+        base = (height - 1 - r) * 8
+        rows.append(''.join(BLOCKS[max(0, min(8, level - base))] for level in levels))
+    return rows
+
+class Chart(UIComponent):
+    """实时图表基类
+
+    任意线程都可以 push 采样（只是追加到队列）；poll 时在主线程并入数据，
+    render 时只有可见内容发生变化才输出，并且只输出变化的行。
+    live=True 表示数据会从其他线程持续到来，交互事件循环会一直按间隔轮询；
+    回放（replay_session）只等待已经 push 的数据，不受 live 影响。
+    """
+    __slots__ = ('live', '_incoming', '_version', '_cache')
+    CRITICAL = False
+
+    def __init__(self, title, width, height, live=False):
+        super().__init__(ComponentType.CHART, width, height)
+        self.title = title
+        self.live = live
+        self._incoming = deque()
+        self._version = 0
+        self._cache = None  # ((版本, 宽, 高), 标题, 各行)
+
+    @property
+    def pending(self):
+        return bool(self._incoming)
+
+    def poll(self):
+        if not self._incoming:
+            return False
+        batch = []
+        while self._incoming:
+            batch.append(self._incoming.popleft())
+        self._ingest(batch)
+        self._version += 1
+        return True  # 内容是否真的变化由 render 比较（降采样的开销计入帧耗时，降级时可跳过）
+
+    def _content(self):
+        """(标题, 内部各行)，按数据版本和尺寸缓存"""
+        key = (self._version, self.width, self.height)
+        if self._cache is None or self._cache[0] != key:
+            self._cache = (key, self._title_text(), tuple(self._rows(self.width - 2, self.height - 3)))
+        return self._cache[1:]
+
+    def render(self, x, y):
+        if not self.visible:
+            return
+
+        title, rows = self._content()
+        state = (self.has_focus, title, rows)
+        if state == self.prev_state:
+            return
+        screen = self.screen
+        color = Color.WHITE_BG if self.has_focus else ""
+        if self.prev_state is None or self.prev_state[0] != self.has_focus:
+            self.draw_frame(x, y, color, title=fit_text(title, self.width))
+            old_rows = ()
+        else:
+            if title != self.prev_state[1]:
+                screen.write_fragment(x, y, fragment(fit_text(title, self.width), Color.BLUE_TEXT))
+            old_rows = self.prev_state[2]
+        for i, row in enumerate(rows):
+            if i >= len(old_rows) or old_rows[i] != row:
+                screen.write_at(x + 1, y + 2 + i, row)
+        self.prev_state = state
+
+    def _title_text(self):
+        return self.title
+
+    def _ingest(self, batch):
+        raise NotImplementedError
+
+    def _rows(self, width, height):
+        raise NotImplementedError
+
+class Sparkline(Chart):
+    """滚动折线：保留最近 capacity 个采样，按宽度做最小/最大值降采样
+
+    glyphs='block' 用八分块画每段的最大值；'braille' 用盲文点阵（每格2x4点）画出每段的最小~最大范围。
+    lo/hi 为None时按可见数据自动缩放。
+    """
+    __slots__ = ('samples', 'glyphs', 'lo', 'hi', 'last')
+
+    def __init__(self, title="Sparkline", width=40, height=5, capacity=10000, glyphs='block',
+                 lo=None, hi=None, live=False):
+        super().__init__(title, width, height, live)
+        self.samples = RingBuffer(capacity)
+        self.glyphs = glyphs
+        self.lo = lo
+        self.hi = hi
+        self.last = None
+
+    def push(self, value):
+        """追加一个采样（线程安全）"""
+        self._incoming.append(value)
+
+    def push_many(self, values):
+        """追加一批采样（线程安全），values 为 array('d')、列表等"""
+        self._incoming.append(values)
+
+    def _ingest(self, batch):
+        scalars = []
+        for item in batch:
+            if isinstance(item, (int, float)):
+                scalars.append(item)
+            else:
+                if scalars:
+                    self.samples.extend(scalars)
+                    scalars = []
+                self.samples.extend(item)
+        if scalars:
+            self.samples.extend(scalars)
+        if self.samples.size:
+            self.last = self.samples.data[(self.samples.start + self.samples.size - 1) % self.samples.capacity]
+
+    def _title_text(self):
+        return self.title if self.last is None else f"{self.title} {self.last:.4g}"
+
+    def _rows(self, width, height):
+        if width <= 0 or height <= 0:
+            return []
+        dots = 2 if self.glyphs == 'braille' else 1
+        mins, maxs = downsample(self.samples.values(), width * dots)
+        if not maxs:
+            return [' ' * width] * height
+        lo = min(mins) if self.lo is None else self.lo
+        hi = max(maxs) if self.hi is None else self.hi
+        span = (hi - lo) or 1.0
+        pad = width * dots - len(maxs)  # 数据不足时靠右对齐
+        if self.glyphs != 'braille':
+            levels = [0] * pad + [max(0, min(height * 8, round((v - lo) / span * height * 8))) for v in maxs]
+            return _bar_rows(levels, height)
+        # 盲文：每段点亮最小值到最大值之间的点
+        rows_of_dots = height * 4
+        cells = [[0x2800] * width for _ in range(height)]
+        for i, (vmin, vmax) in enumerate(zip(mins, maxs), pad):
+            top = rows_of_dots - 1 - max(0, min(rows_of_dots - 1, int((vmax - lo) / span * (rows_of_dots - 1))))
+            bottom = rows_of_dots - 1 - max(0, min(rows_of_dots - 1, int((vmin - lo) / span * (rows_of_dots - 1))))
+            column = BRAILLE_DOTS[i % 2]
+            for dot in range(top, bottom + 1):
+                cells[dot // 4][i // 2] |= column[dot % 4]
+        return [''.join(map(chr, row)) for row in cells]
+
+class Histogram(Chart):
+    """直方图：把采样按 [lo, hi) 均分为 bins 个区间计数（超出范围的计入两端），用竖条显示"""
+    __slots__ = ('lo', 'hi', 'counts', 'total')
+
+    def __init__(self, title="Histogram", lo=0.0, hi=1.0, bins=None, width=40, height=8, live=False):
+        super().__init__(title, width, height, live)
+        self.lo = lo
+        self.hi = hi
+        self.counts = array('Q', bytes(8 * (bins or width - 2)))
+        self.total = 0
+
+    def push(self, value):
+        """追加一个采样（线程安全）"""
+        self._incoming.append(value)
+
+    def push_many(self, values):
+        """追加一批采样（线程安全）"""
+        self._incoming.append(values)
+
+    def reset(self):
+        """清空计数"""
+        self.counts = array('Q', bytes(8 * len(self.counts)))
+        self.total = 0
+        self._version += 1
+
+    def _ingest(self, batch):
+        bins = len(self.counts)
+        scale = bins / ((self.hi - self.lo) or 1.0)
+        values = []
+        for item in batch:
+            if isinstance(item, (int, float)):
+                values.append(item)
+            else:
+                values.extend(item)
+        if numpy is not None:
+            data = numpy.clip(numpy.asarray(values, dtype=numpy.float64), self.lo, self.hi)
+            index = numpy.minimum(((data - self.lo) * scale).astype(numpy.int64), bins - 1)
+            for i, count in enumerate(numpy.bincount(index, minlength=bins).tolist()):
+                self.counts[i] += count
+        else:
+            counts, lo = self.counts, self.lo
+            for v in values:
+                counts[max(0, min(bins - 1, int((v - lo) * scale)))] += 1
+        self.total += len(values)
+
+    def _title_text(self):
+        return f"{self.title} n={self.total}"
+
+    def _rows(self, width, height):
+        if width <= 0 or height <= 0:
+            return []
+        mins, maxs = downsample(array('d', self.counts), width)
+        peak = max(maxs, default=0) or 1
+        levels = [round(v / peak * height * 8) for v in maxs]
+        levels += [0] * (width - len(levels))
+        return _bar_rows(levels, height)
+
+class BarChart(Chart):
+    """横向条形图：每个标签一行，push(标签, 数值) 更新该标签的当前值"""
+    __slots__ = ('values', 'hi')
+
+    def __init__(self, title="Bars", width=40, height=8, hi=None, live=False):
+        super().__init__(title, width, height, live)
+        self.values = OrderedDict()
+        self.hi = hi  # None 表示按当前最大值缩放
+
+    def push(self, label, value):
+        """更新一个标签的值（线程安全）"""
+        self._incoming.append((label, value))
+
+    def _ingest(self, batch):
+        self.values.update(batch)
+
+    def _rows(self, width, height):
+        items = list(self.values.items())[:height]
+        label_width = max((text_width(str(label)) for label, _ in items), default=0)
+        hi = self.hi or max((v for _, v in items), default=0) or 1
+        rows = []
+        for label, value in items:
+            text = f"{value:.4g}"
+            bar_width = max(0, width - label_width - len(text) - 2)
+            eighths = max(0, min(bar_width * 8, round(value / hi * bar_width * 8)))
+            bar = '█' * (eighths // 8) + (HBLOCKS[eighths % 8] if eighths % 8 else '')
+            rows.append(f"{fit_text(str(label), label_width)} {bar.ljust(bar_width)} {text}")
+        rows += [' ' * width] * (height - len(rows))
+        return [fit_text(row, width) for row in rows]
+
+class MmapLineSource:
+    """基于mmap的文件行数据源（可直接赋值给 ListBox.items）
+
+    后台线程增量建立行偏移索引(array('Q'))，只在访问时解码可见行，
+    索引可保存为旁路文件，重新打开时无需再次扫描。旁路文件记录已索引部分首尾数据块的指纹，
+    文件被改写（即使变长）时指纹不符，重新建立索引。
+    """
+    INDEX_SUFFIX = '.lineidx'
+    INDEX_MAGIC = 0x32584449_4C474554  # "TEGLIDX2"
+    FINGERPRINT_BLOCK = 4096  # 指纹覆盖已索引部分开头和结尾各这么多字节
+    CHUNK_SIZE = 8 << 20
+    _NEWLINE = re.compile(b'\n')
+
+    def __init__(self, path, encoding='utf-8', index_path=None,
+                 background=True, persist=True):
+        self.path = path
+        self.encoding = encoding
+        self.index_path = index_path or path + self.INDEX_SUFFIX
+        self.persist = persist
+        self._file = open(path, 'rb')
+        stat = os.fstat(self._file.fileno())
+        self._size = stat.st_size
+        self._mtime = stat.st_mtime_ns
+        self._mm = (mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+                    if self._size else None)
+        # offsets[i] 为第i行起始偏移，offsets[i+1]-1 为其结束位置（不含换行符）
+        self._offsets = array('Q', [0])
+        self._scanned = 0
+        self._done = False
+        self._cond = threading.Condition()
+        self._stop = False
+        self._thread = None
+
+        if not self.load_index():
+            self._offsets = array('Q', [0])
+            self._scanned = 0
+        if not self._done:
+            if background:
+                self._thread = threading.Thread(target=self._build_index, daemon=True)
+                self._thread.start()
+            else:
+                self._build_index()
+
+    def _build_index(self):
+        """分块扫描换行符，增量追加行偏移"""
+        pattern = self._NEWLINE
+        while self._scanned < self._size and not self._stop:
+            end = min(self._scanned + self.CHUNK_SIZE, self._size)
+            batch = array('Q', [m.end() for m in pattern.finditer(self._mm, self._scanned, end)])
+            with self._cond:
+                self._offsets.extend(batch)
+                self._scanned = end
+                self._cond.notify_all()
+        if self._stop:
+            return
+        with self._cond:
+            # 末行没有换行符时追加哨兵，使结束位置同样为 offsets[i+1]-1
+            if self._offsets[-1] < self._size:
+                self._offsets.append(self._size + 1)
+            self._done = True
+            self._cond.notify_all()
+        if self.persist:
+            try:
+                self.save_index()
+            except OSError:
+                pass
+
+    @property
+    def indexed(self):
+        """索引是否已完成"""
+        return self._done
+
+    @property
+    def progress(self):
+        """索引进度（0.0 ~ 1.0）"""
+        return 1.0 if self._done or not self._size else self._scanned / self._size
+
+    def wait_for_line(self, index, timeout=None):
+        """等待第index行被索引，返回是否可用"""
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: index < len(self._offsets) - 1 or self._done, timeout
+            ) and index < len(self._offsets) - 1
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._line(i) for i in range(*index.indices(len(self)))]
+        count = len(self)
+        if index < 0:
+            index += count
+        if not 0 <= index < count:
+            raise IndexError("line index out of range")
+        return self._line(index)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self._line(i)
+
+    def _line(self, index):
+        start = self._offsets[index]
+        end = self._offsets[index + 1] - 1
+        raw = self._mm[start:end]
+        if raw.endswith(b'\r'):
+            raw = raw[:-1]
+        return raw.decode(self.encoding, 'replace')
+
+    def _fingerprint(self, length):
+        """文件前 length 字节的首尾数据块的64位指纹"""
+        if not length:
+            return 0
+        block = self.FINGERPRINT_BLOCK
+        digest = hashlib.blake2b(length.to_bytes(8, 'little'), digest_size=8)
+        digest.update(self._mm[:min(block, length)])
+        digest.update(self._mm[max(0, length - block):length])
+        return int.from_bytes(digest.digest(), 'little')
+
+    def save_index(self):
+        """把已建立的行索引写入旁路文件"""
+        with self._cond:
+            scanned = self._scanned
+            header = array('Q', [self.INDEX_MAGIC, self._size, self._mtime,
+                                 scanned, int(self._done), self._fingerprint(scanned)])
+            offsets = array('Q', self._offsets)
+        tmp_path = self.index_path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            header.tofile(f)
+            offsets.tofile(f)
+        os.replace(tmp_path, self.index_path)
+
+    def load_index(self):
+        """从旁路文件恢复索引；文件被截断或改写时返回False"""
+        try:
+            with open(self.index_path, 'rb') as f:
+                header = array('Q')
+                header.fromfile(f, 6)
+                magic, size, mtime, scanned, done, fingerprint = header
+                if magic != self.INDEX_MAGIC or size > self._size or scanned > size:
+                    return False
+                if size == self._size and mtime != self._mtime:
+                    return False
+                if fingerprint != self._fingerprint(scanned):
+                    return False
+                offsets = array('Q')
+                offsets.frombytes(f.read())
+        except (OSError, EOFError, ValueError):
+            return False
+        if not offsets or offsets[0] != 0:
+            return False
+        if size < self._size:
+            # 追加写入的日志：去掉末行哨兵后从上次位置继续扫描
+            if offsets[-1] > scanned:
+                offsets.pop()
+            last = offsets[-1]
+            if last and self._mm[last - 1:last] != b'\n':
+                return False
+            done = False
+        self._offsets = offsets
+        self._scanned = scanned
+        self._done = bool(done)
+        return True
+
+    def close(self):
+        """停止索引线程并释放映射"""
+        self._stop = True
+        if self._thread is not None:
+            self._thread.join()
+        if self._mm is not None:
+            self._mm.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+_WORD_SEPARATORS = frozenset(' \t_-./\\:|,;()[]{}')
+
+def fold_case(text):
+    """逐字符转小写且保持长度，下标与原文本一一对应（如 'İ'.lower() 有两个字符，保持原样）"""
+    if text.isascii():
+        return text.lower()
+    return ''.join(low if len(low) == 1 else ch for ch, low in zip(text, map(str.lower, text)))
+
+def fuzzy_score(query, text):
+    """fzf风格的模糊匹配评分，未匹配返回None
+
+    query 需已经过 fold_case；命中单词边界、连续命中得分更高，间隔越大得分越低。
+    """
+    lowered = fold_case(text)
+    # 先从左向右找到最早的完整匹配，再从其结尾反向收缩得到最紧凑的区间
+    pos = -1
+    for ch in query:
+        pos = lowered.find(ch, pos + 1)
+        if pos < 0:
+            return None
+    end = pos
+    pos += 1
+    for ch in reversed(query):
+        pos = lowered.rfind(ch, 0, pos)
+    start = pos
+
+    score = 0
+    prev = start - 1
+    qi = 0
+    consecutive = 0
+    for i in range(start, end + 1):
+        if qi == len(query):
+            break
+        if lowered[i] != query[qi]:
+            continue
+        score += 16
+        if i == 0 or text[i - 1] in _WORD_SEPARATORS:
+            score += 8
+        elif text[i].isupper() and text[i - 1].islower():
+            score += 7
+        if i == prev + 1 and qi:
+            consecutive += 1
+            score += 4 * consecutive
+        else:
+            consecutive = 0
+            if qi:
+                score -= min(i - prev - 1, 8)
+        prev = i
+        qi += 1
+    return score - min(start, 16) // 4
+
+class FuzzyFilter:
+    """后台模糊过滤引擎
+
+    在工作线程中按块对候选项评分，用 heapq 维护前K名并在每块结束后发布部分结果；
+    提交新查询时正在进行的查询会在下一个块边界被取消。
+    """
+    CHUNK_SIZE = 8192
+
+    def __init__(self, items, limit=1000):
+        self.items = items
+        self.limit = limit
+        self._generation = 0
+        self._query = ""
+        self._results = []
+        self._complete = True
+        self._updated = False
+        self._closed = False
+        self.error = None  # 最近一次查询评分时出现的异常（此时结果只含出错前的部分）
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._worker, daemon=True)
+        self._thread.start()
+
+    def submit(self, query):
+        """提交新查询，取消正在进行的查询"""
+        with self._cond:
+            self._generation += 1
+            self._query = fold_case(query)
+            self._results = []
+            self._complete = False
+            self._updated = True
+            self._cond.notify_all()
+
+    @property
+    def complete(self):
+        """当前查询是否已扫描完全部候选项"""
+        return self._complete
+
+    def poll(self):
+        """自上次调用以来是否有新结果"""
+        with self._cond:
+            updated, self._updated = self._updated, False
+            return updated
+
+    def results(self):
+        """当前的(部分)结果：按得分降序的候选项下标列表"""
+        return self._results
+
+    def close(self):
+        """停止工作线程"""
+        with self._cond:
+            self._closed = True
+            self._generation += 1
+            self._cond.notify_all()
+        self._thread.join()
+
+    def _worker(self):
+        handled = self._generation
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._closed or self._generation != handled)
+                if self._closed:
+                    return
+                handled = self._generation
+                query = self._query
+            self._run(handled, query)
+
+    def _publish(self, generation, heap, complete):
+        ranked = [-neg for _, neg in sorted(heap, reverse=True)]
+        with self._cond:
+            if generation != self._generation:
+                return False
+            self._results = ranked
+            self._complete = complete
+            self._updated = True
+            return True
+
+    def _run(self, generation, query):
+        heap = []
+        self.error = None
+        try:
+            if query and not self._scan(generation, query, heap):
+                return
+        except Exception as exc:
+            # 出错时也要以 complete=True 结束本次查询，否则组件会一直处于 pending
+            self.error = exc
+        self._publish(generation, heap, True)
+
+    def _scan(self, generation, query, heap):
+        """对全部候选项评分并逐块发布部分结果，被新查询取消时返回False"""
+        # 子序列预筛选交给正则引擎，只有候选命中才进入Python评分
+        matcher = re.compile('.*?'.join(map(re.escape, query)), re.IGNORECASE | re.DOTALL)
+        items = self.items
+        limit = self.limit
+        total = len(items)
+        for chunk_start in range(0, total, self.CHUNK_SIZE):
+            if generation != self._generation:
+                return False
+            for i in range(chunk_start, min(chunk_start + self.CHUNK_SIZE, total)):
+                text = items[i]
+                if not isinstance(text, str):
+                    text = str(text)
+                if matcher.search(text) is None:
+                    continue
+                score = fuzzy_score(query, text)
+                if score is None:  # 正则的大小写规则比 fold_case 宽松
+                    continue
+                if len(heap) < limit:
+                    heapq.heappush(heap, (score, -i))
+                elif score > heap[0][0]:
+                    heapq.heapreplace(heap, (score, -i))
+            if not self._publish(generation, heap, False):
+                return False
+        return True
+
+class FocusNavigator:
+    """焦点空间索引：按组件中心点排序，沿方向查找最近的组件
+
+    索引在布局计算后建立一次；每个(组件, 方向)的查找结果会被缓存。
+    """
+    DIRECTIONS = {Key.ALT_UP: (0, -1), Key.ALT_DOWN: (0, 1),
+                  Key.ALT_LEFT: (-1, 0), Key.ALT_RIGHT: (1, 0)}
+
+    def __init__(self, layout, components):
+        self.components = list(components)
+        self._centers = []
+        for comp in self.components:
+            x, y = layout.get_position(comp)
+            self._centers.append((x + comp.width / 2, y + comp.height / 2))
+        self._by_x = sorted((cx, i) for i, (cx, _) in enumerate(self._centers))
+        self._by_y = sorted((cy, i) for i, (_, cy) in enumerate(self._centers))
+        self._cache = {}
+
+    def neighbour(self, index, direction):
+        """direction方向上离第index个组件最近的组件下标，没有则返回None"""
+        key = (index, direction)
+        if key not in self._cache:
+            self._cache[key] = self._search(index, direction)
+        return self._cache[key]
+
+    def _search(self, index, direction):
+        dx, dy = direction
+        axis = 0 if dx else 1
+        sign = dx or dy
+        ordered = self._by_x if axis == 0 else self._by_y
+        origin = self._centers[index]
+        # 沿主轴从当前位置向外扫描，主轴距离已不小于最优得分时停止
+        if sign > 0:
+            start = bisect.bisect_right(ordered, (origin[axis], len(ordered)))
+            candidates = ordered[start:]
+        else:
+            start = bisect.bisect_left(ordered, (origin[axis], -1))
+            candidates = reversed(ordered[:start])
+        best, best_score = None, float('inf')
+        for value, i in candidates:
+            primary = abs(value - origin[axis])
+            if primary >= best_score:
+                break
+            if primary == 0:
+                continue
+            score = primary + 2 * abs(self._centers[i][1 - axis] - origin[1 - axis])
+            if score < best_score:
+                best, best_score = i, score
+        return best
+
+class HitIndex:
+    """组件矩形的网格分桶索引：屏幕坐标 -> 组件下标
+
+    每个矩形登记到它覆盖的所有桶中，查找时只检查坐标所在桶里的矩形。
+    """
+    BUCKET_WIDTH = 16
+    BUCKET_HEIGHT = 4
+
+    def __init__(self, rects):
+        self.rects = list(rects)  # 与组件下标对应的 (x, y, 宽, 高)，被裁剪掉的为None
+        self._buckets = {}
+        bw, bh = self.BUCKET_WIDTH, self.BUCKET_HEIGHT
+        for i, rect in enumerate(self.rects):
+            if rect is None or not (rect[2] and rect[3]):
+                continue
+            x, y, w, h = rect
+            for by in range(y // bh, (y + h - 1) // bh + 1):
+                for bx in range(x // bw, (x + w - 1) // bw + 1):
+                    self._buckets.setdefault((bx, by), []).append(i)
+
+    def find(self, x, y):
+        """包含(x, y)的组件下标（重叠时取后添加的），没有则返回None"""
+        for i in reversed(self._buckets.get((x // self.BUCKET_WIDTH, y // self.BUCKET_HEIGHT), ())):
+            rx, ry, rw, rh = self.rects[i]
+            if rx <= x < rx + rw and ry <= y < ry + rh:
+                return i
+        return None
+
+class FrameScheduler:
+    """帧调度：限制帧率、把帧间隔内的多次更新合并为一帧，并记录帧耗时
+
+    - 两帧之间至少间隔 1/fps 秒，期间到达的按键和后台结果合并到下一帧；
+    - 有后台任务但轮询没有新结果时，轮询间隔逐次加倍，最长 idle_interval 秒；
+      等待轮询期间主循环阻塞在键盘输入上（按键到达立即醒来），没有后台任务时一直阻塞；
+    - 连续 degrade_after 帧超出帧预算时进入降级状态，非关键组件（CRITICAL=False）暂停绘制；
+      之后连续 recover_after 帧用时不到预算一半时恢复。
+    """
+    def __init__(self, fps=30, idle_interval=1.0, degrade_after=3, recover_after=30):
+        self.frame_interval = 1.0 / fps
+        self.idle_interval = idle_interval
+        self.degrade_after = degrade_after
+        self.recover_after = recover_after
+        self.poll_interval = self.frame_interval
+        self.degraded = False
+        self.last_frame = float('-inf')
+        self._over = 0
+        self._under = 0
+        self.metrics = {
+            'frames': 0,            # 已渲染的帧数
+            'coalesced': 0,         # 合并进其他帧的更新次数
+            'frame_time_avg': 0.0,  # 帧耗时（秒）的指数滑动平均
+            'frame_time_max': 0.0,
+            'over_budget': 0,       # 超出帧预算的帧数
+            'degradations': 0,      # 进入降级状态的次数
+            'skipped_renders': 0,   # 降级期间跳过的组件绘制次数
+            'idle_polls': 0,        # 没有新结果的轮询次数
+            'wakeups': 0,           # 主循环的迭代次数
+        }
+
+    def wait_time(self, now):
+        """距离下一帧允许渲染还要等待的秒数"""
+        return max(0.0, self.last_frame + self.frame_interval - now)
+
+    def polled(self, changed):
+        """记录一次后台轮询的结果，调整下次轮询的间隔"""
+        if changed:
+            self.poll_interval = self.frame_interval
+        else:
+            self.metrics['idle_polls'] += 1
+            self.poll_interval = min(self.idle_interval, self.poll_interval * 2)
+
+    def frame_done(self, began, ended):
+        """记录一帧的耗时；从降级状态恢复时返回True"""
+        elapsed = ended - began
+        metrics = self.metrics
+        metrics['frames'] += 1
+        metrics['frame_time_avg'] += (elapsed - metrics['frame_time_avg']) * 0.1
+        metrics['frame_time_max'] = max(metrics['frame_time_max'], elapsed)
+        self.last_frame = began
+        if elapsed > self.frame_interval:
+            metrics['over_budget'] += 1
+            self._over += 1
+            self._under = 0
+            if not self.degraded and self._over >= self.degrade_after:
+                self.degraded = True
+                metrics['degradations'] += 1
+        else:
+            self._over = 0
+            if self.degraded and elapsed < self.frame_interval / 2:
+                self._under += 1
+                if self._under >= self.recover_after:
+                    self.degraded = False
+                    self._under = 0
+                    return True
+        return False
+
+class Layer(NamedTuple):
+    """模态层：组件、位置、被覆盖区域的备份和关闭回调"""
+    component: object
+    x: int
+    y: int
+    saved: SavedRegion
+    on_close: object
+
 class UIManager:
     """UI管理引擎"""
+    MAX_BATCH = 256  # 每帧最多合并处理的按键数
+
     def __init__(self):
         self.layout = LayoutManager()
+        self.screen = Screen()
         self.components = []
         self.focus_index = 0
         self.running = False
+        self.hotkeys = {}
+        self.navigator = None
+        self.hit_index = None  # 鼠标命中索引，布局变化后按需重建
+        self.input = ConsoleInput()
+        self.layers = []  # 模态层，按z序从下到上
+        self.widgets = {}  # 声明式布局中 id -> 组件
+        self.layout_plan = None
+        self.scheduler = FrameScheduler()
+        self._skipped = set()  # 降级期间没有绘制的组件
 
-    def add_component(self, component, row, column,**kwargs):
-        """添加组件到布局"""
+    def add_component(self, component, row, column, hotkey=None, **kwargs):
+        """添加组件到布局；hotkey 为直接跳转到该组件的按键码（如 Key.F2）"""
         self.layout.add_component(component, row, column,**kwargs)
+        component.screen = self.screen
         self.components.append(component)
+        if hotkey is not None:
+            self.hotkeys[hotkey] = len(self.components) - 1
         if len(self.components) == 1:
             self.components[0].has_focus = True
 
-    def switch_focus(self):     
-        """切换焦点到下一个组件"""
+    def set_focus(self, index):
+        """把焦点移到第index个组件，返回焦点发生变化的组件"""
+        if index == self.focus_index:
+            return ()
+        old = self.components[self.focus_index]
+        new = self.components[index]
+        old.has_focus = False
+        new.has_focus = True
+        self.focus_index = index
+        for view, offset in self.layout.reveal(new):
+            self.scroll(view, offset)
+        return (old, new)
+
+    def switch_focus(self, step=1):
+        """按顺序切换焦点（step=-1 为反向）"""
         if len(self.components) < 2:
-            return
-        self.components[self.focus_index].has_focus = False
-        self.focus_index = (self.focus_index + 1) % len(self.components)
-        self.components[self.focus_index].has_focus = True
+            return ()
+        return self.set_focus((self.focus_index + step) % len(self.components))
+
+    def move_focus(self, direction):
+        """按方向把焦点移到空间上最近的组件"""
+        if self.navigator is None:
+            self.navigator = FocusNavigator(self.layout, self.components)
+        target = self.navigator.neighbour(self.focus_index, direction)
+        return () if target is None else self.set_focus(target)
+
+    def load_layout(self, spec):
+        """按声明式布局描述创建组件（见 compile_layout），返回 {id: 组件}
+
+        再次调用时只重新创建描述发生变化的组件，其余组件连同状态保留；
+        尺寸和放置都没有变化时沿用已计算的位置，只重绘变化的组件。
+        """
+        plan = compile_layout(spec)
+        previous = self.layout_plan
+        old = {}
+        if previous is not None:
+            old = {w.id: (w.digest, self.widgets[w.id]) for w in previous.widgets}
+        focused = self.components[self.focus_index] if self.components else None
+
+        widgets = {}
+        changed = []
+        for w in plan.widgets:
+            digest, comp = old.get(w.id, (None, None))
+            if digest != w.digest:
+                comp = w.create()
+                changed.append(comp)
+            widgets[w.id] = comp
+        kept = {id(comp) for comp in widgets.values()}
+        for _, comp in old.values():
+            if id(comp) not in kept:
+                comp.close()  # 被删除或重新创建的组件：停止其后台任务
+
+        self.components = []
+        self.hotkeys = {}
+        self.layout.clear()
+        for w in plan.widgets:
+            comp = widgets[w.id]
+            comp.has_focus = False
+            self.add_component(comp, hotkey=w.hotkey, **w.placement)
+        self.focus_index = self.components.index(focused) if focused in self.components else 0
+        if self.components:
+            self.components[self.focus_index].has_focus = True
+        self.widgets = widgets
+        self.layout_plan = plan
+        self.navigator = None
+        self.hit_index = None
+
+        geometry = [(w.placement, (c.width, c.height)) for w, c in zip(plan.widgets, self.components)]
+        if plan.positions is not None and plan.geometry == geometry:
+            self.layout.apply_positions(plan.positions)
+        else:
+            self.layout.calculate_layout()
+            plan.geometry = geometry
+            plan.positions = [self.layout.get_position(c) for c in self.components]
+
+        if self.running:
+            if previous is not None and previous.positions == plan.positions:
+                self.navigator = FocusNavigator(self.layout, self.components)
+                self.hit_index = None
+                for comp in changed:
+                    comp.prev_state = None
+                self.redraw(changed)
+            else:
+                self.initialize()
+        return widgets
+
+    def set_root(self, root, width=None, height=None):
+        """使用嵌套容器（HBox/VBox/Grid/Frame）作为布局，组件按容器树中的顺序获得焦点
+
+        width/height 为可用区域，默认取屏幕大小。
+        """
+        self.layout = ContainerLayout(root, width or self.screen.buffer.width,
+                                      height or self.screen.buffer.height)
+        self.components = []
+        self.hotkeys = {}
+        self.widgets = {}
+        self.layout_plan = None
+        for comp in root.components():
+            comp.screen = self.screen
+            comp.has_focus = False
+            self.components.append(comp)
+        self.focus_index = 0
+        if self.components:
+            self.components[0].has_focus = True
+        self.navigator = None
+        self.hit_index = None
 
     def initialize(self):
         """初始化界面"""
-        self.layout.calculate_layout()
-        sys.stdout.write("\033[2J")  # 清屏
+        self.layout.update_layout()
+        self.navigator = FocusNavigator(self.layout, self.components)
+        self.hit_index = None
+        self.screen.clear()
+        self.layout.draw(self.screen)
         for comp in self.components:
-            x, y = self.layout.get_position(comp)
+            comp.prev_state = None
+            self._render(comp)
+        # 模态层重新备份下层内容后再绘制
+        for i, layer in enumerate(self.layers):
+            comp = layer.component
+            comp.prev_state = None
+            saved = self.screen.buffer.save_region(layer.x, layer.y, comp.width, comp.height)
+            self.layers[i] = layer._replace(saved=saved)
+            comp.render(layer.x, layer.y)
+        self.screen.flush()
+
+    def redraw(self, components=None):
+        """重绘组件（默认全部，也可只重绘指定的组件）"""
+        if self.layers:
+            # 有模态层时下层组件暂停绘制，避免覆盖上层
+            for layer in self.layers:
+                if components is None or layer.component in components:
+                    layer.component.render(layer.x, layer.y)
+            top = self.layers[-1]
+            current, position = top.component, (top.x, top.y)
+        else:
+            for comp in self.components if components is None else components:
+                self._render(comp)
+            current = self.components[self.focus_index]
+            position = self.layout.get_position(current)
+        # 定位光标到当前焦点组件
+        x, y = current.get_cursor_pos(*position)
+        self.screen.move_cursor(x - 1, y - 1)  # get_cursor_pos 返回1起始的终端坐标
+        self.screen.flush()
+
+    def _render(self, comp, area=None):
+        """渲染一个组件：完全在可视区域（及area）外的直接跳过，部分可见的裁剪输出"""
+        if self.scheduler.degraded and not comp.CRITICAL:
+            self._skipped.add(comp)
+            self.scheduler.metrics['skipped_renders'] += 1
+            return
+        x, y = self.layout.get_position(comp)
+        clip = _intersect(self.layout.get_clip(comp), area)
+        if clip is None:
             comp.render(x, y)
-        sys.stdout.flush()
+            return
+        visible = _intersect(clip, (x, y, comp.width, comp.height))
+        if not (visible[2] and visible[3]):
+            return
+        self.screen.clip = clip
+        try:
+            comp.render(x, y)
+        finally:
+            self.screen.clip = None
 
-    def redraw(self):
-        """重绘所有组件"""
-        for comp in self.components:
+    def scroll(self, view, offset):
+        """把 ScrollView 滚动到 offset（调用方随后 redraw）
+
+        视口占满整行宽度时用终端滚动区域移动已有内容，只重绘新露出的行；
+        否则清空并重绘整个视口。
+        """
+        old = view.offset
+        view.offset = offset
+        view.relayout()
+        self.layout.calculate_layout()
+        delta = view.offset - old
+        if not delta:
+            return
+        self.navigator = None
+        self.hit_index = None
+        vx, vy, vw, vh = view.viewport
+        screen = self.screen
+        if vx == 0 and vw >= screen.buffer.width and abs(delta) < vh:
+            screen.scroll_region(vy, vy + vh - 1, delta)
+            area = (vx, vy + vh - delta, vw, delta) if delta > 0 else (vx, vy, vw, -delta)
+        else:
+            area = (vx, vy, vw, vh)
+            blank = fragment(' ' * vw)
+            for row in range(vy, vy + vh):
+                screen.write_fragment(vx, row, blank)
+        clip = screen.clip
+        screen.clip = area
+        try:
+            view.draw(screen)
+        finally:
+            screen.clip = clip
+        for comp in view.components():
             x, y = self.layout.get_position(comp)
-            comp.render(x, y)
-        # 定位光标到当前焦点组件
-        current = self.components[self.focus_index]
-        x, y = current.get_cursor_pos(*self.layout.get_position(current))
-        sys.stdout.write(f"\033[{y};{x}H")
-        sys.stdout.flush()
+            exposed = _intersect(area, (x, y, comp.width, comp.height))
+            if exposed[2] and exposed[3]:
+                comp.prev_state = None
+                self._render(comp, area)
+
+    def hit_test(self, x, y):
+        """屏幕坐标 (x, y) 处的组件下标（只计可见部分），没有则返回None"""
+        if self.hit_index is None:
+            rects = []
+            for comp in self.components:
+                cx, cy = self.layout.get_position(comp)
+                rects.append(_intersect(self.layout.get_clip(comp), (cx, cy, comp.width, comp.height)))
+            self.hit_index = HitIndex(rects)
+        return self.hit_index.find(x, y)
+
+    def dispatch_mouse(self, event, count=1):
+        """把鼠标事件交给所在位置的组件（不重绘），按下时先把焦点移过去；返回需要重绘的组件"""
+        if self.layers:
+            layer = self.layers[-1]
+            top = layer.component
+            x, y = event.x - layer.x, event.y - layer.y
+            if not (0 <= x < top.width and 0 <= y < top.height):
+                return ()  # 模态层之外的点击无效
+            result = top.handle_mouse(event, x, y, count)
+            if result is not None:
+                self.close_modal(result)
+                return None
+            return (top,)
+        index = self.hit_test(event.x, event.y)
+        if index is None:
+            return ()
+        changed = self.set_focus(index) if event.kind == 'press' else ()
+        comp = self.components[index]
+        cx, cy = self.layout.get_position(comp)
+        result = comp.handle_mouse(event, event.x - cx, event.y - cy, count)
+        if result is not None:
+            self.handle_result(result)
+        return tuple(changed) + (comp,)
 
-    def main_loop(self):
-        """主事件循环"""
+    def open_modal(self, component, x=None, y=None, on_close=None):
+        """打开模态层（默认居中）：先备份被覆盖的区域，关闭时只恢复该区域
+
+        模态层打开期间输入全部交给它；组件返回结果或按ESC时关闭，
+        并以结果（ESC为None）调用 on_close。
+        """
+        buffer = self.screen.buffer
+        if x is None:
+            x = max(0, (buffer.width - component.width) // 2)
+        if y is None:
+            y = max(0, (buffer.height - component.height) // 2)
+        component.screen = self.screen
+        component.has_focus = True
+        component.prev_state = None
+        saved = buffer.save_region(x, y, component.width, component.height)
+        self.layers.append(Layer(component, x, y, saved, on_close))
+        self.redraw((component,))
+
+    def close_modal(self, result=None):
+        """关闭最上层的模态层并恢复其覆盖的区域"""
+        layer = self.layers.pop()
+        self.screen.restore_region(layer.saved)
+        if layer.on_close is not None:
+            layer.on_close(result)
+
+    def popup_dialog(self, prompt, buttons=("确定", "取消"), on_close=None, title=""):
+        """在当前界面上弹出对话框，on_close 收到按钮下标（ESC为None）"""
+        dialog = Dialog(prompt, buttons, title)
+        self.open_modal(dialog, on_close=on_close)
+        return dialog
+
+    def main_loop(self, record=None, mouse=False, vt_input=False):
+        """主事件循环；record 为会话文件路径时记录本次的全部按键，mouse 为真时启用鼠标报告
+
+        vt_input 为真时启用VT输入（以便区分 Key.SHIFT_* 等组合键）；启用鼠标报告时总会启用VT输入。
+        """
         self.running = True
+        if record is not None:
+            self.input = InputRecorder(self.input)
+        screen = self.screen
+        screen.start()
+        mouse = mouse and not screen.line_mode
+        if mouse:
+            self.input.enable_mouse()
+            self.screen.write_control(MOUSE_ON)
+        elif vt_input:
+            self.input.enable_vt_input()
         self.initialize()
-        while self.running:
-            key = msvcrt.getwch()
-            if key == '\t':  # Tab切换焦点
-                self.switch_focus()
-                self.redraw()
-            elif key == '\x1b':  # ESC退出
-                self.running = False
+        scheduler = self.scheduler
+        dirty = set()  # 等待下一帧重绘的组件
+        full = False  # 下一帧是否全部重绘
+        next_poll = 0.0
+        try:
+            while self.running:
+                scheduler.metrics['wakeups'] += 1
+                busy = any(comp.pending or comp.live for comp in self.components)
+                waiting = full or bool(dirty)
+                # 空闲（无后台任务、无待绘制内容）时阻塞等待按键
+                if self.input.key_ready() or not (busy or waiting):
+                    changed = self.dispatch_batch(self.read_batch())
+                    if waiting:
+                        scheduler.metrics['coalesced'] += 1
+                    if changed is None:
+                        full = True
+                    else:
+                        dirty |= changed
+                now = time.perf_counter()
+                if busy and now >= next_poll:
+                    # 有后台任务（如模糊过滤）时按间隔轮询，以便逐步显示部分结果
+                    polled = {comp for comp in self.components if comp.poll()}
+                    scheduler.polled(bool(polled))
+                    dirty |= polled
+                    next_poll = now + scheduler.poll_interval
+                if not self.running:
+                    break
+                if full or dirty:
+                    wait = scheduler.wait_time(now)
+                    if wait <= 0:
+                        self.render_frame(None if full else dirty)
+                        dirty = set()
+                        full = False
+                        continue
+                else:
+                    wait = scheduler.poll_interval
+                if busy:
+                    wait = min(wait, max(0.0, next_poll - now))
+                if full or dirty:
+                    time.sleep(wait)
+                else:
+                    # 只在等待下次轮询（间隔可能已退避到 idle_interval）：按键到达时立即醒来
+                    self.input.wait_key(wait)
+            if screen.line_mode and (full or dirty):
+                # 行模式只在结束时输出画面：补上退出前最后一批按键造成的变化
+                self.redraw(None if full else dirty)
+        finally:
+            if mouse:
+                self.screen.write_control(MOUSE_OFF)
+                self.screen.flush()
+                self.input.enable_mouse(False)
+            elif vt_input:
+                self.input.enable_vt_input(False)
+            if record is not None:
+                self.input.save(record)
+                self.input = self.input.source
+            if self.screen.line_mode:
+                # 行模式下运行期间没有重绘输出，结束时打印一次最终画面
+                stream = self.screen.stream or sys.stdout
+                stream.write(self.screen.plain_text() + '\n')
+                stream.flush()
+            screen.stop()
+
+    def render_frame(self, components=None):
+        """渲染一帧（components 为None时全部重绘）并把耗时交给帧调度器"""
+        began = time.perf_counter()
+        self.redraw(components)
+        if self.scheduler.frame_done(began, time.perf_counter()) and self._skipped:
+            # 从降级恢复：补画期间跳过的组件
+            skipped, self._skipped = self._skipped, set()
+            self.redraw(skipped)
+
+    def close(self):
+        """停止所有组件（含模态层）的后台任务"""
+        for comp in self.components + [layer.component for layer in self.layers]:
+            comp.close()
+
+    def poll_components(self):
+        """收取后台任务结果，有变化时重绘"""
+        if any([comp.poll() for comp in self.components]):
+            self.redraw()
+
+    def read_batch(self):
+        """阻塞读取一个按键，再取出输入缓冲区中已有的全部按键"""
+        keys = [self.input.read_key()]
+        while len(keys) < self.MAX_BATCH and self.input.key_ready():
+            keys.append(self.input.read_key())
+        return keys
+
+    def process_key(self, key):
+        """处理一个按键并重绘"""
+        self.process_keys((key,))
+
+    def process_keys(self, keys):
+        """处理一批按键：连续的导航键合并为一次移动，整批只渲染一帧"""
+        self.redraw(self.dispatch_batch(keys))
+
+    def dispatch_batch(self, keys):
+        """分发一批按键（不重绘），返回需要重绘的组件集合，None 表示全部重绘"""
+        changed = set()
+        full_redraw = False
+        for key, count in coalesce_keys(keys):
+            if not self.running:
+                break
+            focus_changed = self.dispatch_key(key, count)
+            if focus_changed is None:
+                full_redraw = True
             else:
-                # 将输入传递给当前焦点组件
-                current = self.components[self.focus_index]
-                result = current.handle_input(key)
-                if result is not None:
-                    self.handle_result(result)
-                self.redraw()
+                changed.update(focus_changed)
+        return None if full_redraw else changed
+
+    def dispatch_key(self, key, count=1):
+        """分发按键（不重绘）；返回焦点变化的组件，交给组件处理时返回None"""
+        event = parse_mouse(key)
+        if event is not None:
+            return self.dispatch_mouse(event, count)
+        if self.layers:
+            return self._dispatch_modal(key, count)
+        if key == Key.TAB:
+            return self.switch_focus(count)
+        elif key == Key.SHIFT_TAB:
+            return self.switch_focus(-count)
+        elif key in self.hotkeys:
+            return self.set_focus(self.hotkeys[key])
+        elif key in FocusNavigator.DIRECTIONS:
+            return self.move_focus(FocusNavigator.DIRECTIONS[key])
+        elif key == Key.ESC:  # ESC退出
+            self.running = False
+            return ()
+        # 将输入传递给当前焦点组件
+        current = self.components[self.focus_index]
+        result = current.handle_keys(key, count)
+        if result is not None:
+            self.handle_result(result)
+        return None
+
+    def _dispatch_modal(self, key, count):
+        top = self.layers[-1].component
+        if key == Key.ESC:
+            self.close_modal(None)
+            return None
+        result = top.handle_keys(key, count)
+        if result is not None:
+            self.close_modal(result)
+            return None
+        return (top,)
 
     def handle_result(self, result):
         """处理组件返回结果"""
         print(f"\n操作结果: {result}")
         # 可根据需要添加业务逻辑处理
 
-if __name__ == "__main__":
-    # 创建UI管理器
-    ui = UIManager()
+class WidgetSpec(NamedTuple):
+    """编译后的单个组件描述"""
+    id: str
+    cls: type
+    args: dict
+    props: dict
+    placement: dict
+    hotkey: object
+    digest: str  # 本条描述的内容哈希
+
+    def create(self):
+        """按描述创建组件；描述会被缓存复用，构造参数和属性值都复制一份，不与组件共享可变值"""
+        comp = self.cls(**copy.deepcopy(self.args))
+        for name, value in self.props.items():
+            setattr(comp, name, copy.deepcopy(value))
+        return comp
+
+class LayoutPlan:
+    """编译后的布局；首次使用后缓存各组件的位置，相同描述再次加载时直接复用"""
+    __slots__ = ('digest', 'widgets', 'geometry', 'positions')
+
+    def __init__(self, digest, widgets):
+        self.digest = digest
+        self.widgets = widgets
+        self.geometry = None  # [(放置参数, (宽, 高)), ...]，positions 对应的计算输入
+        self.positions = None
+
+WIDGET_TYPES = {}  # 声明式布局可用的自定义组件类型：名称 -> 类
+PLACEMENT_KEYS = ('row', 'column', 'rowspan', 'columnspan', 'padx', 'pady', 'sticky')
+_layout_plans = OrderedDict()  # 内容哈希 -> LayoutPlan
+LAYOUT_PLAN_LIMIT = 64
+
+def _spec_digest(value):
+    data = json.dumps(value, sort_keys=True, ensure_ascii=False, default=repr)
+    return hashlib.sha1(data.encode('utf-8')).hexdigest()
+
+def _widget_class(name):
+    cls = WIDGET_TYPES.get(name) or globals().get(name)
+    if isinstance(cls, type) and issubclass(cls, UIComponent):
+        return cls
+    return None
+
+def compile_layout(spec):
+    """把声明式布局描述编译为 LayoutPlan（按内容哈希缓存）
+
+    spec 为组件描述的列表、{"widgets": [...]} 字典或对应的JSON文本。每项形如
+        {"id": "user", "type": "InputBox", "title": "用户名", "width": 30,
+         "row": 0, "column": 0, "columnspan": 2, "sticky": "w",
+         "hotkey": "F2", "props": {"border": "double"}}
+    row/column 等放置参数交给 LayoutManager，props 在创建后逐个赋值，
+    hotkey 为 Key 的属性名，其余键作为组件构造参数。
+    """
+    if isinstance(spec, str):
+        spec = json.loads(spec)
+    entries = spec.get('widgets', ()) if isinstance(spec, dict) else spec
+    digests = [_spec_digest(entry) for entry in entries]
+    digest = hashlib.sha1(''.join(digests).encode('ascii')).hexdigest()
+    plan = _layout_plans.get(digest)
+    if plan is not None:
+        _layout_plans.move_to_end(digest)
+        return plan
+
+    widgets = []
+    seen = set()
+    for i, entry in enumerate(entries):
+        where = f"布局描述第{i}项"
+        entry = dict(entry)
+        widget_id = str(entry.pop('id', i))
+        if widget_id in seen:
+            raise ValueError(f"{where}: 重复的 id {widget_id!r}")
+        seen.add(widget_id)
+        type_name = entry.pop('type', None)
+        cls = _widget_class(type_name)
+        if cls is None:
+            raise ValueError(f"{where}: 未知组件类型 {type_name!r}")
+        placement = {key: entry.pop(key) for key in PLACEMENT_KEYS if key in entry}
+        if 'row' not in placement or 'column' not in placement:
+            raise ValueError(f"{where}: 缺少 row/column")
+        hotkey = entry.pop('hotkey', None)
+        if hotkey is not None:
+            if not hasattr(Key, hotkey):
+                raise ValueError(f"{where}: 未知热键 {hotkey!r}")
+            hotkey = getattr(Key, hotkey)
+        props = entry.pop('props', {})
+        try:
+            inspect.signature(cls).bind(**entry)
+        except TypeError as e:
+            raise ValueError(f"{where}: {type_name} 参数错误: {e}") from None
+        widgets.append(WidgetSpec(widget_id, cls, entry, props, placement, hotkey, digests[i]))
+
+    plan = LayoutPlan(digest, tuple(widgets))
+    _layout_plans[digest] = plan
+    if len(_layout_plans) > LAYOUT_PLAN_LIMIT:
+        _layout_plans.popitem(last=False)
+    return plan
+
+class HeadlessSink:
+    """无终端输出：丢弃内容，只统计写出的字节数"""
+    def __init__(self):
+        self.bytes_written = 0
+        self.buffer = self  # 与文本流一样提供二进制层，Screen 直接写入字节
+
+    def write(self, data):
+        self.bytes_written += len(data) if isinstance(data, (bytes, bytearray)) else len(data.encode('utf-8'))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def isatty(self):
+        return False
+
+class ReplayReport:
+    """回放结果：每个按键的处理延迟（秒）和输出字节数，以及组件返回的结果"""
+    def __init__(self):
+        self.events = []  # [(按键码, 延迟, 字节数), ...]
+        self.results = []  # 回放期间交给 handle_result 的结果
+
+    @property
+    def latencies(self):
+        return [latency for _, latency, _ in self.events]
+
+    def percentile(self, p):
+        """延迟的p分位数（p取0~100）"""
+        ordered = sorted(self.latencies)
+        if not ordered:
+            return 0.0
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+    def over_budget(self, max_bytes):
+        """输出字节数超出预算的 (序号, 按键码, 字节数)"""
+        return [(i, key, size) for i, (key, _, size) in enumerate(self.events) if size > max_bytes]
 
+    def summary(self):
+        """单行汇总文本"""
+        total_bytes = sum(size for _, _, size in self.events)
+        return (f"{len(self.events)} keys, p50 {self.percentile(50)*1000:.2f}ms, "
+                f"p95 {self.percentile(95)*1000:.2f}ms, max {max(self.latencies, default=0)*1000:.2f}ms, "
+                f"{total_bytes} bytes")
+
+def replay_session(ui, events, realtime=False, width=120, height=40, on_frame=None):
+    """把录制的按键回放到UIManager（输出到无终端Screen），返回ReplayReport
+
+    realtime=False 时全速回放；每个按键都会等后台任务完成后再处理下一个，
+    保证结果可重复。on_frame(序号, 按键码, screen) 在每帧之后调用，可用于金样比较。
+    回放期间组件结果收集到 report.results 而不打印；结束后恢复原来的屏幕，
+    组件在下次绘制时整体重绘。
+    """
+    sink = HeadlessSink()
+    screen, handle_result, running = ui.screen, ui.__dict__.get('handle_result'), ui.running
+    report = ReplayReport()
+    ui.handle_result = report.results.append
+    _set_screen(ui, Screen(sink, width, height))
+    try:
+        ui.running = True
+        ui.initialize()
+        start = time.perf_counter()
+        for offset, key in events:
+            if not ui.running:
+                break
+            if realtime:
+                delay = start + offset - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            before = sink.bytes_written
+            began = time.perf_counter()
+            ui.process_key(key)
+            # 收取后台任务（过滤、树加载、图表数据）直到全部交付，再只画一帧最终结果
+            changed = False
+            while True:
+                changed |= any([comp.poll() for comp in ui.components])
+                if not any(comp.pending for comp in ui.components):
+                    break
+                time.sleep(0.001)
+            if changed:
+                ui.redraw()
+            report.events.append((key, time.perf_counter() - began, sink.bytes_written - before))
+            if on_frame is not None:
+                on_frame(len(report.events) - 1, key, ui.screen)
+    finally:
+        _set_screen(ui, screen)
+        ui.running = running
+        if handle_result is None:
+            del ui.handle_result
+        else:
+            ui.handle_result = handle_result
+    return report
+
+def _set_screen(ui, screen):
+    """让UIManager及其组件（含模态层）改用screen输出"""
+    ui.screen = screen
+    for comp in ui.components + [layer.component for layer in ui.layers]:
+        comp.screen = screen
+        comp.prev_state = None
+
+def assert_state(component, **expected):
+    """断言组件属性的最终值，例如 assert_state(listbox, cursor_pos=37)"""
+    mismatched = {name: (getattr(component, name), value)
+                  for name, value in expected.items() if getattr(component, name) != value}
+    if mismatched:
+        details = ", ".join(f"{name}={actual!r} (expected {value!r})"
+                            for name, (actual, value) in mismatched.items())
+        raise AssertionError(f"{type(component).__name__}: {details}")
+
+KEY_ALIASES = {'\x7f': Key.BACKSPACE, '\n': Key.ENTER}  # 远程终端发送的按键 -> 按键码
+
+def _key_sequences():
+    """按键码 -> 终端发送的输入序列（CSI_KEYS 的反向映射）"""
+    sequences = {}
+    for (name, modifier), key in CSI_KEYS.items():
+        if modifier == 1:
+            seq = '\x1b[' + name
+        elif name.endswith('~'):
+            seq = f"\x1b[{name[:-1]};{modifier}~"
+        else:
+            seq = f"\x1b[1;{modifier}{name}"
+        sequences.setdefault(key, seq)
+    return sequences
+
+KEY_SEQUENCES = _key_sequences()
+
+def encode_key(key):
+    """按键码 -> 终端输入序列（远程客户端发送按键时使用）"""
+    return KEY_SEQUENCES.get(key, key)
+
+def decode_keys(text, final=False):
+    """把终端输入文本拆分为按键码，返回 (按键列表, 尚不完整的尾部序列)
+
+    末尾单独的ESC可能是序列的开头，也作为尾部返回；等待超时后以 final=True 再次调用，
+    尾部按已到达的内容输出（单独的ESC即 Key.ESC）。
+    """
+    keys = []
+    i, n = 0, len(text)
+    while i < n:
+        ch = text[i]
+        if ch == Key.ESC:
+            if i + 1 < n and text[i+1] == 'O' and i + 2 < n:
+                keys.append(decode_csi('', text[i+2]))
+                i += 3
+                continue
+            if i + 1 < n and text[i+1] == '[':
+                j = i + 2
+                while j < n and not '\x40' <= text[j] <= '\x7e':
+                    j += 1
+                if j < n:
+                    keys.append(decode_csi(text[i+2:j], text[j]))
+                    i = j + 1
+                    continue
+            elif i + 1 < n and text[i+1] != 'O':
+                keys.append(text[i:i+2])
+                i += 2
+                continue
+            # 序列不完整（或只有ESC），等待后续数据
+            if not final:
+                break
+            keys.append(Key.ESC if i + 1 == n else text[i:])
+            i = n
+            continue
+        if ch == '\r' and text[i+1:i+2] in ('\n', '\0'):
+            i += 1  # CR LF / CR NUL 只算一次Enter
+        keys.append(KEY_ALIASES.get(ch, ch))
+        i += 1
+    return keys, text[i:]
+
+def deep_sizeof(obj):
+    """对象及其引用的容器、本模块对象的内存占用估算（字节），每个对象只计一次"""
+    total = 0
+    seen = set()
+    stack = [obj]
+    while stack:
+        o = stack.pop()
+        if id(o) in seen:
+            continue
+        seen.add(id(o))
+        total += sys.getsizeof(o)
+        if isinstance(o, dict):
+            stack.extend(o.keys())
+            stack.extend(o.values())
+        elif isinstance(o, (list, tuple, set, frozenset, deque)):
+            stack.extend(o)
+        elif type(o).__module__ == __name__ and not isinstance(o, (type, Enum)):
+            for cls in type(o).__mro__:
+                stack.extend(getattr(o, name) for name in getattr(cls, '__slots__', ()) if hasattr(o, name))
+            if hasattr(o, '__dict__'):
+                stack.append(o.__dict__)
+    return total
+
+class ScreenDiff:
+    """把单元格屏幕与客户端已显示的内容比较，只输出变化的部分
+
+    每行只输出从第一个到最后一个变化单元格的一段；未变化的行通过数组切片比较跳过。
+    """
+    __slots__ = ('buffer', '_chars', '_styles', '_cursor')
+    FILL = ord(ScreenBuffer.WIDE_FILL)
+
+    def __init__(self, buffer):
+        self.buffer = buffer
+        blank = ScreenBuffer(buffer.width, buffer.height)
+        self._chars = blank.chars  # 客户端当前显示的内容
+        self._styles = blank.styles
+        self._cursor = None
+
+    def render(self, cursor):
+        """生成把客户端屏幕更新到当前内容的输出（字节），并把光标放到cursor"""
+        buffer = self.buffer
+        chars, styles = buffer.chars, buffer.styles
+        shown, shown_styles = self._chars, self._styles
+        out = bytearray()
+        if chars != shown or styles != shown_styles:
+            width = buffer.width
+            for a in range(0, len(chars), width):
+                b = a + width
+                if chars[a:b] == shown[a:b] and styles[a:b] == shown_styles[a:b]:
+                    continue
+                start, end = a, b
+                while chars[start] == shown[start] and styles[start] == shown_styles[start]:
+                    start += 1
+                while chars[end-1] == shown[end-1] and styles[end-1] == shown_styles[end-1]:
+                    end -= 1
+                if start > a and chars[start] == self.FILL:
+                    start -= 1  # 从全角字符的左半列开始输出
+                out += cursor_to(start - a, a // width)
+                text = chars[start:end].tobytes().decode('utf-32-le')
+                run = start
+                for i in range(start + 1, end + 1):
+                    if i == end or styles[i] != styles[run]:
+                        segment = text[run-start:i-start].replace(ScreenBuffer.WIDE_FILL, '')
+                        out += f"{Color.RESET}{buffer.style_of(styles[run])}{segment}".encode('utf-8')
+                        run = i
+                out += Color.RESET.encode('ascii')
+                shown[start:end] = chars[start:end]
+                shown_styles[start:end] = styles[start:end]
+        if out or cursor != self._cursor:
+            out += cursor_to(*cursor)
+            self._cursor = cursor
+        return bytes(out)
+
+class Session:
+    """远程会话：每个连接一个 UIManager（独立的组件状态）、单元格屏幕和差分输出
+
+    屏幕以行模式运行，只维护单元格模型；每帧之后由 ScreenDiff 计算发给客户端的输出。
+    """
+    ESC_TIMEOUT = 0.05  # 输入末尾不完整的序列（如单独的ESC）等待后续数据的秒数
+
+    def __init__(self, server, reader, writer, number):
+        self.server = server
+        self.reader = reader
+        self.writer = writer
+        self.number = number
+        self.results = []  # 组件返回的结果
+        self.ui = UIManager()
+        self.ui.screen = Screen(HeadlessSink(), server.width, server.height, line_mode=True)
+        self.ui.handle_result = self._handle_result
+        try:
+            server.setup(self.ui)
+        except BaseException:
+            self.ui.close()  # setup 中途失败：停止已经添加的组件（连接由 handle_connection 关闭）
+            raise
+        self.diff = ScreenDiff(self.ui.screen.buffer)
+        self._decoder = codecs.getincrementaldecoder('utf-8')('replace')
+        self.metrics = {
+            'frames': 0,            # 发送的帧数
+            'keys': 0,              # 收到的按键数
+            'bytes_sent': 0,
+            'frame_time_avg': 0.0,  # 处理按键、渲染和差分的耗时（秒）的指数滑动平均
+            'frame_time_max': 0.0,
+        }
+
+    def _handle_result(self, result):
+        self.results.append(result)
+        if self.server.on_result is not None:
+            self.server.on_result(self, result)
+
+    def report(self):
+        """会话指标，包括估算的内存占用（字节）"""
+        return dict(self.metrics, session=self.number, memory=deep_sizeof(self.ui) + deep_sizeof(self.diff))
+
+    async def run(self):
+        """处理该连接直到客户端断开或按ESC退出"""
+        ui = self.ui
+        ui.running = True
+        if self.server.mouse:
+            self.writer.write(MOUSE_ON)
+        began = time.perf_counter()
+        ui.initialize()
+        await self._send(began)
+        rest = ''
+        received = 0.0
+        try:
+            while ui.running:
+                busy = any(comp.pending or comp.live for comp in ui.components)
+                # 没有后台任务时一直等待客户端输入；尾部不完整时只等 ESC_TIMEOUT
+                timeout = ui.scheduler.poll_interval if busy else None
+                if rest:
+                    timeout = min(timeout or self.ESC_TIMEOUT, self.ESC_TIMEOUT)
+                try:
+                    data = await asyncio.wait_for(self.reader.read(4096), timeout)
+                except asyncio.TimeoutError:
+                    data = None
+                if data == b'':
+                    break
+                began = time.perf_counter()
+                changed = set()
+                keys = ()
+                if data:
+                    keys, rest = decode_keys(rest + self._decoder.decode(data))
+                    received = began
+                elif rest and began - received >= self.ESC_TIMEOUT:
+                    keys, rest = decode_keys(rest, final=True)  # 后续数据没有到达：单独的ESC就是ESC键
+                if keys:
+                    self.metrics['keys'] += len(keys)
+                    changed = ui.dispatch_batch(keys)
+                if busy:
+                    polled = {comp for comp in ui.components if comp.poll()}
+                    ui.scheduler.polled(bool(polled))
+                    if changed is not None:
+                        changed |= polled
+                if not ui.running:
+                    break
+                if changed is None or changed:
+                    ui.render_frame(changed)
+                    await self._send(began)
+        finally:
+            ui.running = False
+            ui.close()
+            if self.server.mouse:
+                self.writer.write(MOUSE_OFF)
+            await _close_writer(self.writer)
+
+    async def _send(self, began):
+        data = self.diff.render(self.ui.screen.cursor)
+        if data:
+            self.writer.write(data)
+            await self.writer.drain()
+        elapsed = time.perf_counter() - began
+        metrics = self.metrics
+        metrics['frames'] += 1
+        metrics['bytes_sent'] += len(data)
+        metrics['frame_time_avg'] += (elapsed - metrics['frame_time_avg']) * 0.1
+        metrics['frame_time_max'] = max(metrics['frame_time_max'], elapsed)
+
+async def _close_writer(writer):
+    """关闭连接并等待底层传输真正关闭（对方已断开时忽略错误）"""
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except OSError:
+        pass
+
+class SessionServer:
+    """会话服务器：多个操作员通过套接字连接同一个界面程序，每个连接一个独立会话
+
+    setup(ui) 在每个新会话的 UIManager 上添加组件（或调用 load_layout / set_root）。
+    全部会话由同一个asyncio事件循环驱动；客户端终端需处于原始模式（逐键发送、不回显）。
+    """
+    def __init__(self, setup, width=100, height=30, mouse=False, on_result=None):
+        self.setup = setup
+        self.width = width
+        self.height = height
+        self.mouse = mouse
+        self.on_result = on_result  # on_result(会话, 结果)
+        self.sessions = []  # 活动会话
+        self._count = 0
+
+    async def handle_connection(self, reader, writer):
+        """为一个连接运行会话；也可以直接传入其他来源（如pty）的流"""
+        self._count += 1
+        try:
+            session = Session(self, reader, writer, self._count)
+        except BaseException:
+            await _close_writer(writer)
+            raise
+        self.sessions.append(session)
+        try:
+            await session.run()
+        finally:
+            self.sessions.remove(session)
+
+    async def start(self, host='127.0.0.1', port=0):
+        """监听TCP端口（port=0 时自动分配），返回 asyncio.Server"""
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+    async def start_unix(self, path):
+        """监听Unix套接字（仅限POSIX系统），返回 asyncio.Server"""
+        return await asyncio.start_unix_server(self.handle_connection, path)
+
+    def report(self):
+        """所有活动会话的指标"""
+        return [session.report() for session in self.sessions]
+
+    def serve(self, host='127.0.0.1', port=8023):
+        """阻塞运行TCP服务器"""
+        async def main():
+            server = await self.start(host, port)
+            async with server:
+                await server.serve_forever()
+        asyncio.run(main())
+
+_CONTROL_SEQUENCE = re.compile(r'\x1b\[([0-9;?<]*)([A-Za-z])')
+
+class SessionClient:
+    """会话服务器的本地测试客户端：发送按键，并按收到的输出重建屏幕内容
+
+    只解析服务器会输出的光标定位和颜色序列，足以在测试中比较画面。
+    """
+    def __init__(self, width=100, height=30):
+        self.buffer = ScreenBuffer(width, height)
+        self.bytes_received = 0
+        self.reader = None
+        self.writer = None
+        self._x = self._y = 0
+        self._style = ''
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self._rest = ''
+
+    async def connect(self, host='127.0.0.1', port=8023):
+        self.reader, self.writer = await asyncio.open_connection(host, port)
+
+    async def connect_unix(self, path):
+        self.reader, self.writer = await asyncio.open_unix_connection(path)
+
+    async def send(self, *keys):
+        """发送按键码（自动转换为终端输入序列）"""
+        self.writer.write(''.join(map(encode_key, keys)).encode('utf-8'))
+        await self.writer.drain()
+
+    async def receive(self, idle=0.05):
+        """读取输出直到连续idle秒没有新数据（或连接关闭），返回是否仍然连接"""
+        while True:
+            try:
+                data = await asyncio.wait_for(self.reader.read(65536), idle)
+            except asyncio.TimeoutError:
+                return True
+            if not data:
+                return False
+            self.bytes_received += len(data)
+            self._apply(self._decoder.decode(data))
+
+    def _apply(self, text):
+        text = self._rest + text
+        pos = 0
+        for match in _CONTROL_SEQUENCE.finditer(text):
+            self._put(text[pos:match.start()])
+            params, final = match.groups()
+            if final == 'H':
+                row, _, col = params.partition(';')
+                self._y, self._x = int(row or 1) - 1, int(col or 1) - 1
+            elif final == 'm':
+                self._style = '' if params in ('', '0') else self._style + match.group(0)
+            elif final == 'J':
+                self.buffer.clear()
+            pos = match.end()
+        # 保留被数据块切开的转义序列
+        tail = text.rfind('\x1b', pos)
+        if tail != -1 and len(text) - tail < 16:
+            self._put(text[pos:tail])
+            self._rest = text[tail:]
+        else:
+            self._put(text[pos:])
+            self._rest = ''
+
+    def _put(self, text):
+        if text:
+            self.buffer.put(self._x, self._y, text, self._style)
+            self._x += text_width(text)
+
+    def text(self):
+        """当前屏幕内容（去掉行尾空白）"""
+        rows = [self.buffer.row_text(y).rstrip() for y in range(self.buffer.height)]
+        while rows and not rows[-1]:
+            rows.pop()
+        return '\n'.join(rows)
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+
+def memory_benchmark(count=10000, width=120, height=40):
+    """测量组件、布局放置记录和屏幕单元格的内存占用，返回 {项目: (改动前字节数, 现在字节数)}
+
+    用tracemalloc统计创建count个对象新增的内存并取平均。"改动前"用等价的旧式表示测得：
+    带 __dict__ 的组件对象、字符串键的放置字典、二维的 (字符, 样式) 元组列表。
+    """
+    import tracemalloc
+    from types import SimpleNamespace
+
+    def per_object(factory, n=count):
+        tracemalloc.start()
+        try:
+            base = tracemalloc.get_traced_memory()[0]
+            objects = [factory() for _ in range(n)]
+            used = tracemalloc.get_traced_memory()[0] - base - sys.getsizeof(objects)
+        finally:
+            tracemalloc.stop()
+        del objects
+        return used / n
+
+    def as_dict_object(template):
+        names = [name for cls in type(template).__mro__ for name in getattr(cls, '__slots__', ())]
+        # 只复制每个组件各自拥有的容器，屏幕等共享对象保持引用
+        fresh = lambda value: copy.copy(value) if isinstance(value, (list, dict, set)) else value
+        return lambda: SimpleNamespace(**{name: fresh(getattr(template, name)) for name in names})
+
+    results = {}
+    for name, factory in (("InputBox", lambda: InputBox()), ("ListBox", lambda: ListBox()),
+                          ("GridBox", lambda: GridBox())):
+        results[f"{name} per widget"] = (per_object(as_dict_object(factory())), per_object(factory))
+    results["layout placement"] = (
+        per_object(lambda: {'component': None, 'row': 0, 'column': 0, 'rowspan': 1,
+                            'columnspan': 1, 'padx': 2, 'pady': 1, 'sticky': 'nsew'}),
+        per_object(lambda: Placement(None, 0, 0)))
+    cells = width * height
+    results["screen cell"] = (
+        per_object(lambda: [[(chr(32 + x % 90), '') for x in range(width)] for _ in range(height)], 10) / cells,
+        per_object(lambda: ScreenBuffer(width, height), 10) / cells)
+    return results
+
+def _demo_layout(ui):
+    """示例界面；会话服务器模式下为每个会话调用一次"""
     # 第一行：两个输入框
     ui.add_component(
         InputBox(title="用户名", width=30),
@@ -517,6 +4835,20 @@ if __name__ == "__main__":
     buttons = ButtonGroup(title="操作", buttons=["保存", "删除", "退出"], width=40)
     ui.add_component(buttons, row=6, column=0, columnspan=3, sticky='center')
 
-    # 运行界面
-    ui.main_loop()
-    print("\033[0m")  # 重置终端样式
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--bench-memory"]:
+        # 内存基准：python TeiGUILib-2.0.py --bench-memory
+        for item, (before, after) in memory_benchmark().items():
+            print(f"{item:<22}{before:>9.1f} B -> {after:>7.1f} B")
+    elif sys.argv[1:2] == ["--serve"]:
+        # 会话服务器模式：python TeiGUILib-2.0.py --serve [端口]
+        port = int(sys.argv[2]) if len(sys.argv) > 2 else 8023
+        SessionServer(_demo_layout).serve(port=port)
+    else:
+        # 创建UI管理器
+        ui = UIManager()
+        _demo_layout(ui)
+
+        # 运行界面
+        ui.main_loop()
+        print("\033[0m")  # 重置终端样式
@@ -1,10 +1,25 @@
 import os
 import sys
 import time
-import msvcrt
+import threading
+from functools import lru_cache
+from multiprocessing import resource_tracker, shared_memory
+try:
+    import msvcrt
+except ImportError:  # 非Windows平台：只能使用不需要键盘输入的功能
+    msvcrt = None
 
 WHITE_ON_BLACK = '\033[30;47m'  # 黑字白底
 RESET = '\033[0m'  # 重置颜色
+PIPE_PROGRESS_INTERVAL = 5.0  # 非终端输出时进度行的最小间隔（秒）
+PROGRESS_INTERVAL = 1 / 30  # 终端中进度条的最小刷新间隔（秒），更频繁的更新直接丢弃
+
+def is_terminal():
+    """标准输出是否为交互终端；输出到管道、文件或CI日志时返回False，此时不使用光标移动和回车覆盖"""
+    try:
+        return sys.stdout.isatty()
+    except (AttributeError, ValueError):
+        return False
 
 def input_box_with_prompt(text="请输入内容:", confirm_text="确认", cancel_text="取消"):
     """
@@ -14,6 +29,7 @@ def input_box_with_prompt(text="请输入内容:", confirm_text="确认", cancel
     """
     user_input = ""
     selected_option = 0
+    tty = is_terminal()
 
     # 初始打印界面
     print(text)
@@ -45,6 +61,8 @@ def input_box_with_prompt(text="请输入内容:", confirm_text="确认", cancel
         else:
             user_input += key
 
+        if not tty:
+            continue  # 非终端输出不回写界面，只在结束时由调用方输出结果
         # 仅更新输入行和按钮所在行（避免全屏清理造成闪烁）
         sys.stdout.write("\033[3A")  # 向上移动3行到“输入内容”那一行
         sys.stdout.write("\033[2K")  # 清除当前行
@@ -57,18 +75,185 @@ def input_box_with_prompt(text="请输入内容:", confirm_text="确认", cancel
             sys.stdout.write(f"[{confirm_text}]   {WHITE_ON_BLACK}[{cancel_text}]{RESET}\n")
         sys.stdout.flush()
 
-def show_progress_bar(text, progress, total, bar_length=40):
+def format_progress_bar(text, progress, total, bar_length=40):
     """
-    在控制台显示进度条。
+    生成一行进度条文本（不含回车换行）。
     """
-    percent = float(progress) / total
+    percent = min(float(progress) / total, 1.0) if total else 0.0
     filled_length = int(bar_length * percent)
     bar = '█' * filled_length + '-' * (bar_length - filled_length)
-    sys.stdout.write(f'\r{text}进度: |{bar}| {percent * 100:.1f}% 已完成')
+    return f'{text}进度: |{bar}| {percent * 100:.1f}% 已完成'
+
+_pipe_progress = {}  # 非终端输出时每个进度条上次输出的 (时间, 进度)
+_tty_progress = {}  # 终端中每个进度条上次刷新的时间
+
+def show_progress_bar(text, progress, total, bar_length=40):
+    """
+    在控制台显示进度条，最多每 PROGRESS_INTERVAL 秒刷新一次（完成时总会刷新）。
+    标准输出不是终端时改为输出普通文本行：每隔 PIPE_PROGRESS_INTERVAL 秒或每完成10%输出一行，完成时再输出一行。
+    """
+    if not is_terminal():
+        now = time.monotonic()
+        last_time, last_progress = _pipe_progress.get(text, (None, 0))
+        if progress == total:
+            _pipe_progress.pop(text, None)
+        elif (last_time is not None and now - last_time < PIPE_PROGRESS_INTERVAL
+              and (progress - last_progress) * 10 < total):
+            return
+        else:
+            _pipe_progress[text] = (now, progress)
+        print(format_progress_bar(text, progress, total, bar_length), flush=True)
+        return
+    now = time.monotonic()
+    if progress == total:
+        _tty_progress.pop(text, None)
+    elif now - _tty_progress.get(text, -PROGRESS_INTERVAL) < PROGRESS_INTERVAL:
+        return
+    else:
+        _tty_progress[text] = now
+    sys.stdout.write('\r' + format_progress_bar(text, progress, total, bar_length))
     sys.stdout.flush()
     if progress == total:
         print()
 
+_attach_lock = threading.Lock()
+
+class ProgressCounter:
+    """
+    worker 端的进度计数器：只对共享内存中属于自己的槽位做加法，不做任何终端输出。
+    可以直接作为参数传给 multiprocessing 的进程或进程池。
+    """
+    def __init__(self, name, index):
+        self.name = name
+        self.index = index
+        self._shm = None
+        self._view = None
+
+    def __getstate__(self):
+        return (self.name, self.index)
+
+    def __setstate__(self, state):
+        self.__init__(*state)
+
+    def add(self, n=1):
+        """进度增加 n（每个槽位只有一个写入者，无需加锁）"""
+        if self._view is None:
+            self._attach()
+        self._view[self.index] += n
+
+    def _attach(self):
+        try:
+            self._shm = shared_memory.SharedMemory(name=self.name, track=False)
+        except TypeError:
+            # Python 3.13 以前没有 track 参数，打开已有的共享内存也会登记到 resource_tracker：
+            # 子进程若有自己的 tracker，退出时会把父进程仍在使用的共享内存 unlink 掉；
+            # 若与父进程共用 tracker，子进程事后 unregister 又会把父进程的登记一并删掉。
+            # 所以打开时临时跳过登记，共享内存只由创建它的父进程负责清理
+            with _attach_lock:
+                register = resource_tracker.register
+                resource_tracker.register = lambda name, rtype: None
+                try:
+                    self._shm = shared_memory.SharedMemory(name=self.name)
+                finally:
+                    resource_tracker.register = register
+        self._view = self._shm.buf.cast('q')
+
+    def close(self):
+        if self._shm is not None:
+            self._view.release()
+            self._shm.close()
+            self._shm = self._view = None
+
+class ProgressAggregator:
+    """
+    多进程进度汇总。
+    worker 通过 counter(i) 得到的计数器累加进度，父进程按固定频率绘制总进度条和每个 worker 的进度条。
+    参数:
+      - text: 总进度条的提示文本
+      - total: 总工作量
+      - workers: worker 数量
+      - worker_totals: 每个 worker 的工作量列表，默认按 total 平均分配
+      - refresh: 刷新间隔（秒）
+    用法:
+      with ProgressAggregator("下载中..", total=100, workers=4) as agg:
+          pool.starmap(work, [(agg.counter(i), ...) for i in range(4)])
+    """
+    def __init__(self, text, total, workers, worker_totals=None, refresh=0.1, bar_length=40):
+        self.text = text
+        self.total = total
+        self.workers = workers
+        self.worker_totals = worker_totals or [-(-total // workers)] * workers
+        self.refresh = refresh
+        self.bar_length = bar_length
+        self._shm = shared_memory.SharedMemory(create=True, size=8 * workers)
+        self._view = self._shm.buf.cast('q')
+        for i in range(workers):
+            self._view[i] = 0
+        self._stop = threading.Event()
+        self._thread = None
+        self._drawn = 0
+        self._last_line = 0.0
+
+    def counter(self, index):
+        """第 index 个 worker 使用的计数器"""
+        return ProgressCounter(self._shm.name, index)
+
+    def values(self):
+        """各 worker 当前的进度"""
+        return list(self._view)
+
+    def render(self, final=False):
+        """绘制一次：总进度条 + 每个 worker 一行，原地覆盖上一次的输出
+        标准输出不是终端时只按 PIPE_PROGRESS_INTERVAL 的间隔输出一行汇总文本。
+        """
+        values = self.values()
+        if not is_terminal():
+            now = time.monotonic()
+            if final or now - self._last_line >= PIPE_PROGRESS_INTERVAL:
+                self._last_line = now
+                workers = " ".join(f"{value}/{total}" for value, total in zip(values, self.worker_totals))
+                print(f"{format_progress_bar(self.text, sum(values), self.total, self.bar_length)} [{workers}]",
+                      flush=True)
+            return
+        lines = [format_progress_bar(self.text, sum(values), self.total, self.bar_length)]
+        for i, value in enumerate(values):
+            lines.append(format_progress_bar(f"  worker {i} ", value, self.worker_totals[i], self.bar_length // 2))
+        out = f"\033[{self._drawn}F" if self._drawn else ""
+        out += "".join(f"\033[2K{line}\n" for line in lines)
+        sys.stdout.write(out)
+        sys.stdout.flush()
+        self._drawn = len(lines)
+
+    def start(self):
+        """启动后台刷新线程"""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.refresh):
+            self.render()
+
+    def stop(self):
+        """停止刷新，绘制最终状态并释放共享内存"""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        if self._view is not None:
+            self.render(final=True)
+            self._view.release()
+            self._view = None
+            self._shm.close()
+            self._shm.unlink()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
 def clear_console():
     """ 清屏函数 """
     os.system('cls' if os.name == 'nt' else 'clear')
@@ -84,22 +269,33 @@ def render_options(input_type, array_size=None, options=None, text="选择一个
       - text: 提示文本。
       - visible_rows: 显示的最大行数，默认25。
       - multi_select: 是否启用多选功能，默认为 False。
+
+    按键: 方向键移动，PgUp/PgDn 翻页，Home/End 跳到首/末行，输入数字后按 Enter 跳到该行（输入中的行号显示在列表下方）。
     
     返回:
       - 单选模式下，返回选中的下标（或二维数组中的 (row, col)）。
       - 多选模式下，返回一个列表，列表中为选中的下标或坐标。
     """
     def get_max_width(options):
+        if len(options) == 0:
+            return 0  # 惰性数据源可能还没有索引出任何行
         if isinstance(options[0], list):
             return max(len(item) for row in options for item in row)
-        else:
+        elif isinstance(options, (list, tuple)):
             return max(len(item) for item in options)
+        else:
+            # 文件映射等惰性数据源：只采样首屏，避免解码全部内容
+            return max(len(options[i]) for i in range(min(visible_rows, len(options))))
 
     selected_row = 0
     selected_col = 0
     scroll_offset = 0
+    jump_digits = ""
+    shown_jump = ""  # 列表下方状态行当前显示的待跳转行号
+    tty = is_terminal()
     max_width = get_max_width(options) + 2
     rows, cols = array_size if array_size else (len(options), 1)
+    page_rows = min(visible_rows, rows)
 
     if multi_select:
         selected_items = set()
@@ -107,57 +303,75 @@ def render_options(input_type, array_size=None, options=None, text="选择一个
     print(text)
     print()
 
-    def render_page():
-        for row in range(scroll_offset, min(scroll_offset + visible_rows, rows)):
-            if input_type == 1:
-                if multi_select:
-                    marker = "[√] " if row in selected_items else "[ ] "
-                else:
-                    marker = ""
-                print("  " + marker + options[row].ljust(max_width))
-            elif input_type == 2:
-                line = ""
-                for col in range(cols):
-                    if multi_select:
-                        marker = "[√] " if (row, col) in selected_items else "[ ] "
-                    else:
-                        marker = ""
-                    line += "  " + marker + options[row][col].ljust(max_width)
-                print(line)
-    render_page()
+    @lru_cache(maxsize=1024)
+    def format_row(row, marks, cursor_col):
+        """格式化一行；marks 为该行各列是否选中，cursor_col 为光标所在列（-1 表示不在本行）"""
+        if input_type == 1:
+            marker = ("[√] " if marks[0] else "[ ] ") if multi_select else ""
+            padded_option = options[row].ljust(max_width)
+            if cursor_col == 0:
+                return f"> {marker}{WHITE_ON_BLACK}{padded_option}{RESET}"
+            return f"  {marker}{padded_option}"
+        parts = []
+        for col in range(cols):
+            marker = ("[√] " if marks[col] else "[ ] ") if multi_select else ""
+            padded_option = options[row][col].ljust(max_width)
+            if col == cursor_col:
+                parts.append("  " + marker + WHITE_ON_BLACK + padded_option + RESET)
+            else:
+                parts.append("  " + marker + padded_option)
+        return "".join(parts)
 
-    while True:
-        for _ in range(min(visible_rows, rows)):
-            print("\033[F", end="")  # 上移一行
+    def row_key(row, with_cursor=True):
+        """决定一行显示内容的全部状态"""
+        if not multi_select:
+            marks = (False,) * cols
+        elif input_type == 1:
+            marks = (row in selected_items,)
+        else:
+            marks = tuple((row, col) in selected_items for col in range(cols))
+        cursor_col = (selected_col if input_type == 2 else 0) if with_cursor and row == selected_row else -1
+        return (row, marks, cursor_col)
 
-        if input_type == 1:
-            for idx in range(scroll_offset, min(scroll_offset + visible_rows, len(options))):
-                if multi_select:
-                    marker = "[√] " if idx in selected_items else "[ ] "
-                else:
-                    marker = ""
-                padded_option = options[idx].ljust(max_width)
-                if idx == selected_row:
-                    print(f"> {marker}{WHITE_ON_BLACK}{padded_option}{RESET}")
-                else:
-                    print(f"  {marker}{padded_option}")
-        elif input_type == 2:
-            for row in range(scroll_offset, min(scroll_offset + visible_rows, rows)):
-                line = ""
-                for col in range(cols):
-                    if multi_select:
-                        marker = "[√] " if (row, col) in selected_items else "[ ] "
-                    else:
-                        marker = ""
-                    padded_option = options[row][col].ljust(max_width)
-                    if row == selected_row and col == selected_col:
-                        line += "  " + marker + WHITE_ON_BLACK + padded_option + RESET
-                    else:
-                        line += "  " + marker + padded_option
-                print(line)
+    # 首屏（不带光标），之后每次按键只重写内容发生变化的行
+    shown = [row_key(row, False) for row in range(scroll_offset, scroll_offset + page_rows)]
+    for state in shown:
+        print(format_row(*state))
+
+    while True:
+        if not array_size and len(options) != rows:
+            # 后台建立索引的数据源会逐渐变长：更新行数，首屏未满时在列表下方补印新行
+            rows = len(options)
+            if shown_jump and page_rows < min(visible_rows, rows):
+                sys.stdout.write("\r\033[2K")  # 新行印在状态行的位置，状态行随后重印
+                shown_jump = ""
+            while page_rows < min(visible_rows, rows):
+                shown.append(row_key(scroll_offset + page_rows, False))
+                print(format_row(*shown[-1]))
+                page_rows += 1
+        if tty:
+            out = []
+            for i in range(page_rows):
+                state = row_key(scroll_offset + i)
+                if state != shown[i]:
+                    shown[i] = state
+                    up = page_rows - i  # 光标停在列表下方一行
+                    out.append(f"\033[{up}F\033[2K{format_row(*state)}\033[{up}E")
+            if jump_digits != shown_jump:
+                shown_jump = jump_digits
+                out.append(f"\r\033[2K跳转到第 {jump_digits} 行（Enter确认）" if jump_digits else "\r\033[2K")
+            if out:
+                sys.stdout.write("".join(out))
+                sys.stdout.flush()
 
+        if not getattr(options, 'indexed', True) and not msvcrt.kbhit():
+            time.sleep(0.2)  # 索引仍在建立：没有按键时定期刷新行数
+            continue
         key = msvcrt.getwch()
-        if key == '\r':  # Enter 键
+        if key == '\r' and jump_digits:  # 跳转到输入的行号
+            selected_row = min(int(jump_digits), max(0, rows - 1))
+            jump_digits = ""
+        elif key == '\r':  # Enter 键
             if multi_select:
                 if input_type == 1:
                     return list(selected_items)
@@ -182,18 +396,24 @@ def render_options(input_type, array_size=None, options=None, text="选择一个
                         selected_items.remove(current_coord)
                     else:
                         selected_items.add(current_coord)
+        elif key.isdigit():
+            jump_digits += key
+        elif key == '\x08':
+            jump_digits = jump_digits[:-1]
         elif key in ('\x00', '\xe0'):
             direction = msvcrt.getwch()
             if direction == 'H':  # 上方向键
-                if selected_row > 0:
-                    selected_row -= 1
-                if selected_row < scroll_offset:
-                    scroll_offset -= 1
+                selected_row = max(0, selected_row - 1)
             elif direction == 'P':  # 下方向键
-                if selected_row < rows - 1:
-                    selected_row += 1
-                if selected_row >= scroll_offset + visible_rows:
-                    scroll_offset += 1
+                selected_row = min(max(0, rows - 1), selected_row + 1)
+            elif direction == 'I':  # PgUp
+                selected_row = max(0, selected_row - visible_rows)
+            elif direction == 'Q':  # PgDn
+                selected_row = min(max(0, rows - 1), selected_row + visible_rows)
+            elif direction == 'G':  # Home
+                selected_row = 0
+            elif direction == 'O':  # End
+                selected_row = max(0, rows - 1)
             elif direction == 'K':  # 左方向键（仅对二维数组有效）
                 if input_type == 2:
                     selected_col = (selected_col - 1) % cols
@@ -201,6 +421,12 @@ def render_options(input_type, array_size=None, options=None, text="选择一个
                 if input_type == 2:
                     selected_col = (selected_col + 1) % cols
 
+        # 光标离开可见窗口时一次性调整滚动位置
+        if selected_row < scroll_offset:
+            scroll_offset = selected_row
+        elif selected_row >= scroll_offset + visible_rows:
+            scroll_offset = selected_row - visible_rows + 1
+
 def display_aligned_text(text_list, leftorright='left', padding=2):
     """
     在控制台显示对齐的文本列表。
@@ -222,6 +448,7 @@ def popup_dialog(prompt, button_list):
       - 用户选择的按钮下标
     """
     selected_index = 0
+    tty = is_terminal()
     # 显示提示信息
     print(prompt)
     # 显示按钮（与 input_box 的按钮显示类似）
@@ -244,11 +471,20 @@ def popup_dialog(prompt, button_list):
                 selected_index = (selected_index - 1) % len(button_list)
             elif direction == 'M':  # 右方向键
                 selected_index = (selected_index + 1) % len(button_list)
+        if not tty:
+            continue
         # 更新按钮显示：先将光标上移一行，然后清除并重绘按钮行
         sys.stdout.write("\033[F")
         sys.stdout.write("\033[2K")
         render_buttons()
 
+def _demo_worker(counter, steps):
+    """多进程进度演示用的 worker"""
+    for _ in range(steps):
+        time.sleep(0.01)
+        counter.add(1)
+    counter.close()
+
 def showing():
     menu_options = [
         "二维数组显示",
@@ -259,7 +495,8 @@ def showing():
         "列表多选",
         "二维数组多选",
         "单项列表单选",
-        "弹窗测试"
+        "弹窗测试",
+        "多进程进度显示"
     ]
     a = render_options(input_type=1, options=menu_options, 
                        text="欢迎使用TeiGUI-Lib V1.2 测试版\n你正处于 __main__ 模式(展示模式)\n请选择功能:")
@@ -298,6 +535,11 @@ def showing():
         # 弹窗测试：只显示提示和按钮，没有输入区域
         choice = popup_dialog("这是一个弹窗测试。\n请根据提示选择一个选项。", ["确定", "取消", "稍后再说"])
         print("弹窗返回:", choice)
+    elif a == 9:
+        from multiprocessing import Pool
+        with ProgressAggregator("多进程下载中..", total=400, workers=4) as agg:
+            with Pool(4) as pool:
+                pool.starmap(_demo_worker, [(agg.counter(i), 100) for i in range(4)])
 
 if __name__ == '__main__':
     while True:
@@ -0,0 +1,26 @@
+import importlib.util
+import pathlib
+import sys
+
+import pytest
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+
+
+def load(name, filename):
+    """按文件路径加载模块（文件名含连字符，不能直接import）"""
+    spec = importlib.util.spec_from_file_location(name, ROOT / filename)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture(scope="session")
+def tgl():
+    return load("teiguilib2", "TeiGUILib-2.0.py")
+
+
+@pytest.fixture(scope="session")
+def v12():
+    return load("tieguilib12", "TieGUIlib-v1.2.py")
@@ -0,0 +1,67 @@
+def mouse(b, x, y, final="M"):
+    return f"\x1b[<{b};{x};{y}{final}"
+
+
+def test_coalesce_repeated_navigation_keys(tgl):
+    Key = tgl.Key
+    keys = [Key.DOWN] * 37 + ["a", "a", Key.UP, Key.ENTER, Key.ENTER]
+    assert tgl.coalesce_keys(keys) == [
+        (Key.DOWN, 37), ("a", 1), ("a", 1), (Key.UP, 1), (Key.ENTER, 1), (Key.ENTER, 1)]
+
+
+def test_coalesce_wheel_and_drag_events(tgl):
+    wheel = [mouse(65, 3, 4), mouse(65, 9, 9), mouse(64, 3, 4)]
+    assert tgl.coalesce_keys(wheel) == [(wheel[0], 2), (wheel[2], 1)]
+    drags = [mouse(32, 1, 1), mouse(32, 2, 1), mouse(32, 5, 2), mouse(0, 5, 2, "m")]
+    assert tgl.coalesce_keys(drags) == [(drags[2], 1), (drags[3], 1)]
+
+
+def make_ui(tgl, rendered):
+    class CountingList(tgl.ListBox):
+        def render(self, x, y):
+            rendered.append(self.cursor_pos)
+            super().render(x, y)
+
+    ui = tgl.UIManager()
+    tgl._set_screen(ui, tgl.Screen(tgl.HeadlessSink(), 80, 24))
+    listbox = CountingList(title="hosts", width=30, height=8)
+    listbox.items = [f"host-{i}" for i in range(100)]
+    ui.add_component(listbox, row=0, column=0)
+    ui.initialize()
+    ui.running = True
+    return ui, listbox
+
+
+def test_batch_moves_once_and_renders_one_frame(tgl):
+    rendered = []
+    ui, listbox = make_ui(tgl, rendered)
+    rendered.clear()
+    ui.process_keys([tgl.Key.DOWN] * 37)
+    assert listbox.cursor_pos == 37
+    assert rendered == [37]
+
+
+def test_batch_stops_after_escape(tgl):
+    rendered = []
+    ui, listbox = make_ui(tgl, rendered)
+    ui.dispatch_batch([tgl.Key.DOWN, tgl.Key.ESC, tgl.Key.DOWN, tgl.Key.DOWN])
+    assert not ui.running
+    assert listbox.cursor_pos == 1
+
+
+class ScriptedInput:
+    def __init__(self, keys):
+        self.keys = list(keys)
+
+    def key_ready(self):
+        return bool(self.keys)
+
+    def read_key(self):
+        return self.keys.pop(0)
+
+
+def test_read_batch_drains_up_to_max_batch(tgl):
+    ui = tgl.UIManager()
+    ui.input = ScriptedInput([tgl.Key.DOWN] * (ui.MAX_BATCH + 10))
+    assert len(ui.read_batch()) == ui.MAX_BATCH
+    assert len(ui.read_batch()) == 10
@@ -0,0 +1,87 @@
+from array import array
+
+import pytest
+
+
+def test_ring_buffer_wraps_in_order(tgl):
+    ring = tgl.RingBuffer(5)
+    ring.extend([1, 2, 3])
+    ring.extend(array("d", [4, 5, 6, 7]))
+    assert len(ring) == 5
+    assert ring.values().tolist() == [3, 4, 5, 6, 7]
+    ring.extend([8])
+    assert ring.values().tolist() == [4, 5, 6, 7, 8]
+    ring.extend(range(100, 112))
+    assert ring.values().tolist() == [107, 108, 109, 110, 111]
+    assert tgl.RingBuffer(3).values().tolist() == []
+
+
+def test_downsample_keeps_extremes(tgl):
+    values = array("d", [0, 9, 1, 1, -4, 2, 3, 3])
+    assert tgl.downsample(values, 4) == ([0, 1, -4, 3], [9, 1, 2, 3])
+    assert tgl.downsample(values, 100) == (values.tolist(), values.tolist())
+    assert tgl.downsample(array("d"), 4) == ([], [])
+
+
+def test_sparkline_merges_pushes_in_order(tgl):
+    chart = tgl.Sparkline(title="load", width=12, height=4, capacity=4)
+    chart.push(1.0)
+    chart.push_many(array("d", [2, 3]))
+    chart.push(4.0)
+    chart.push(5.0)
+    assert chart.pending
+    assert chart.poll()
+    assert not chart.poll()
+    assert chart.samples.values().tolist() == [2, 3, 4, 5]
+    title, rows = chart._content()
+    assert title == "load 5"
+    assert len(rows) == 1 and len(rows[0]) == 10
+    assert rows[0].endswith("█") and rows[0].startswith(" " * 6)
+
+
+@pytest.mark.parametrize("glyphs", ["block", "braille"])
+def test_sparkline_renders_only_changed_rows(tgl, glyphs):
+    chart = tgl.Sparkline(title="load", width=22, height=8, glyphs=glyphs, lo=0, hi=100)
+    chart.screen = tgl.Screen(tgl.HeadlessSink(), 40, 10)
+    chart.push_many([10.0] * 50)
+    chart.poll()
+    chart.render(0, 0)
+    chart.screen.flush()
+    full = chart.screen.last_frame_bytes
+    chart.render(0, 0)
+    chart.screen.flush()
+    assert chart.screen.last_frame_bytes == 0
+    chart.push(10.0)  # 画面不变时不输出
+    chart.poll()
+    chart.render(0, 0)
+    chart.screen.flush()
+    assert chart.screen.last_frame_bytes == 0
+    chart.push(90.0)  # 标题和最右一列所在的行变化
+    chart.poll()
+    chart.render(0, 0)
+    chart.screen.flush()
+    assert 0 < chart.screen.last_frame_bytes < full
+    assert chart.screen.snapshot().text[0] == "load 90"
+
+
+def test_histogram_clamps_out_of_range_samples(tgl):
+    hist = tgl.Histogram(title="lat", lo=0.0, hi=1.0, bins=4, width=10, height=4)
+    hist.push_many([-1.0, 0.1, 0.3, 0.6, 0.99, 5.0])
+    hist.push(0.5)
+    hist.poll()
+    assert hist.counts.tolist() == [2, 1, 2, 2]
+    assert hist._content()[0] == "lat n=7"
+    hist.reset()
+    assert hist.total == 0 and not any(hist.counts)
+
+
+def test_bar_chart_scales_to_largest_value(tgl):
+    bars = tgl.BarChart(title="bars", width=22, height=5)
+    bars.push("cpu", 50)
+    bars.push("mem", 100)
+    bars.push("cpu", 25)
+    bars.poll()
+    _, rows = bars._content()
+    assert rows[0] == "cpu ███▎          25"
+    assert rows[1] == "mem ████████████ 100"
+    assert len(rows) == 2  # 高5的组件内部只有2行
@@ -0,0 +1,57 @@
+import pytest
+
+
+@pytest.fixture
+def grid_ui(tgl):
+    """3x3 的输入框网格，第4个组件（中间）绑定 F2"""
+    ui = tgl.UIManager()
+    tgl._set_screen(ui, tgl.Screen(tgl.HeadlessSink(), 120, 40))
+    for i in range(9):
+        hotkey = tgl.Key.F2 if i == 4 else None
+        ui.add_component(tgl.InputBox(title=str(i), width=20), row=i // 3, column=i % 3, hotkey=hotkey)
+    ui.initialize()
+    return ui
+
+
+def focused(ui):
+    return [i for i, comp in enumerate(ui.components) if comp.has_focus]
+
+
+def test_tab_cycles_in_order(tgl, grid_ui):
+    grid_ui.dispatch_key(tgl.Key.TAB)
+    assert grid_ui.focus_index == 1
+    grid_ui.dispatch_key(tgl.Key.SHIFT_TAB, 2)
+    assert grid_ui.focus_index == 8
+    assert focused(grid_ui) == [8]
+
+
+def test_alt_arrows_move_to_spatial_neighbour(tgl, grid_ui):
+    Key = tgl.Key
+    expected = {Key.ALT_UP: 1, Key.ALT_DOWN: 7, Key.ALT_LEFT: 3, Key.ALT_RIGHT: 5}
+    for key, target in expected.items():
+        grid_ui.set_focus(4)
+        old, new = grid_ui.dispatch_key(key)
+        assert old is grid_ui.components[4]
+        assert new is grid_ui.components[target]
+        assert focused(grid_ui) == [target]
+
+
+def test_alt_arrow_at_edge_keeps_focus(tgl, grid_ui):
+    assert grid_ui.dispatch_key(tgl.Key.ALT_UP) == ()
+    assert grid_ui.dispatch_key(tgl.Key.ALT_LEFT) == ()
+    assert grid_ui.focus_index == 0
+
+
+def test_navigator_prefers_aligned_component(tgl, grid_ui):
+    nav = tgl.FocusNavigator(grid_ui.layout, grid_ui.components)
+    # 从左上角向右：同一行的组件比斜下方更近
+    assert nav.neighbour(0, (1, 0)) == 1
+    assert nav.neighbour(2, (0, 1)) == 5
+    assert nav.neighbour(8, (-1, 0)) == 7
+
+
+def test_hotkey_jumps_to_component(tgl, grid_ui):
+    old, new = grid_ui.dispatch_key(tgl.Key.F2)
+    assert new is grid_ui.components[4]
+    assert grid_ui.dispatch_key(tgl.Key.F2) == ()
+    assert focused(grid_ui) == [4]
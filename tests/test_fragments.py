@@ -0,0 +1,68 @@
+import io
+
+
+def output_screen(tgl, encoding="utf-8", width=40, height=6):
+    stream = io.TextIOWrapper(io.BytesIO(), encoding=encoding)
+    return tgl.Screen(stream, width, height, line_mode=False, encoding=encoding)
+
+
+def written(screen):
+    screen.flush()
+    return screen.stream.buffer.getvalue()
+
+
+def test_fragment_is_cached_and_preencoded(tgl):
+    frag = tgl.fragment("标题", tgl.Color.BLUE_TEXT)
+    assert tgl.fragment("标题", tgl.Color.BLUE_TEXT) is frag
+    assert frag.data == f"{tgl.Color.BLUE_TEXT}标题{tgl.Color.RESET}".encode("utf-8")
+    assert len(frag.cells) // 4 == tgl.text_width("标题") == 4
+    assert tgl.fragment("OK").data == b"OK"
+
+
+def test_frame_fragments_per_border_style(tgl):
+    for name, border in tgl.BORDER_STYLES.items():
+        top, blank, bottom = tgl.frame_fragments(12, "", name)
+        assert top.text == border.top_left + border.horizontal * 10 + border.top_right
+        assert blank.text == border.vertical + " " * 10 + border.vertical
+        assert bottom.text == border.bottom_left + border.horizontal * 10 + border.bottom_right
+        assert {len(f.cells) // 4 for f in (top, blank, bottom)} == {12}
+    assert tgl.frame_fragments(12, "", "double") is tgl.frame_fragments(12, "", "double")
+
+
+def test_write_fragment_matches_write_at(tgl):
+    frag = tgl.fragment("[确定]", tgl.Color.WHITE_BG)
+    a, b = output_screen(tgl), output_screen(tgl)
+    a.write_fragment(3, 2, frag)
+    b.write_at(3, 2, frag.text, frag.style)
+    assert written(a) == written(b)
+    assert tgl.diff_snapshots(a.snapshot(), b.snapshot()) == []
+
+
+def test_non_utf8_output_encodes_fragments(tgl):
+    screen = output_screen(tgl, encoding="gbk")
+    screen.write_fragment(0, 0, tgl.fragment("主机┌─┐"))
+    # GBK 能表示中文，但缺少 GLYPH_SAMPLE 中的块字符，框线整体改用ASCII
+    assert "主机+-+".encode("gbk") in written(screen)
+    assert screen.snapshot().text[0] == "主机+-+"
+
+
+def test_ascii_fallback_for_border_glyphs(tgl):
+    screen = output_screen(tgl, encoding="ascii")
+    assert screen.ascii
+    box = tgl.InputBox(title="name", width=10)
+    box.screen = screen
+    box.border = "rounded"
+    box.render(0, 0)
+    data = written(screen)
+    data.decode("ascii")
+    assert b"+--------+" in data
+    assert screen.snapshot().text[1] == "+--------+"
+
+
+def test_component_border_style(tgl):
+    screen = output_screen(tgl)
+    box = tgl.InputBox(title="name", width=10)
+    box.screen = screen
+    box.border = "double"
+    box.render(0, 0)
+    assert screen.snapshot().text[1:4] == ("╔════════╗", "║        ║", "╚════════╝")
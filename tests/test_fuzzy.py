@@ -0,0 +1,79 @@
+import time
+
+import pytest
+
+
+def settle(fuzzy):
+    deadline = time.monotonic() + 5
+    while not fuzzy.complete:
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+    return fuzzy.results()
+
+
+@pytest.fixture
+def make_filter(tgl):
+    filters = []
+
+    def make(items, **options):
+        fuzzy = tgl.FuzzyFilter(items, **options)
+        filters.append(fuzzy)
+        return fuzzy
+    yield make
+    for fuzzy in filters:
+        fuzzy.close()
+
+
+def test_score_prefers_boundaries_and_runs(tgl):
+    assert tgl.fuzzy_score("fb", "foo_bar") > tgl.fuzzy_score("fb", "xfoxbar")
+    assert tgl.fuzzy_score("bar", "xbarx") > tgl.fuzzy_score("bar", "xbxaxr")
+    assert tgl.fuzzy_score("fb", "FooBar") > tgl.fuzzy_score("fb", "foobar")
+    assert tgl.fuzzy_score("xyz", "foobar") is None
+
+
+def test_results_ranked_by_score(make_filter):
+    items = ["xadxxxx", "zzz", "a_b_c_d_e_f", "abc_def"]
+    fuzzy = make_filter(items)
+    fuzzy.submit("AD")
+    assert settle(fuzzy) == [3, 2, 0]
+
+
+def test_limit_keeps_best(make_filter):
+    fuzzy = make_filter(["x" * (12 - i) + "it" for i in range(13)], limit=3)
+    fuzzy.submit("it")
+    results = settle(fuzzy)
+    assert len(results) == 3 and results[0] == 12
+
+
+def test_new_query_cancels_previous(make_filter):
+    items = [f"row {i} alpha" for i in range(50000)] + ["beta"]
+    fuzzy = make_filter(items)
+    fuzzy.submit("alpha")
+    fuzzy.submit("beta")
+    assert settle(fuzzy) == [50000]
+
+
+def test_length_changing_lowercase_does_not_hang(tgl, make_filter):
+    assert "İ".lower() != "i" and len("İ".lower()) == 2
+    fuzzy = make_filter(["İİİab", "xab"])
+    fuzzy.submit("ab")
+    assert sorted(settle(fuzzy)) == [0, 1]
+    assert fuzzy.error is None
+    assert tgl.fuzzy_score(tgl.fold_case("İ"), "xİ") is not None
+
+
+def test_non_str_items(make_filter):
+    fuzzy = make_filter([12, None, "a12", 3.125])
+    fuzzy.submit("12")
+    assert sorted(settle(fuzzy)) == [0, 2, 3]
+
+
+def test_scoring_error_still_completes(make_filter):
+    class Broken:
+        def __str__(self):
+            raise ValueError("boom")
+
+    fuzzy = make_filter(["ab", Broken()])
+    fuzzy.submit("ab")
+    settle(fuzzy)
+    assert isinstance(fuzzy.error, ValueError)
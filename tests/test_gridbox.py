@@ -0,0 +1,113 @@
+import random
+
+import pytest
+
+
+def test_interval_set_merges_adjacent_and_overlapping(tgl):
+    intervals = tgl.IntervalSet()
+    intervals.add(0, 3)
+    intervals.add(5, 8)
+    intervals.add(3, 5)
+    assert list(intervals) == [(0, 8)]
+    intervals.add(10, 12)
+    intervals.add(7, 11)
+    assert list(intervals) == [(0, 12)]
+    assert len(intervals) == 12
+
+
+def test_interval_set_remove_splits(tgl):
+    intervals = tgl.IntervalSet()
+    intervals.add(0, 10)
+    intervals.remove(3, 5)
+    assert list(intervals) == [(0, 3), (5, 10)]
+    assert 2 in intervals and 3 not in intervals and 5 in intervals
+    intervals.remove(4, 4)
+    intervals.remove(-5, 20)
+    assert not intervals
+
+
+def test_interval_set_matches_set_model(tgl):
+    rng = random.Random(49)
+    intervals = tgl.IntervalSet()
+    model = set()
+    for _ in range(500):
+        start = rng.randrange(40)
+        end = start + rng.randrange(6)
+        if rng.random() < 0.6:
+            intervals.add(start, end)
+            model.update(range(start, end))
+        else:
+            intervals.remove(start, end)
+            model.difference_update(range(start, end))
+        assert len(intervals) == len(model)
+    assert {v for v in range(-1, 50) if v in intervals} == model
+    bounds = [v for interval in intervals for v in interval]
+    assert bounds == sorted(bounds) and len(set(bounds)) == len(bounds)
+
+
+def test_cell_selection_rects_and_toggle(tgl):
+    selection = tgl.CellSelection([(0, 0)])
+    selection.add_rect(1, 1, 2, 3)
+    assert len(selection) == 7
+    assert list(selection.rects()) == [(0, 0, 0, 0), (1, 1, 1, 3), (2, 1, 2, 3)]
+    selection.toggle(1, 2)
+    assert (1, 2) not in selection
+    assert list(selection.rects())[1:3] == [(1, 1, 1, 1), (1, 3, 1, 3)]
+    selection.remove_rect(0, 0, 2, 3)
+    assert selection.rows == {}
+
+
+def test_shift_move_selects_rectangle(tgl):
+    grid = tgl.GridBox(rows=5, cols=5, multi_select=True)
+    grid.handle_keys(tgl.Key.SHIFT_DOWN, 2)
+    grid.handle_keys(tgl.Key.SHIFT_RIGHT, 1)
+    assert grid.selected_cells == {(r, c) for r in range(3) for c in range(2)}
+    grid.handle_input(tgl.Key.DOWN)
+    assert len(grid.selection) == 6
+
+
+def test_move_scrolls_without_render(tgl):
+    grid = tgl.GridBox(width=30, height=6, rows=50, cols=3)
+    grid.move_to(20, 0)
+    assert grid.scroll_row == 20 - grid._visible_rows() + 1
+    scroll = (grid.scroll_row, grid.scroll_col)
+    grid.render(0, 0)
+    assert (grid.scroll_row, grid.scroll_col) == scroll
+
+
+def assert_matches_full_repaint(tgl, grid, screen):
+    fresh = tgl.Screen(tgl.HeadlessSink(), screen.buffer.width, screen.buffer.height, line_mode=True)
+    grid.screen, grid.prev_state = fresh, None
+    grid.render(0, 0)
+    grid.screen = screen
+    assert screen.buffer.chars == fresh.buffer.chars
+    styles = [screen.buffer.style_of(sid) for sid in screen.buffer.styles]
+    assert styles == [fresh.buffer.style_of(sid) for sid in fresh.buffer.styles]
+
+
+@pytest.mark.parametrize("keys", [
+    ["SHIFT_LEFT"],
+    ["SHIFT_UP", "SHIFT_LEFT"],
+    ["CTRL_RIGHT", "SHIFT_RIGHT"],
+    ["CTRL_DOWN", "CTRL_RIGHT", "CTRL_SHIFT_DOWN", "SHIFT_LEFT"],
+    ["SHIFT_DOWN", "SHIFT_RIGHT", "LEFT", "SHIFT_LEFT"],
+])
+def test_incremental_repaint_at_edges(tgl, keys):
+    screen = tgl.Screen(tgl.HeadlessSink(), 40, 12, line_mode=True)
+    grid = tgl.GridBox(width=38, height=10, rows=4, cols=3, multi_select=True)
+    grid.screen = screen
+    grid.has_focus = True
+    grid.render(0, 0)
+    for name in keys:
+        grid.handle_input(getattr(tgl.Key, name))
+        grid.render(0, 0)
+        assert_matches_full_repaint(tgl, grid, screen)
+
+
+def test_selected_cells_is_read_only_snapshot(tgl):
+    grid = tgl.GridBox(rows=3, cols=3, multi_select=True)
+    grid.selected_cells = {(1, 1)}
+    cells = grid.selected_cells
+    with pytest.raises(AttributeError):
+        cells.add((0, 0))
+    assert grid.selected_cells == {(1, 1)}
@@ -0,0 +1,14 @@
+def test_distribute_rounds_fractional_weights(tgl):
+    sizes = tgl._distribute(10, [0, 0, 0], [tgl.INFINITE] * 3, [0.5, 1, 1.5])
+    assert sizes == [2, 3, 5]
+    assert all(type(size) is int for size in sizes)
+
+
+def test_place_updates_derived_fields(tgl):
+    grid = tgl.GridBox(width=30, height=10, rows=3, cols=3)
+    box = tgl.InputBox(width=20)
+    root = tgl.VBox(tgl.Item(grid, weight=1), tgl.Item(box, weight=1, max_height=4))
+    root.arrange(0, 0, 62, 20, {})
+    assert grid.width == 62
+    assert grid.cell_width == 20
+    assert box.max_length == box.width - 2 == 60
@@ -0,0 +1,41 @@
+import pytest
+
+
+@pytest.fixture
+def closing_list(tgl, monkeypatch):
+    closed = []
+
+    class ClosingList(tgl.ListBox):
+        def close(self):
+            closed.append(self.title)
+            super().close()
+
+    monkeypatch.setitem(tgl.WIDGET_TYPES, "ClosingList", ClosingList)
+    return closed
+
+
+def spec(*widgets):
+    return {"widgets": list(widgets)}
+
+
+def test_widgets_do_not_share_arguments(tgl):
+    layout = spec({"id": "ok", "type": "ButtonGroup", "buttons": ["Yes", "No"], "row": 0, "column": 0})
+    first = tgl.UIManager().load_layout(layout)["ok"]
+    second = tgl.UIManager().load_layout(layout)["ok"]
+    first.buttons.append("Maybe")
+    assert second.buttons == ["Yes", "No"]
+    assert tgl.compile_layout(layout).widgets[0].args["buttons"] == ["Yes", "No"]
+
+
+def test_reload_keeps_unchanged_and_closes_dropped(tgl, closing_list):
+    ui = tgl.UIManager()
+    user = {"id": "user", "type": "InputBox", "title": "user", "row": 0, "column": 0}
+    hosts = {"id": "hosts", "type": "ClosingList", "title": "hosts", "row": 1, "column": 0}
+    old = ui.load_layout(spec(user, hosts))
+    new = ui.load_layout(spec(user, dict(hosts, title="servers")))
+    assert new["user"] is old["user"]
+    assert new["hosts"] is not old["hosts"]
+    assert closing_list == ["hosts"]
+    ui.load_layout(spec(user))
+    assert closing_list == ["hosts", "servers"]
+    assert ui.components == [old["user"]]
@@ -0,0 +1,115 @@
+import io
+import sys
+
+
+class ScriptedInput:
+    def __init__(self, keys):
+        self.keys = list(keys)
+
+    def key_ready(self):
+        return bool(self.keys)
+
+    def read_key(self):
+        return self.keys.pop(0)
+
+    def wait_key(self, timeout):
+        return bool(self.keys)
+
+
+def test_screen_defaults_to_line_mode_when_stdout_is_piped(tgl, monkeypatch):
+    monkeypatch.setattr(sys, "stdout", io.StringIO())
+    assert tgl.Screen(None, 20, 5).line_mode
+    assert not tgl.Screen(io.StringIO(), 20, 5).line_mode
+
+
+def test_line_mode_writes_nothing_but_keeps_cells(tgl, monkeypatch):
+    out = io.StringIO()
+    monkeypatch.setattr(sys, "stdout", out)
+    screen = tgl.Screen(None, 20, 5)
+    screen.write_at(2, 1, "状态: ok")
+    screen.write_fragment(0, 3, tgl.fragment("┌──┐"))
+    screen.flush()
+    assert out.getvalue() == ""
+    assert screen.last_frame_bytes == 0
+    assert screen.plain_text() == "\n  状态: ok\n\n┌──┐"
+
+
+def test_main_loop_prints_final_screen_once(tgl, monkeypatch):
+    out = io.StringIO()
+    monkeypatch.setattr(sys, "stdout", out)
+    ui = tgl.UIManager()
+    tgl._set_screen(ui, tgl.Screen(None, 40, 12))
+    listbox = tgl.ListBox(title="hosts", width=30, height=8)
+    listbox.items = [f"host-{i}" for i in range(20)]
+    ui.add_component(listbox, row=0, column=0)
+    ui.input = ScriptedInput([tgl.Key.DOWN, tgl.Key.DOWN, tgl.Key.ESC])
+    ui.main_loop()
+    text = out.getvalue()
+    assert "\033[" not in text
+    assert text.count("hosts") == 1
+    assert text == ui.screen.plain_text() + "\n"
+    assert listbox.cursor_pos == 2
+    # 最终画面包含退出前最后一批按键的结果
+    fresh = tgl.Screen(io.StringIO(), 40, 12, line_mode=True)
+    tgl._set_screen(ui, fresh)
+    ui.initialize()
+    assert text == fresh.plain_text() + "\n"
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_piped_progress_prints_every_tenth(v12, monkeypatch, capsys):
+    clock = Clock()
+    monkeypatch.setattr(v12, "is_terminal", lambda: False)
+    monkeypatch.setattr(v12.time, "monotonic", clock)
+    for i in range(1, 1001):
+        v12.show_progress_bar("pipe-a", i, 1000)
+    lines = capsys.readouterr().out.splitlines()
+    assert "\r" not in "".join(lines)
+    assert len(lines) == 11
+    assert lines[-1].endswith("100.0% 已完成")
+
+
+def test_piped_progress_prints_after_interval(v12, monkeypatch, capsys):
+    clock = Clock()
+    monkeypatch.setattr(v12, "is_terminal", lambda: False)
+    monkeypatch.setattr(v12.time, "monotonic", clock)
+    v12.show_progress_bar("pipe-b", 1, 1000)
+    v12.show_progress_bar("pipe-b", 2, 1000)
+    clock.now += v12.PIPE_PROGRESS_INTERVAL
+    v12.show_progress_bar("pipe-b", 3, 1000)
+    assert len(capsys.readouterr().out.splitlines()) == 2
+
+
+def test_terminal_progress_drops_fast_updates(v12, monkeypatch, capsys):
+    clock = Clock()
+    monkeypatch.setattr(v12, "is_terminal", lambda: True)
+    monkeypatch.setattr(v12.time, "monotonic", clock)
+    for i in range(1, 101):
+        v12.show_progress_bar("tty", i, 100)
+    out = capsys.readouterr().out
+    assert out.count("\r") == 2
+    assert out.endswith("100.0% 已完成\n")
+
+
+def test_piped_aggregator_prints_summary_lines(v12, monkeypatch, capsys):
+    clock = Clock()
+    monkeypatch.setattr(v12, "is_terminal", lambda: False)
+    monkeypatch.setattr(v12.time, "monotonic", clock)
+    agg = v12.ProgressAggregator("汇总", total=10, workers=2, refresh=60)
+    agg.render()
+    agg.render()
+    counter = agg.counter(1)
+    counter.add(5)
+    counter.close()
+    agg.stop()
+    lines = capsys.readouterr().out.splitlines()
+    assert len(lines) == 2
+    assert "\033[" not in "".join(lines)
+    assert lines[-1].endswith("[0/5 5/5]")
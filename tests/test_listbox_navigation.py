@@ -0,0 +1,63 @@
+import pytest
+
+
+@pytest.fixture
+def listbox(tgl):
+    listbox = tgl.ListBox(title="hosts", width=30, height=8)  # 每页5行
+    listbox.items = [f"host-{i}" for i in range(23)]
+    return listbox
+
+
+def press(listbox, *keys):
+    for key in keys:
+        result = listbox.handle_input(key)
+    return result
+
+
+def test_page_keys_move_by_page_and_clamp(tgl, listbox):
+    Key = tgl.Key
+    press(listbox, Key.PAGE_DOWN)
+    assert (listbox.cursor_pos, listbox.scroll_offset) == (5, 1)
+    press(listbox, Key.PAGE_DOWN, Key.PAGE_DOWN, Key.PAGE_DOWN, Key.PAGE_DOWN, Key.PAGE_DOWN)
+    assert (listbox.cursor_pos, listbox.scroll_offset) == (22, 18)
+    press(listbox, Key.PAGE_UP)
+    assert (listbox.cursor_pos, listbox.scroll_offset) == (17, 17)
+    listbox.handle_keys(Key.PAGE_UP, 10)
+    assert (listbox.cursor_pos, listbox.scroll_offset) == (0, 0)
+
+
+def test_home_and_end(tgl, listbox):
+    press(listbox, tgl.Key.END)
+    assert (listbox.cursor_pos, listbox.scroll_offset) == (22, 18)
+    press(listbox, tgl.Key.HOME)
+    assert (listbox.cursor_pos, listbox.scroll_offset) == (0, 0)
+
+
+def test_numeric_jump_with_backspace(tgl, listbox):
+    assert press(listbox, "1", "7", "9", "\x08") is None
+    assert listbox.jump_buffer == "17"
+    assert press(listbox, "\r") is None
+    assert listbox.cursor_pos == 17 and listbox.jump_buffer == ""
+    assert press(listbox, "\r") == 17
+    press(listbox, "9", "9", "\r")
+    assert listbox.cursor_pos == 22
+
+
+def test_jump_buffer_is_shown_in_title(tgl, listbox):
+    listbox.screen = tgl.Screen(tgl.HeadlessSink(), 40, 10)
+    listbox.has_focus = True
+    press(listbox, "1", "2")
+    listbox.render(0, 0)
+    assert listbox.screen.snapshot().text[0] == "hosts :12"
+    press(listbox, "\r")
+    listbox.render(0, 0)
+    text = listbox.screen.snapshot().text
+    assert text[0] == "hosts"
+    assert "▶ host-12" in "\n".join(text)
+
+
+def test_wheel_scrolls_window_and_drags_cursor_along(tgl, listbox):
+    event = tgl.MouseEvent("wheel_down", 0, 0, 0, 0)
+    listbox.handle_mouse(event, 0, 0, count=2)
+    assert listbox.scroll_offset == 2 * tgl.WHEEL_LINES
+    assert listbox.cursor_pos == listbox.scroll_offset
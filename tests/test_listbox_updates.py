@@ -0,0 +1,110 @@
+import time
+
+
+def make_list(tgl, items, **kwargs):
+    listbox = tgl.ListBox(title="hosts", width=30, height=8, **kwargs)
+    listbox.screen = tgl.Screen(tgl.HeadlessSink(), 40, 10)
+    listbox.items = list(items)
+    return listbox
+
+
+def settle(listbox, timeout=5):
+    """轮询直到后台过滤完成"""
+    deadline = time.monotonic() + timeout
+    while listbox.pending and time.monotonic() < deadline:
+        listbox.poll()
+        time.sleep(0.001)
+    listbox.poll()
+
+
+def current(listbox):
+    return listbox.items[listbox._item_index(listbox.cursor_pos)]
+
+
+def test_insert_sorted_keeps_cursor_and_selection(tgl):
+    listbox = make_list(tgl, ["b", "d", "f", "h"], multi_select=True)
+    listbox.jump_to(2)
+    listbox.selected_indices = {1, 3}
+    listbox.insert_sorted(["g", "a", "e", "c"])
+    assert listbox.items == ["a", "b", "c", "d", "e", "f", "g", "h"]
+    assert current(listbox) == "f"
+    assert {listbox.items[i] for i in listbox.selected_indices} == {"d", "h"}
+
+
+def test_insert_sorted_places_equal_keys_after_existing(tgl):
+    listbox = make_list(tgl, [(1, "old"), (2, "old")], key=lambda item: item[0])
+    listbox.insert_sorted([(1, "new")])
+    assert listbox.items == [(1, "old"), (1, "new"), (2, "old")]
+    assert listbox.index_of(2) == 2
+
+
+def test_remove_where_moves_cursor_to_next_item(tgl):
+    listbox = make_list(tgl, range(10), multi_select=True)
+    listbox.jump_to(4)
+    listbox.selected_indices = {3, 6, 9}
+    assert listbox.remove_where(lambda n: n % 3 == 0) == 4
+    assert listbox.items == [1, 2, 4, 5, 7, 8]
+    assert current(listbox) == 4
+    assert listbox.selected_indices == set()
+    listbox.jump_to(5)
+    listbox.remove_where(lambda n: n == 8)
+    assert current(listbox) == 7
+    assert listbox.remove_where(lambda n: n > 100) == 0
+
+
+def test_replace_range_follows_items_by_key(tgl):
+    rows = [{"id": i, "state": "up"} for i in range(6)]
+    listbox = make_list(tgl, rows, multi_select=True, key=lambda row: row["id"])
+    listbox.jump_to(3)
+    listbox.selected_indices = {2, 5}
+    # 区间内的项重新排序并删掉 id=4
+    listbox.replace_range(2, 5, [{"id": 3, "state": "down"}, {"id": 2, "state": "down"}])
+    assert [row["id"] for row in listbox.items] == [0, 1, 3, 2, 5]
+    assert current(listbox)["id"] == 3
+    assert current(listbox)["state"] == "down"
+    assert {listbox.items[i]["id"] for i in listbox.selected_indices} == {2, 5}
+    assert listbox.index_of(5) == 4
+
+
+def test_replace_range_moves_cursor_from_dropped_item(tgl):
+    listbox = make_list(tgl, "abcdef")
+    listbox.jump_to(3)
+    listbox.replace_range(2, 5, ["x"])
+    assert listbox.items == ["a", "b", "x", "f"]
+    assert listbox.cursor_pos == 2
+
+
+def test_extend_keeps_cursor_row_and_skips_unchanged_rows(tgl):
+    listbox = make_list(tgl, [f"host-{i}" for i in range(20)])
+    listbox.jump_to(12)
+    listbox.render(0, 0)
+    screen = listbox.screen
+    screen.flush()
+    full = screen.last_frame_bytes
+    listbox.extend(f"host-{i}" for i in range(20, 40))
+    listbox.render(0, 0)
+    screen.flush()
+    assert current(listbox) == "host-12"
+    assert screen.last_frame_bytes < full // 4
+    assert listbox.index_of("host-39") == 39
+
+
+def test_insert_above_window_keeps_cursor_on_same_screen_row(tgl):
+    listbox = make_list(tgl, [f"host-{i:02}" for i in range(0, 40, 2)])
+    listbox.jump_to(10)
+    row = listbox.cursor_pos - listbox.scroll_offset
+    listbox.insert_sorted(f"host-{i:02}" for i in range(1, 10, 2))
+    assert current(listbox) == "host-20"
+    assert listbox.cursor_pos - listbox.scroll_offset == row
+
+
+def test_update_while_filtered_refilters_and_keeps_cursor(tgl):
+    listbox = make_list(tgl, ["alpha", "beta", "gamma", "delta"], filterable=True)
+    listbox._set_query("a")
+    settle(listbox)
+    listbox.jump_to(listbox._view.index(2))
+    listbox.extend(["omega", "kappa"])
+    settle(listbox)
+    assert current(listbox) == "gamma"
+    assert "kappa" in [listbox.items[i] for i in listbox._view]
+    listbox.close()
@@ -0,0 +1,54 @@
+import pytest
+
+
+def component_classes(tgl):
+    return [cls for cls in vars(tgl).values()
+            if isinstance(cls, type) and issubclass(cls, tgl.UIComponent)]
+
+
+def test_component_classes_declare_slots(tgl):
+    for cls in component_classes(tgl):
+        assert "__slots__" in vars(cls), cls.__name__
+
+
+@pytest.mark.parametrize("factory", ["InputBox", "ListBox", "GridBox", "ButtonGroup", "Table"])
+def test_components_have_no_instance_dict(tgl, factory):
+    comp = getattr(tgl, factory)()
+    assert not hasattr(comp, "__dict__")
+
+
+def test_placements_are_records(tgl):
+    layout = tgl.LayoutManager()
+    box = tgl.InputBox()
+    layout.add_component(box, row=1, column=2, sticky="W")
+    placement = layout.components[0]
+    assert isinstance(placement, tgl.Placement)
+    assert placement == tgl.Placement(box, 1, 2, sticky="w")
+
+
+def test_screen_buffer_cells(tgl):
+    buffer = tgl.ScreenBuffer(8, 3)
+    buffer.put(1, 0, "ab", "S")
+    buffer.put(6, 1, "中文")  # 第二个全角字符超出右边界被裁剪
+    buffer.put(0, 5, "off screen")
+    assert buffer.row_text(0) == " ab     "
+    assert buffer.row_text(1) == "      中"
+    assert [buffer.style_of(sid) for sid in buffer.styles[:4]] == ["", "S", "S", ""]
+    assert buffer.style_id("S") == buffer.style_id("S") != buffer.style_id("")
+
+
+def test_screen_buffer_scroll(tgl):
+    buffer = tgl.ScreenBuffer(3, 3)
+    for y, text in enumerate("abc"):
+        buffer.put(0, y, text * 3)
+    buffer.scroll(0, 2, 1)
+    assert [buffer.row_text(y) for y in range(3)] == ["bbb", "ccc", "   "]
+    buffer.scroll(0, 2, -2)
+    assert [buffer.row_text(y) for y in range(3)] == ["   ", "   ", "bbb"]
+
+
+def test_memory_benchmark_reports_savings(tgl):
+    results = tgl.memory_benchmark(count=200, width=40, height=10)
+    assert set(results) >= {"InputBox per widget", "layout placement", "screen cell"}
+    for name, (before, after) in results.items():
+        assert 0 < after < before, name
@@ -0,0 +1,77 @@
+import os
+
+
+def open_source(tgl, path):
+    return tgl.MmapLineSource(str(path), background=False)
+
+
+def write(path, data, mtime):
+    path.write_bytes(data)
+    os.utime(path, ns=(mtime, mtime))
+
+
+def test_lines_and_indexing(tgl, tmp_path):
+    path = tmp_path / "log.txt"
+    write(path, b"alpha\r\nbeta\n\ngamma", 1)
+    with open_source(tgl, path) as source:
+        assert source.indexed
+        assert list(source) == ["alpha", "beta", "", "gamma"]
+        assert source[-1] == "gamma" and source[1:3] == ["beta", ""]
+
+
+def test_reopen_uses_sidecar(tgl, tmp_path, monkeypatch):
+    path = tmp_path / "log.txt"
+    write(path, b"".join(b"line %d\n" % i for i in range(100)), 1)
+    open_source(tgl, path).close()
+    assert os.path.exists(str(path) + ".lineidx")
+    def rebuild(self):
+        raise AssertionError("index rebuilt instead of loaded from sidecar")
+
+    monkeypatch.setattr(tgl.MmapLineSource, "_build_index", rebuild)
+    with open_source(tgl, path) as source:
+        assert len(source) == 100 and source[99] == "line 99"
+
+
+def test_append_continues_from_sidecar(tgl, tmp_path):
+    path = tmp_path / "log.txt"
+    write(path, b"a\nb\n", 1)
+    open_source(tgl, path).close()
+    write(path, b"a\nb\nc\nd", 2)
+    with open_source(tgl, path) as source:
+        assert list(source) == ["a", "b", "c", "d"]
+
+
+def test_rewrite_and_grow_rebuilds(tgl, tmp_path):
+    path = tmp_path / "log.txt"
+    write(path, b"abcdefg\nhijklmn\n", 1)   # 16 字节
+    open_source(tgl, path).close()
+    write(path, b"x\n\nz\nabcdefghijkl", 2)  # 17 字节，内容不同
+    with open_source(tgl, path) as source:
+        assert list(source) == ["x", "", "z", "abcdefghijkl"]
+
+
+def test_shrink_rebuilds(tgl, tmp_path):
+    path = tmp_path / "log.txt"
+    write(path, b"one\ntwo\nthree\n", 1)
+    open_source(tgl, path).close()
+    write(path, b"uno\n", 2)
+    with open_source(tgl, path) as source:
+        assert list(source) == ["uno"]
+
+
+def test_listbox_over_source(tgl, tmp_path):
+    path = tmp_path / "log.txt"
+    write(path, "".join(f"第 {i} 行\n" for i in range(5000)).encode("utf-8"), 1)
+    with tgl.MmapLineSource(str(path), persist=False) as source:
+        assert source.wait_for_line(4999, timeout=10)
+        listbox = tgl.ListBox(title="log", width=30, height=8)
+        listbox.screen = tgl.Screen(tgl.HeadlessSink(), 40, 10)
+        listbox.items = source
+        listbox.handle_input(tgl.Key.END)
+        listbox.render(0, 0)
+        text = listbox.screen.snapshot().text
+        assert text[6].startswith("│  第 4999 行")
+        assert listbox.handle_input("\r") == 4999
+        for key in "1234\r":
+            listbox.handle_input(key)
+        assert listbox.handle_input("\r") == 1234
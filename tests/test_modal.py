@@ -0,0 +1,90 @@
+import pytest
+
+
+@pytest.fixture
+def ui(tgl):
+    ui = tgl.UIManager()
+    tgl._set_screen(ui, tgl.Screen(tgl.HeadlessSink(), 80, 24))
+    for i in range(2):
+        listbox = tgl.ListBox(title=f"list{i}", width=30, height=10)
+        listbox.items = [f"主机-{n}" for n in range(40)]
+        ui.add_component(listbox, row=0, column=i)
+    ui.initialize()
+    ui.running = True
+    return ui
+
+
+def inside(rect, layer):
+    x, y, w, h = rect
+    comp = layer.component
+    return layer.x <= x and x + w <= layer.x + comp.width and layer.y <= y and y + h <= layer.y + comp.height
+
+
+def test_close_restores_only_covered_region(tgl, ui):
+    before = ui.screen.snapshot()
+    ui.popup_dialog("删除这些主机？\n此操作不可撤销")
+    layer = ui.layers[-1]
+    opened = ui.screen.snapshot()
+    rects = tgl.diff_snapshots(before, opened)
+    assert rects and all(inside(rect, layer) for rect in rects)
+
+    sink = ui.screen.stream
+    written = sink.bytes_written
+    ui.close_modal()
+    ui.screen.flush()
+    restore_bytes = sink.bytes_written - written
+    assert tgl.diff_snapshots(before, ui.screen.snapshot()) == []
+
+    written = sink.bytes_written
+    ui.initialize()
+    assert 0 < restore_bytes < sink.bytes_written - written
+
+
+def test_modal_receives_input_and_reports_result(tgl, ui):
+    results = []
+    listbox = ui.components[0]
+    ui.popup_dialog("继续？", on_close=results.append)
+    ui.process_keys([tgl.Key.DOWN, tgl.Key.RIGHT])
+    assert listbox.cursor_pos == 0
+    assert ui.layers[-1].component.selected == 1
+    ui.process_keys([tgl.Key.ENTER])
+    assert results == [1]
+    assert not ui.layers
+    ui.process_keys([tgl.Key.DOWN])
+    assert listbox.cursor_pos == 1
+
+
+def test_escape_closes_modal_without_quitting(tgl, ui):
+    results = []
+    ui.popup_dialog("继续？", on_close=results.append)
+    ui.process_keys([tgl.Key.ESC])
+    assert results == [None]
+    assert ui.running
+
+
+def test_nested_layers_close_in_lifo_order(tgl, ui):
+    before = ui.screen.snapshot()
+    ui.popup_dialog("第一层", title="outer")
+    middle = ui.screen.snapshot()
+    # 第二层的左边界切开第一层中的全角字符
+    ui.open_modal(tgl.Dialog("第二层"), x=ui.layers[0].x + 3, y=ui.layers[0].y + 2)
+    ui.close_modal()
+    assert tgl.diff_snapshots(middle, ui.screen.snapshot()) == []
+    ui.close_modal()
+    assert tgl.diff_snapshots(before, ui.screen.snapshot()) == []
+
+
+def test_background_redraw_does_not_cover_dialog(tgl, ui):
+    ui.popup_dialog("等待中", title="busy")
+    opened = ui.screen.snapshot()
+    for comp in ui.components:
+        comp.cursor_pos = 5
+    ui.redraw()
+    assert tgl.diff_snapshots(opened, ui.screen.snapshot()) == []
+    ui.close_modal()
+    ui.redraw()
+    # 关闭后补上被推迟的更新，与整屏重绘的结果一致
+    updated = ui.screen.snapshot()
+    assert tgl.diff_snapshots(opened, updated)
+    ui.initialize()
+    assert tgl.diff_snapshots(ui.screen.snapshot(), updated) == []
@@ -0,0 +1,74 @@
+import multiprocessing
+import pickle
+from multiprocessing import shared_memory
+
+import pytest
+
+
+def work(counter, steps):
+    for _ in range(steps):
+        counter.add()
+    counter.close()
+    return steps
+
+
+@pytest.fixture
+def tty(v12, monkeypatch):
+    monkeypatch.setattr(v12, "is_terminal", lambda: True)
+
+
+def test_counters_update_their_own_slot(v12, tty, capsys):
+    with v12.ProgressAggregator("任务", total=9, workers=3, refresh=60) as agg:
+        assert agg.values() == [0, 0, 0]
+        counter = agg.counter(1)
+        counter.add(4)
+        counter.add()
+        counter.close()
+        assert agg.values() == [0, 5, 0]
+    out = capsys.readouterr().out
+    assert "任务进度: |" in out
+    assert "  worker 1 进度" in out
+
+
+def test_counter_pickles_by_name(v12, tty):
+    with v12.ProgressAggregator("任务", total=4, workers=2, refresh=60) as agg:
+        counter = agg.counter(1)
+        counter.add()
+        clone = pickle.loads(pickle.dumps(counter))
+        assert (clone.name, clone.index) == (counter.name, 1)
+        clone.add(2)
+        clone.close()
+        counter.close()
+        assert agg.values() == [0, 3]
+
+
+def test_pool_workers_report_progress(v12, tty):
+    steps = [30, 50, 20]
+    with v12.ProgressAggregator("并行", total=sum(steps), workers=3,
+                                worker_totals=steps, refresh=0.01) as agg:
+        with multiprocessing.get_context("fork").Pool(3) as pool:
+            assert pool.starmap(work, [(agg.counter(i), n) for i, n in enumerate(steps)]) == steps
+        assert agg.values() == steps
+        name = agg.counter(0).name
+    # 共享内存由父进程在 stop 时释放
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=name)
+
+
+def test_render_redraws_in_place(v12, tty, capsys):
+    agg = v12.ProgressAggregator("任务", total=8, workers=2, refresh=60)
+    try:
+        agg.render()
+        first = capsys.readouterr().out
+        assert first.count("\n") == 3
+        assert first.startswith("\033[2K")
+        counter = agg.counter(0)
+        counter.add(4)
+        counter.close()
+        agg.render()
+        second = capsys.readouterr().out
+        assert second.startswith("\033[3F")
+        assert "50.0%" in second.splitlines()[0]
+        assert "100.0%" in second.splitlines()[1]
+    finally:
+        agg.stop()
@@ -0,0 +1,139 @@
+import re
+from collections import deque
+
+import pytest
+
+UP, DOWN, END = "\xe0H", "\xe0P", "\xe0O"
+
+
+class FakeConsole:
+    """按顺序提供按键的 msvcrt 替身；扩展键写成 '\\xe0' + 扫描码"""
+    def __init__(self, keys):
+        self.keys = deque(ch for key in keys for ch in key)
+
+    def kbhit(self):
+        return bool(self.keys)
+
+    def getwch(self):
+        return self.keys.popleft()
+
+
+@pytest.fixture
+def run(v12, monkeypatch, capsys):
+    def run(keys, tty=True, **options):
+        monkeypatch.setattr(v12, "msvcrt", FakeConsole(keys))
+        monkeypatch.setattr(v12, "is_terminal", lambda stream=None: tty)
+        result = v12.render_options(**options)
+        return result, capsys.readouterr().out
+    return run
+
+
+OPTIONS = [f"option {i}" for i in range(40)]
+
+
+def test_arrow_keys_and_enter(run):
+    result, _ = run([DOWN, DOWN, UP, "\r"], input_type=1, options=OPTIONS, visible_rows=10)
+    assert result == 1
+
+
+def test_jump_digits_are_shown_and_cleared(run):
+    result, out = run(["1", "2", "\r", "\r"], input_type=1, options=OPTIONS, visible_rows=10)
+    assert result == 12
+    assert "跳转到第 1 行" in out and "跳转到第 12 行" in out
+    assert "\r\033[2K" in out.split("跳转到第 12 行")[1]  # 跳转后清除状态行
+
+
+def test_backspace_edits_jump_digits(run):
+    result, out = run(["3", "9", "\x08", "\r", "\r"], input_type=1, options=OPTIONS, visible_rows=10)
+    assert result == 3
+    assert "跳转到第 3 行" in out
+
+
+def test_jump_clamps_to_last_row(run):
+    result, _ = run(["9", "9", "\r", "\r"], input_type=1, options=OPTIONS, visible_rows=10)
+    assert result == 39
+
+
+def test_multi_select_grid(run):
+    grid = [["a", "b"], ["c", "d"]]
+    result, _ = run([" ", DOWN, "\xe0M", " ", "\r"], input_type=2, array_size=(2, 2),
+                    options=grid, multi_select=True)
+    assert sorted(result) == [(0, 0), (1, 1)]
+
+
+def test_non_tty_prints_rows_once(run):
+    result, out = run([END, "\r"], tty=False, input_type=1, options=OPTIONS, visible_rows=5)
+    assert result == 39
+    assert "\033[" not in out
+    assert out.count("option ") == 5
+
+
+REWRITE = re.compile(r"\033\[(\d+)F\033\[2K")
+
+
+def rewritten_rows(out):
+    """输出中按行重写的次数（不含状态行）"""
+    return len(REWRITE.findall(out))
+
+
+def emulate(out):
+    """极简终端：只支持换行、回车、CPL/CNL 和清除整行，返回各行文本（去掉颜色）"""
+    out = re.sub(r"\033\[[\d;]*m", "", out)
+    lines, row, col = [""], 0, 0
+    for token in re.findall(r"\033\[(\d*)([A-Za-z])|(\r)|(\n)|([^\033\r\n]+)", out):
+        n, command, cr, lf, text = token
+        if command == "F":
+            row, col = row - int(n), 0
+        elif command == "E":
+            row, col = row + int(n), 0
+        elif command == "K":
+            lines[row] = ""
+        elif cr:
+            col = 0
+        elif lf:
+            row, col = row + 1, 0
+        elif text:
+            lines[row] = lines[row][:col] + text + lines[row][col + len(text):]
+            col += len(text)
+        while len(lines) <= row:
+            lines.append("")
+    return [line.rstrip() for line in lines]
+
+
+def test_cursor_moves_rewrite_only_two_rows(run):
+    result, out = run([DOWN] * 5 + ["\r"], input_type=1, options=OPTIONS, visible_rows=10)
+    assert result == 5
+    # 首次显示光标重写1行，之后每次移动重写旧、新两行
+    assert rewritten_rows(out) == 1 + 5 * 2
+
+
+def test_scrolling_rewrites_whole_window(run):
+    result, out = run([END, "\r"], input_type=1, options=OPTIONS, visible_rows=5)
+    assert result == 39
+    assert rewritten_rows(out) == 1 + 5
+
+
+def test_toggling_selection_rewrites_one_row(run):
+    _, out = run([" ", " ", "\r"], input_type=1, options=OPTIONS, visible_rows=10, multi_select=True)
+    assert rewritten_rows(out) == 1 + 2
+
+
+def test_incremental_rewrites_leave_correct_screen(run):
+    keys = [DOWN, DOWN, " ", DOWN, " ", UP, "\xe0Q", "\xe0I", DOWN, END, "\xe0G", "\r"]
+    result, out = run(keys, input_type=1, options=OPTIONS, visible_rows=8, multi_select=True)
+    assert sorted(result) == [2, 3]
+    screen = emulate(out)
+    rows = screen[2:10]
+    assert rows[0] == "> [ ] option 0"
+    assert rows[2] == "  [√] option 2"
+    assert rows[3] == "  [√] option 3"
+    assert rows[7] == "  [ ] option 7"
+
+
+def test_grid_rewrites_cursor_row(run):
+    grid = [[f"r{r}c{c}" for c in range(3)] for r in range(4)]
+    result, out = run(["\xe0M", "\xe0M", DOWN, "\r"], input_type=2, array_size=(4, 3), options=grid)
+    assert result == (1, 2)
+    assert rewritten_rows(out) == 1 + 1 + 1 + 2
+    screen = emulate(out)
+    assert screen[2:6] == [f"  r{r}c0    r{r}c1    r{r}c2" for r in range(4)]
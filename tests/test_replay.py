@@ -0,0 +1,46 @@
+def make_ui(tgl):
+    ui = tgl.UIManager()
+    listbox = tgl.ListBox(title="hosts", width=30, height=8)
+    listbox.items = [f"host-{i}" for i in range(50)]
+    ui.add_component(listbox, row=0, column=0)
+    return ui, listbox
+
+
+def test_replay_collects_results_without_printing(tgl, capsys):
+    ui, listbox = make_ui(tgl)
+    events = [(0.0, tgl.Key.DOWN)] * 5 + [(0.0, tgl.Key.ENTER)]
+    report = tgl.replay_session(ui, events)
+    tgl.assert_state(listbox, cursor_pos=5)
+    assert report.results == [5]
+    assert len(report.events) == 6
+    assert capsys.readouterr().out == ""
+
+
+def test_replay_restores_screen(tgl):
+    ui, listbox = make_ui(tgl)
+    screen = ui.screen
+    tgl.replay_session(ui, [(0.0, tgl.Key.DOWN)])
+    assert ui.screen is screen
+    assert listbox.screen is screen
+    assert "handle_result" not in ui.__dict__
+    assert ui.running is False
+
+
+def test_replay_with_live_chart_terminates(tgl):
+    ui, listbox = make_ui(tgl)
+    chart = tgl.Sparkline(title="load", width=30, height=5, live=True)
+    ui.add_component(chart, row=1, column=0)
+    chart.push_many([1.0, 5.0, 3.0])
+    report = tgl.replay_session(ui, [(0.0, tgl.Key.DOWN), (0.0, tgl.Key.DOWN)])
+    assert len(report.events) == 2
+    assert not chart.pending
+    assert len(chart.samples) == 3
+
+
+def test_hidden_chart_does_not_render(tgl):
+    chart = tgl.Sparkline(width=30, height=5)
+    chart.visible = False
+    chart.push(1.0)
+    chart.poll()
+    chart.render(0, 0)
+    assert chart.prev_state is None
@@ -0,0 +1,82 @@
+import time
+
+
+def test_degrade_after_consecutive_slow_frames(tgl):
+    scheduler = tgl.FrameScheduler(fps=10, degrade_after=3)
+    slow = scheduler.frame_interval * 2
+    for i in range(2):
+        scheduler.frame_done(i, i + slow)
+    assert not scheduler.degraded
+    scheduler.frame_done(2, 2 + slow)
+    assert scheduler.degraded
+    assert scheduler.metrics['degradations'] == 1
+    assert scheduler.metrics['over_budget'] == 3
+
+
+def test_fast_frame_resets_degrade_count(tgl):
+    scheduler = tgl.FrameScheduler(fps=10, degrade_after=3)
+    slow = scheduler.frame_interval * 2
+    for i, elapsed in enumerate((slow, slow, 0.0, slow, slow)):
+        scheduler.frame_done(i, i + elapsed)
+    assert not scheduler.degraded
+
+
+def test_recover_after_consecutive_fast_frames(tgl):
+    scheduler = tgl.FrameScheduler(fps=10, degrade_after=1, recover_after=3)
+    scheduler.frame_done(0, 0 + scheduler.frame_interval * 2)
+    assert scheduler.degraded
+    fast = scheduler.frame_interval / 4
+    assert not scheduler.frame_done(1, 1 + fast)
+    assert not scheduler.frame_done(2, 2 + fast)
+    assert scheduler.frame_done(3, 3 + fast)
+    assert not scheduler.degraded
+
+
+def test_poll_interval_backs_off_and_resets(tgl):
+    scheduler = tgl.FrameScheduler(fps=10, idle_interval=0.35)
+    for _ in range(3):
+        scheduler.polled(False)
+    assert scheduler.poll_interval == 0.35
+    scheduler.polled(True)
+    assert scheduler.poll_interval == scheduler.frame_interval
+
+
+class IdleInput:
+    def key_ready(self):
+        return False
+
+    def wait_key(self, timeout):
+        time.sleep(timeout)
+        return False
+
+    def enable_mouse(self, enabled=True):
+        pass
+
+
+def test_idle_main_loop_sleeps_until_next_poll(tgl):
+    class Background(tgl.UIComponent):
+        """一直有后台任务但从不交付结果，运行 duration 秒后退出主循环"""
+        def __init__(self, ui, duration):
+            super().__init__(tgl.ComponentType.CHART, 10, 3)
+            self.ui = ui
+            self.deadline = time.perf_counter() + duration
+
+        @property
+        def pending(self):
+            return True
+
+        def poll(self):
+            if time.perf_counter() >= self.deadline:
+                self.ui.running = False
+            return False
+
+    ui = tgl.UIManager()
+    tgl._set_screen(ui, tgl.Screen(tgl.HeadlessSink(), 80, 24))
+    ui.input = IdleInput()
+    ui.scheduler = tgl.FrameScheduler(fps=100, idle_interval=0.2)
+    ui.add_component(Background(ui, 1.0), row=0, column=0)
+    ui.main_loop()
+    metrics = ui.scheduler.metrics
+    assert metrics['idle_polls'] >= 5
+    # 帧间隔10ms：若按帧间隔醒来约100次，退避后只在轮询时刻醒来
+    assert metrics['wakeups'] < 20
@@ -0,0 +1,75 @@
+import io
+
+
+class FakeKernel32:
+    def __init__(self, codepage):
+        self.codepage = codepage
+
+    def GetConsoleOutputCP(self):
+        return self.codepage
+
+    def SetConsoleOutputCP(self, codepage):
+        self.codepage = codepage
+
+
+def test_start_switches_codepage_and_stop_restores(tgl, monkeypatch):
+    kernel32 = FakeKernel32(936)
+    monkeypatch.setattr(tgl, "kernel32", kernel32, raising=False)
+    monkeypatch.setattr(tgl.os, "name", "nt")
+    screen = tgl.Screen(io.StringIO(), 20, 5, line_mode=False, encoding="utf-8")
+    screen.start()
+    assert kernel32.codepage == 65001
+    screen.stop()
+    assert kernel32.codepage == 936
+
+
+def test_start_leaves_codepage_for_non_utf8_output(tgl, monkeypatch):
+    kernel32 = FakeKernel32(936)
+    monkeypatch.setattr(tgl, "kernel32", kernel32, raising=False)
+    monkeypatch.setattr(tgl.os, "name", "nt")
+    screen = tgl.Screen(io.StringIO(), 20, 5, line_mode=False, encoding="gbk")
+    screen.start()
+    screen.stop()
+    assert kernel32.codepage == 936
+
+
+class FakeConsole:
+    def __init__(self, mode):
+        self.mode = mode
+
+    def GetStdHandle(self, handle):
+        return handle
+
+    def GetConsoleMode(self, handle, mode):
+        mode._obj.value = self.mode
+
+    def SetConsoleMode(self, handle, mode):
+        self.mode = mode
+
+
+def test_enable_mouse_restores_original_input_mode(tgl, monkeypatch):
+    import ctypes
+    console = FakeConsole(0x0040 | 0x0020 | 0x0007)  # 快速编辑开启
+    monkeypatch.setattr(tgl, "kernel32", console, raising=False)
+    monkeypatch.setattr(tgl, "ctypes", ctypes, raising=False)
+    monkeypatch.setattr(tgl.os, "name", "nt")
+    original = console.mode
+    source = tgl.ConsoleInput()
+    source.enable_mouse()
+    assert console.mode & 0x0200 and not console.mode & 0x0040
+    source.enable_mouse()
+    source.enable_mouse(False)
+    assert console.mode == original
+
+
+def test_vt_input_without_mouse(tgl, monkeypatch):
+    import ctypes
+    console = FakeConsole(0x0040 | 0x0007)
+    monkeypatch.setattr(tgl, "kernel32", console, raising=False)
+    monkeypatch.setattr(tgl, "ctypes", ctypes, raising=False)
+    monkeypatch.setattr(tgl.os, "name", "nt")
+    source = tgl.ConsoleInput()
+    source.enable_vt_input()
+    assert console.mode == 0x0200 | 0x0040 | 0x0007  # 快速编辑保持不变
+    source.enable_vt_input(False)
+    assert console.mode == 0x0040 | 0x0007
@@ -0,0 +1,72 @@
+import pytest
+
+
+@pytest.fixture
+def scroll_ui(tgl):
+    """标题输入框 + 可滚动的20个输入框（每个高4行），视口占满屏幕宽度"""
+    rendered = []
+
+    class CountingBox(tgl.InputBox):
+        def render(self, x, y):
+            rendered.append(self.title)
+            super().render(x, y)
+
+    ui = tgl.UIManager()
+    tgl._set_screen(ui, tgl.Screen(tgl.HeadlessSink(), 40, 20))
+    header = CountingBox(title="header", width=40)
+    rows = [CountingBox(title=f"row{i}", width=40) for i in range(20)]
+    view = tgl.ScrollView(tgl.VBox(*rows, gap=0))
+    ui.set_root(tgl.VBox(header, view, gap=0))
+    ui.initialize()
+    return ui, view, rendered
+
+
+def test_components_outside_viewport_are_not_rendered(tgl, scroll_ui):
+    ui, view, rendered = scroll_ui
+    _, vy, _, vh = view.viewport
+    assert (vy, vh) == (4, 16)
+    assert rendered == ["header", "row0", "row1", "row2", "row3"]
+
+
+def test_partially_visible_component_is_clipped(tgl, scroll_ui):
+    ui, view, rendered = scroll_ui
+    rendered.clear()
+    ui.scroll(view, 2)
+    text = ui.screen.snapshot().text
+    # 视口上方的标题不被滚动内容覆盖
+    assert text[0].strip() == "header"
+    assert text[4].startswith("│")  # row0 的标题和上边框已滚出视口
+    assert text[18].strip() == "row4"
+    # 只重绘新露出的两行所在的组件
+    assert rendered == ["row4"]
+
+
+def test_offset_is_clamped_to_content(tgl, scroll_ui):
+    ui, view, rendered = scroll_ui
+    assert view.content_height == 80
+    ui.scroll(view, 1000)
+    assert view.offset == 80 - 16
+    ui.scroll(view, -5)
+    assert view.offset == 0
+
+
+def test_scroll_matches_full_repaint(tgl, scroll_ui):
+    ui, view, rendered = scroll_ui
+    for offset in (3, 9, 40, 38, 0):
+        ui.scroll(view, offset)
+        scrolled = ui.screen.snapshot()
+        fresh = tgl.Screen(tgl.HeadlessSink(), 40, 20)
+        tgl._set_screen(ui, fresh)
+        ui.initialize()
+        assert tgl.diff_snapshots(fresh.snapshot(), scrolled) == []
+
+
+def test_focus_scrolls_component_into_view(tgl, scroll_ui):
+    ui, view, rendered = scroll_ui
+    ui.set_focus(8)  # row7：内容中第28~31行
+    _, vy, _, vh = view.viewport
+    x, y = ui.layout.get_position(ui.components[8])
+    assert vy <= y and y + 4 <= vy + vh
+    assert view.offset == 32 - 16
+    ui.set_focus(1)
+    assert view.offset == 0
@@ -0,0 +1,107 @@
+import asyncio
+
+
+def test_decode_complete_sequences(tgl):
+    keys, rest = tgl.decode_keys("a\x1b[B\x1bOA\x1b[1;2C\r\n\x7f")
+    assert keys == ["a", tgl.Key.DOWN, tgl.Key.UP, tgl.Key.SHIFT_RIGHT, tgl.Key.ENTER, tgl.Key.BACKSPACE]
+    assert rest == ""
+
+
+def test_decode_split_sequences(tgl):
+    text = "x\x1b[1;2A"
+    for cut in range(1, len(text)):
+        keys, rest = tgl.decode_keys(text[:cut])
+        more, rest = tgl.decode_keys(rest + text[cut:])
+        assert keys + more == ["x", tgl.Key.SHIFT_UP]
+        assert rest == ""
+
+
+def test_decode_trailing_escape_waits(tgl):
+    assert tgl.decode_keys("a\x1b") == (["a"], "\x1b")
+    assert tgl.decode_keys("\x1bO") == ([], "\x1bO")
+    assert tgl.decode_keys("\x1b", final=True) == ([tgl.Key.ESC], "")
+    assert tgl.decode_keys("\x1b\x1b[A") == (["\x1b\x1b", "[", "A"], "")
+
+
+def run_session(tgl, scenario, setup):
+    async def main():
+        server = tgl.SessionServer(setup, width=40, height=12)
+        listener = await server.start()
+        client = tgl.SessionClient(40, 12)
+        await client.connect(port=listener.sockets[0].getsockname()[1])
+        await client.receive()
+        try:
+            return await scenario(server, client)
+        finally:
+            client.writer.close()
+            listener.close()
+            await listener.wait_closed()
+    return asyncio.run(main())
+
+
+def listbox_setup(tgl):
+    def setup(ui):
+        listbox = tgl.ListBox(title="hosts", width=30, height=8, filterable=True)
+        listbox.items = [f"host-{i}" for i in range(20)]
+        ui.add_component(listbox, row=0, column=0)
+    return setup
+
+
+def test_split_escape_sequence_is_not_esc(tgl):
+    async def scenario(server, client):
+        listbox = server.sessions[0].ui.components[0]
+        client.writer.write(b"\x1b")
+        await client.writer.drain()
+        await asyncio.sleep(0.01)
+        client.writer.write(b"[B")
+        assert await client.receive()
+        return listbox.cursor_pos
+
+    assert run_session(tgl, scenario, listbox_setup(tgl)) == 1
+
+
+def test_lone_escape_flushes_after_timeout(tgl):
+    async def scenario(server, client):
+        client.writer.write(b"\x1b")
+        return await client.receive(idle=1.0)
+
+    assert run_session(tgl, scenario, listbox_setup(tgl)) is False
+
+
+def test_session_end_closes_components(tgl):
+    listboxes = []
+
+    def setup(ui):
+        listbox_setup(tgl)(ui)
+        listboxes.append(ui.components[0])
+
+    async def scenario(server, client):
+        await client.send("h")
+        await client.receive()
+        listboxes.append(listboxes[0]._filter)
+        await client.send(tgl.Key.ESC)
+        return await client.receive(idle=1.0)
+
+    assert run_session(tgl, scenario, setup) is False
+    listbox, fuzzy = listboxes
+    assert listbox._filter is None
+    assert not fuzzy._thread.is_alive()
+
+
+def test_setup_error_closes_connection(tgl):
+    def setup(ui):
+        raise RuntimeError("bad layout")
+
+    async def main():
+        server = tgl.SessionServer(setup, width=40, height=12)
+        listener = await server.start()
+        client = tgl.SessionClient(40, 12)
+        await client.connect(port=listener.sockets[0].getsockname()[1])
+        try:
+            return await client.receive(idle=1.0)
+        finally:
+            client.writer.close()
+            listener.close()
+            await listener.wait_closed()
+
+    assert asyncio.run(main()) is False
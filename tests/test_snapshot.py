@@ -0,0 +1,85 @@
+import pytest
+
+
+def make_screen(tgl):
+    return tgl.Screen(tgl.HeadlessSink(), 40, 10)
+
+
+def test_snapshot_trims_rows_and_keeps_styled_runs(tgl):
+    screen = make_screen(tgl)
+    screen.write_at(2, 1, "hello")
+    screen.write_at(0, 3, "warn", tgl.Color.BLUE_TEXT)
+    snap = screen.snapshot()
+    assert (snap.width, snap.height) == (40, 10)
+    assert snap.text[1] == "  hello"
+    assert snap.text[0] == ""
+    assert snap.styles == ((0, 3, 4, tgl.Color.BLUE_TEXT),)
+
+
+def test_snapshot_round_trips_through_json(tgl, tmp_path):
+    screen = make_screen(tgl)
+    screen.write_at(0, 0, "名字", tgl.Color.SELECTED_BG)
+    snap = screen.snapshot()
+    snap.save(tmp_path / "golden.json")
+    assert tgl.Snapshot.load(tmp_path / "golden.json") == snap
+
+
+def test_diff_merges_adjacent_rows_into_rectangles(tgl):
+    screen = make_screen(tgl)
+    before = screen.snapshot()
+    screen.write_at(5, 2, "abc")
+    screen.write_at(6, 3, "abcd")
+    screen.write_at(0, 8, "x")
+    assert tgl.diff_snapshots(before, screen.snapshot()) == [(5, 2, 5, 2), (0, 8, 1, 1)]
+    assert tgl.diff_snapshots(screen.snapshot(), screen.snapshot()) == []
+
+
+def test_diff_detects_style_only_change(tgl):
+    screen = make_screen(tgl)
+    screen.write_at(0, 0, "same")
+    before = screen.snapshot()
+    screen.write_at(1, 0, "am", tgl.Color.HIGHLIGHT)
+    assert tgl.diff_snapshots(before, screen.snapshot()) == [(1, 0, 2, 1)]
+
+
+def test_assert_golden_writes_then_compares(tgl, tmp_path):
+    path = tmp_path / "screen.json"
+    screen = make_screen(tgl)
+    screen.write_at(0, 0, "ready")
+    tgl.assert_golden(screen, path)
+    assert path.exists()
+    tgl.assert_golden(screen, path)
+    screen.write_at(0, 0, "READY")
+    with pytest.raises(AssertionError, match=r"\(0,0 5x1\)"):
+        tgl.assert_golden(screen, path)
+    tgl.assert_golden(screen, path, update=True)
+    tgl.assert_golden(screen, path)
+
+
+def test_frame_byte_budget(tgl, tmp_path):
+    path = tmp_path / "screen.json"
+    screen = make_screen(tgl)
+    screen.write_at(0, 0, "x" * 30)
+    screen.flush()
+    assert screen.last_frame_bytes >= 30
+    tgl.assert_golden(screen, path)
+    with pytest.raises(AssertionError, match="budget 10"):
+        tgl.assert_golden(screen, path, max_frame_bytes=10)
+    screen.flush()
+    assert screen.last_frame_bytes == 0
+    tgl.assert_golden(screen, path, max_frame_bytes=10)
+
+
+def test_replay_reports_frames_over_budget(tgl):
+    ui = tgl.UIManager()
+    listbox = tgl.ListBox(title="hosts", width=30, height=8)
+    listbox.items = [f"host-{i}" for i in range(50)]
+    ui.add_component(listbox, row=0, column=0)
+    frames = []
+    report = tgl.replay_session(ui, [(0.0, tgl.Key.DOWN), (0.0, tgl.Key.END)],
+                                on_frame=lambda i, key, screen: frames.append((i, key, screen.snapshot())))
+    assert [(i, key) for i, key, _ in frames] == [(0, tgl.Key.DOWN), (1, tgl.Key.END)]
+    assert tgl.diff_snapshots(frames[0][2], frames[1][2])
+    sizes = [size for _, _, size in report.events]
+    assert report.over_budget(max(sizes)) == []
+    assert report.over_budget(min(sizes) - 1) == [(i, key, size) for i, (key, _, size) in enumerate(report.events)]
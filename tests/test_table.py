@@ -0,0 +1,59 @@
+def view(table):
+    return [table.rows[table.row_index(pos)] for pos in range(len(table.rows))]
+
+
+def make_table(tgl, rows):
+    table = tgl.Table(columns=[tgl.Column("name"), tgl.Column("size", int)])
+    table.set_rows(rows)
+    return table
+
+
+ROWS = [("b", "3"), ("a", "10"), ("c", "1"), ("a", "2")]
+
+
+def test_sort_by_typed_column(tgl):
+    table = make_table(tgl, ROWS)
+    table.sort_by(1)
+    assert [row[1] for row in view(table)] == ["1", "2", "3", "10"]
+
+
+def test_toggle_direction_reuses_permutation(tgl):
+    table = make_table(tgl, ROWS)
+    table.sort_by(1)
+    order = table._order
+    table.sort_by(1)
+    assert table.sort_keys == [(1, True)]
+    assert table._order is order
+    assert [row[1] for row in view(table)] == ["10", "3", "2", "1"]
+
+
+def test_multi_key_sort(tgl):
+    table = make_table(tgl, ROWS)
+    table.sort_by(0)
+    table.sort_by(1, add=True)
+    table.sort_by(1, add=True)
+    assert view(table) == [("a", "10"), ("a", "2"), ("b", "3"), ("c", "1")]
+
+
+def test_extend_merges_into_sorted_view(tgl):
+    table = make_table(tgl, ROWS)
+    table.sort_by(1)
+    table.extend([("d", "5"), ("e", "0"), ("f", "99")])
+    expected = sorted(table.rows, key=lambda row: int(row[1]))
+    assert view(table) == expected
+
+
+def test_cursor_stays_on_row_when_sorting(tgl):
+    table = make_table(tgl, ROWS)
+    table.cursor_pos = 2  # ("c", "1")
+    table.sort_by(1)
+    assert view(table)[table.cursor_pos] == ("c", "1")
+    table.sort_by(1)
+    assert view(table)[table.cursor_pos] == ("c", "1")
+
+
+def test_short_rows_are_padded(tgl):
+    table = make_table(tgl, [("x",), ("y", "4")])
+    assert table.rows[0] == ("x", None)
+    table.sort_by(1)
+    assert view(table) == [("x", None), ("y", "4")]
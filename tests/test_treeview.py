@@ -0,0 +1,120 @@
+import time
+
+import pytest
+
+
+def loader(value):
+    if value is None:
+        return [(f"dir{i}", i, True) for i in range(5)]
+    if value == 3:
+        return [f"file{j}" for j in range(2500)]
+    if value == 4:
+        raise OSError("permission denied")
+    return [f"{value}-{j}" for j in range(3)]
+
+
+def settle(tree):
+    deadline = time.monotonic() + 5
+    while tree.pending:
+        assert time.monotonic() < deadline
+        tree.poll()
+        time.sleep(0.001)
+
+
+def flatten(node):
+    rows = []
+    for child in node.children or ():
+        rows.append(child)
+        if child.expanded:
+            rows.extend(flatten(child))
+    return rows
+
+
+def check_index(tree):
+    rows = flatten(tree.root)
+    assert tree._count() == len(rows)
+    for pos, node in enumerate(rows):
+        assert tree._node_at(pos) is node
+        assert tree._position(node) == pos
+
+
+def test_streamed_children_are_indexed(tgl):
+    tree = tgl.TreeView(loader=loader)
+    settle(tree)
+    tree.expand(3)
+    settle(tree)
+    assert tree._count() == 5 + 2500
+    assert tree._node_at(4).label == "file0"
+    assert tree._node_at(5 + 2500 - 1).label == "dir4"
+    check_index(tree)
+
+
+def test_nested_expand_and_collapse(tgl):
+    tree = tgl.TreeView(loader=loader)
+    settle(tree)
+    tree.expand(1)
+    settle(tree)
+    tree.expand(5)  # dir2，位于 dir1 的3个子节点之后
+    settle(tree)
+    check_index(tree)
+    tree.collapse(1)
+    assert tree._count() == 5 + 3
+    check_index(tree)
+    tree.expand(1)  # 从缓存恢复
+    assert tree._count() == 5 + 3 + 3
+    check_index(tree)
+
+
+def test_cursor_left_jumps_to_parent(tgl):
+    tree = tgl.TreeView(loader=loader)
+    settle(tree)
+    tree.expand(2)
+    settle(tree)
+    tree.cursor_pos = 5
+    tree.handle_input(tgl.Key.LEFT)
+    assert tree.cursor_pos == 2
+
+
+def test_loader_error_is_shown_on_node(tgl):
+    tree = tgl.TreeView(loader=loader, width=60)
+    tree.screen = tgl.Screen(tgl.HeadlessSink(), 80, 20, line_mode=False)
+    settle(tree)
+    tree.expand(4)
+    settle(tree)
+    node = tree._node_at(4)
+    assert isinstance(node.error, OSError)
+    assert not node.expanded
+    tree.render(0, 0)
+    assert "加载失败: permission denied" in tree.screen.plain_text()
+
+
+def test_async_loader(tgl):
+    async def agen(value):
+        for i in range(3):
+            yield f"item{i}"
+
+    tree = tgl.TreeView(loader=agen)
+    settle(tree)
+    assert [tree._node_at(i).label for i in range(3)] == ["item0", "item1", "item2"]
+
+
+def test_missing_loader_is_an_error(tgl):
+    with pytest.raises(TypeError):
+        tgl.TreeView()
+
+
+def test_close_stops_streaming(tgl):
+    import threading
+    release = threading.Event()
+
+    def slow(value):
+        yield "first"
+        release.wait(5)
+        yield from (f"item{j}" for j in range(5000))
+
+    tree = tgl.TreeView(loader=slow)
+    tree.close()
+    release.set()
+    time.sleep(0.05)
+    assert not tree.pending
+    assert not tree._incoming